@@ -5,32 +5,55 @@ Professional SaaS Sales Data Analysis Project
 This script performs a comprehensive analysis of SaaS sales data for January 2025.
 It includes data cleaning, pivot table analysis, visualizations, and business insights.
 
+Usage:
+    python saas_sales_analysis.py [INPUT] [--config PATH] [--output-dir DIR]
+                                  [--sheet NAME] [--header-row N] [--table NAME]
+                                  [--steps summary,charts,insights,reports] [--no-charts]
+                                  [--serve]
+                                  [--metrics PATH] [--trace PATH]
+                                  [--profile-stage STAGE [--profile-mode MODE]
+                                   [--profile-output PATH]]
+
+INPUT is one of:
+    sales.csv                     a CSV export
+    sales.xlsx                    an Excel workbook (--sheet, --header-row)
+    report.pdf                    a PDF report with sales tables
+    scan.png, scans/              scanned sales sheets (PNG, JPEG, TIFF), OCR'd
+    exports/, 'exports/*.csv'     a directory or glob of CSV, Excel or PDF exports
+    sqlite:///sales.db            a database URL (--table)
+The built-in sample dataset is analyzed when it is omitted. With --serve the
+analysis service answers queries over HTTP (see service_config); INPUT, if
+given, is ingested at startup.
+
+Importing this module runs nothing: call `main()` (or
+`main(['sales.csv', '--no-charts'])` from a job runner). pandas and the
+pipeline modules are imported when the analysis starts, and matplotlib/
+seaborn only inside the chart workers, so `--help` returns immediately and
+data-only runs never load the plotting libraries.
+
 Author: Senior Data Analyst
 Date: July 2025
 """
 
 # Import required libraries
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
-import numpy as np
+import argparse
+import contextlib
+import io
+import os
+import time
 
-# Set professional styling for visualizations
-plt.style.use('seaborn-v0_8-whitegrid')
-sns.set_palette("husl")
+# Startup is measured from here to the point the data is ready for cleaning
+_STARTUP_CLOCK = time.perf_counter()
 
-print("=" * 60)
-print("SaaS Sales Data Analysis - January 2025")
-print("=" * 60)
-print()
+# Steps that can be selected after Steps 1-2 (loading and cleaning)
+ANALYSIS_STEPS = ('summary', 'charts', 'insights', 'reports')
 
-# ============================================================================
-# STEP 1: DATA SIMULATION AND SETUP
-# ============================================================================
+# Scoped reports write many files, so they only run when requested
+DEFAULT_STEPS = ('summary', 'charts', 'insights')
 
-print("Step 1: Creating representative SaaS sales dataset...")
-print()
+DEFAULT_STARTUP_BUDGET_SECONDS = 1.0
+
+TREND_WEEKS_SHOWN = 8
 
 # Create the dataset based on the provided sample with known data points
 # This simulates the raw data that would typically be loaded from a CSV file
@@ -101,177 +124,608 @@ raw_data = {
     ]
 }
 
-# Create the DataFrame (simulating loaded CSV data)
-df = pd.DataFrame(raw_data)
 
-print(f"Original dataset created with {len(df)} rows and {len(df.columns)} columns")
-print("Dataset includes known issues: extraneous index column, duplicates, and negative revenue")
-print()
+def _parse_steps(value):
+    steps = [step.strip() for step in value.split(',') if step.strip()]
+    unknown = [step for step in steps if step not in ANALYSIS_STEPS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown step(s) {', '.join(unknown)}. "
+                                         f"Options: {', '.join(ANALYSIS_STEPS)}")
+    return steps
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments; `argv` defaults to sys.argv[1:]."""
+    parser = argparse.ArgumentParser(
+        description='Clean, summarize, chart and report on SaaS sales data.')
+    parser.add_argument('input', nargs='?',
+                        help='CSV export, Excel workbook, PDF report, scanned image, '
+                             'directory or glob of exports or scans, or database URL '
+                             'such as sqlite:///sales.db '
+                             '(default: built-in sample dataset)')
+    parser.add_argument('--config',
+                        help='analysis configuration YAML (default: bundled analysis_config.yaml)')
+    parser.add_argument('--output-dir', default='.',
+                        help='directory chart files are written to (default: current directory)')
+    parser.add_argument('--steps', type=_parse_steps, default=list(DEFAULT_STEPS),
+                        help=f"comma-separated steps to run after cleaning, of "
+                             f"{', '.join(ANALYSIS_STEPS)} (default: {','.join(DEFAULT_STEPS)})")
+    parser.add_argument('--sheet',
+                        help='Excel input: read only this sheet (default: every sheet '
+                             'with sales columns)')
+    parser.add_argument('--header-row', type=int, metavar='N',
+                        help='Excel input: 1-based header row (default: detected)')
+    parser.add_argument('--table',
+                        help='database input: table or view holding the sales rows '
+                             '(default: file_format_config.database.table)')
+    parser.add_argument('--no-charts', '--headless', dest='no_charts', action='store_true',
+                        help='skip chart rendering; matplotlib and seaborn are never imported')
+    parser.add_argument('--serve', action='store_true',
+                        help='run the analysis service (see service_config) instead of one '
+                             'analysis; the input, if given, is ingested at startup')
+
+    profiling = parser.add_argument_group('profiling')
+    profiling.add_argument('--metrics', metavar='PATH',
+                           help='write per-stage metrics and cleaning counters as JSON')
+    profiling.add_argument('--trace', metavar='PATH',
+                           help='write a Chrome trace (chrome://tracing, Perfetto) of every stage')
+    profiling.add_argument('--profile-stage', metavar='STAGE',
+                           help='run one stage (e.g. clean.dedup, read) under a detailed profiler')
+    profiling.add_argument('--profile-mode', choices=('cprofile', 'tracemalloc'),
+                           default='cprofile',
+                           help='cprofile dumps pstats to --profile-output; tracemalloc adds '
+                                'the peak allocated bytes to the stage metrics (default: cprofile)')
+    profiling.add_argument('--profile-output', metavar='PATH',
+                           help='cProfile output file (default: <STAGE>.prof)')
+    return parser.parse_args(argv)
+
 
 # ============================================================================
-# STEP 2: DATA CLEANING AND PREPARATION
+# STEP 1: DATA SIMULATION AND SETUP
 # ============================================================================
 
-print("Step 2: Data Cleaning and Preparation")
-print("-" * 40)
-
-# 2.1 Remove the extraneous 'Unnamed: 0' column
-print("2.1 Removing extraneous 'Unnamed: 0' column...")
-df_cleaned = df.drop('Unnamed: 0', axis=1)
-print(f"    ✓ Removed extraneous index column")
-
-# 2.2 Correct data types
-print("2.2 Correcting data types...")
-df_cleaned['Date'] = pd.to_datetime(df_cleaned['Date'])
-df_cleaned['Revenue'] = pd.to_numeric(df_cleaned['Revenue'])
-df_cleaned['Deals Closed'] = pd.to_numeric(df_cleaned['Deals Closed'])
-print(f"    ✓ Converted Date to datetime format")
-print(f"    ✓ Ensured Revenue and Deals Closed are numeric")
-
-# 2.3 Handle negative revenue (treat as data entry errors)
-print("2.3 Removing rows with negative revenue...")
-rows_before = len(df_cleaned)
-df_cleaned = df_cleaned[df_cleaned['Revenue'] >= 0]
-negative_revenue_removed = rows_before - len(df_cleaned)
-print(f"    ✓ Removed {negative_revenue_removed} row(s) with negative revenue")
-print(f"    → Rationale: Negative revenue values are treated as data entry errors")
-
-# 2.4 Remove complete duplicate rows
-print("2.4 Removing duplicate rows...")
-rows_before_dedup = len(df_cleaned)
-df_cleaned = df_cleaned.drop_duplicates()
-duplicates_removed = rows_before_dedup - len(df_cleaned)
-print(f"    ✓ Removed {duplicates_removed} complete duplicate row(s)")
-print(f"    → Rationale: Duplicate records skew analysis and indicate data quality issues")
-
-print()
-print("Data Cleaning Summary:")
-print(f"  • Original rows: {len(df)}")
-print(f"  • Rows with negative revenue removed: {negative_revenue_removed}")
-print(f"  • Duplicate rows removed: {duplicates_removed}")
-print(f"  • Final clean dataset: {len(df_cleaned)} rows")
-print()
-
-# 2.5 Final validation - show cleaned dataset info
-print("2.5 Final Dataset Validation:")
-print("=" * 30)
-df_cleaned.info()
-print()
+def _describe_mapping(rename):
+    renamed = [f"'{source_column}' → {column}"
+               for source_column, column in rename.items() if source_column != column]
+    return f": {', '.join(renamed)}" if renamed else " (headers already canonical)"
+
+
+def load_sales_data(input_path, config, sheet_name=None, header_row=None, table=None):
+    """
+    Step 1: resolve the input and prepare the chunks to clean.
+
+    `sheet_name` and `header_row` (0-based) override sheet and header
+    detection for Excel workbooks; `table` overrides the configured table
+    for database URLs.
+
+    Returns
+    -------
+    dict
+        Everything Step 2 needs: the input mode, raw `chunks`,
+        `batch_files` or a `sql_source` to aggregate in the database,
+        cache and dedup-index state.
+    """
+    from sales_batch import is_batch_input, resolve_inputs
+    from sales_cache import cache_key, is_cached
+    from sales_config import get_template
+    from sales_dedup import DEFAULT_CAPACITY, FingerprintIndex
+    from sales_dialect import describe_dialect, sniff_csv
+    from sales_dtypes import CategoryDictionary
+    from sales_excel import detect_sheet_layouts, is_excel_file, read_sales_excel
+    from sales_image import count_image_frames, read_sales_images, resolve_image_inputs
+    from sales_pdf import count_pdf_pages, is_pdf_file, read_sales_pdf
+    from sales_ingestion import read_csv_header, read_sales_csv
+    from sales_sql import SqlSalesSource, is_database_url
+    from schema_mapper import SchemaMapper
+
+    performance_config = config.get('performance_config', {})
+    cleaning_rules = get_template(config).get('cleaning_rules', {})
+    # Directories and globs of scanned sheets are one OCR stream, not a CSV
+    # batch; a database URL's query string ('?sslmode=require') is no glob
+    database_input = bool(input_path) and is_database_url(input_path)
+    image_files = (resolve_image_inputs(input_path)
+                   if input_path and not database_input else [])
+    batch_mode = (bool(input_path) and not database_input and not image_files
+                  and is_batch_input(input_path))
+    source = {
+        'input_path': input_path,
+        'batch_mode': batch_mode,
+        'dedup_index_path': None,
+        'dedup_index': None,
+        'category_dictionary_path': None,
+        'category_dictionary': None,
+        'cache_dir': None,
+        'cache_hit': False,
+        'sql_source': None,
+        'sql_pushdown': None,
+    }
+
+    if batch_mode:
+        print(f"Step 1: Batch-processing SaaS sales files matching '{input_path}'...")
+    elif input_path:
+        print(f"Step 1: Streaming SaaS sales data from '{input_path}'...")
+    else:
+        print("Step 1: Creating representative SaaS sales dataset...")
+    print()
+
+    if batch_mode:
+        # One worker process per file; per-file aggregates are merged in Step 2
+        source['batch_files'] = resolve_inputs(input_path)
+        max_workers = performance_config.get('max_workers')
+        print(f"Found {len(source['batch_files'])} file(s); processing with "
+              f"{max_workers or os.cpu_count()} worker process(es)")
+        # Each file is deduplicated on its own; see sales_batch
+        print("Note: rows duplicated across files are not detected in batch mode"
+              + (f"; dedup_index_path '{performance_config['dedup_index_path']}' is not used"
+                 if performance_config.get('dedup_index_path') else ""))
+    elif database_input:
+        # Map the table's columns like a CSV header, then let the database
+        # clean and aggregate as far as the cleaning rules allow
+        sql_source = SqlSalesSource(input_path, table, SchemaMapper(config), config)
+        print(f"Database table '{sql_source.table_name}' ({sql_source.dialect})"
+              + _describe_mapping(sql_source.mapping['rename']))
+        source['sql_source'] = sql_source
+        column_mapping = sql_source.mapping['rename']
+        strategy = cleaning_rules.get('handle_missing_values')
+        blocker = sql_source.aggregation_blocker(cleaning_rules,
+                                                 performance_config.get('dedup_index_path'))
+        if blocker is None:
+            source['sql_pushdown'] = 'aggregate'
+            print("Cleaning filters and Step 3-5 aggregation pushed down to the database")
+        else:
+            push_filters = (sql_source.options.get('pushdown', True)
+                            and sql_source.filters_pushable(strategy))
+            if push_filters:
+                source['sql_pushdown'] = 'filters'
+            print(f"Streaming rows from a server-side cursor ({blocker}"
+                  + ("; negative-revenue filter and deduplication pushed down)"
+                     if push_filters else ")"))
+            source['chunks'] = sql_source.read_chunks(
+                performance_config.get('chunk_size'), strategy, push_filters)
+    elif image_files:
+        # Pages are recognized in parallel and mapped like PDF tables
+        template = get_template(config)
+        image_options = config.get('file_format_config', {}).get('image', {})
+        pages = sum(count_image_frames(path) for path in image_files)
+        print(f"{len(image_files)} scanned image(s) with {pages} page(s); "
+              f"{image_options.get('ocr_engine', 'tesseract')} OCR"
+              + (" after preprocessing" if image_options.get('preprocessing', True) else ""))
+        column_mapping = {
+            'image': image_options,
+            'schema': {section: template.get(section)
+                       for section in ('required_columns', 'optional_columns')},
+        }
+        source['chunks'] = read_sales_images(
+            image_files, mapper=SchemaMapper(config),
+            chunksize=performance_config.get('chunk_size'),
+            max_workers=performance_config.get('max_workers'),
+            config=config,
+            cache_dir=performance_config.get('cache_dir'),
+        )
+    elif input_path and is_excel_file(input_path):
+        # Locate the sales table on each sheet from its first rows only
+        layouts = detect_sheet_layouts(input_path, SchemaMapper(config), sheet_name,
+                                       header_row, config)
+        usable = [layout for layout in layouts if not layout['missing_required']]
+        if not usable:
+            raise ValueError(f"No sheet in '{input_path}' matches the required column(s): "
+                             f"{', '.join(layouts[0]['missing_required'])}")
+        for layout in usable:
+            print(f"Sheet '{layout['sheet']}': header on row {layout['header_row'] + 1}"
+                  + _describe_mapping(layout['rename']))
+        skipped = [layout['sheet'] for layout in layouts if layout['missing_required']]
+        if skipped:
+            print(f"Skipped sheet(s) without sales columns: {', '.join(skipped)}")
+        column_mapping = {layout['sheet']: layout['rename'] for layout in usable}
+        source['chunks'] = read_sales_excel(
+            input_path, layouts=usable,
+            chunksize=performance_config.get('chunk_size'),
+            max_workers=performance_config.get('max_workers'),
+            config=config,
+        )
+    elif input_path and is_pdf_file(input_path):
+        # Tables are mapped onto the schema page by page as they are extracted
+        template = get_template(config)
+        pdf_options = config.get('file_format_config', {}).get('pdf', {})
+        print(f"PDF report with {count_pdf_pages(input_path)} page(s); "
+              f"{pdf_options.get('table_extraction_method', 'lattice')} table extraction")
+        column_mapping = {
+            'pdf': pdf_options,
+            'schema': {section: template.get(section)
+                       for section in ('required_columns', 'optional_columns')},
+        }
+        source['chunks'] = read_sales_pdf(
+            input_path, mapper=SchemaMapper(config),
+            chunksize=performance_config.get('chunk_size'),
+            max_workers=performance_config.get('max_workers'),
+            config=config,
+            cache_dir=performance_config.get('cache_dir'),
+        )
+    elif input_path:
+        # Detect the export's dialect from its first bytes only
+        dialect = sniff_csv(input_path, config.get('file_format_config', {}).get('csv'))
+        print(f"CSV dialect: {describe_dialect(dialect)}")
+        # Map the export's headers onto the canonical schema columns
+        mapping = SchemaMapper(config).map_columns(read_csv_header(input_path, dialect))
+        if mapping['missing_required']:
+            raise ValueError(f"No column in '{input_path}' matches required column(s): "
+                             f"{', '.join(mapping['missing_required'])}")
+        print(f"Column mapping resolved in {mapping['elapsed_seconds'] * 1000:.2f} ms"
+              + _describe_mapping(mapping['rename']))
+        # The dialect settles how cells parse, so it is part of the cache key
+        column_mapping = {'csv': dialect, 'rename': mapping['rename']}
+        source['chunks'] = read_sales_csv(
+            input_path,
+            chunksize=performance_config.get('chunk_size'),
+            memory_limit_mb=performance_config.get('memory_limit_mb'),
+            rename=mapping['rename'],
+            dialect=dialect,
+        )
+
+    if input_path and not batch_mode:
+        # Unchanged input cleaned under unchanged rules is served from the cache
+        cache_dir = performance_config.get('cache_dir')
+        # Database tables and directories of scans have no single file to hash
+        # for the cache key; scans are cached per page by sales_image instead
+        if cache_dir and os.path.isfile(input_path):
+            source['cache_dir'] = cache_dir
+            source['cache_key'] = cache_key(input_path, {
+                'cleaning_rules': cleaning_rules,
+                'column_mapping': column_mapping,
+            })
+            source['cache_hit'] = is_cached(cache_dir, source['cache_key'])
+
+        if source['cache_hit']:
+            print(f"Cleaned dataset found in cache '{cache_dir}' - skipping parsing and cleaning")
+        elif source['sql_pushdown'] != 'aggregate':
+            print(f"Reading in chunks (memory limit: {performance_config.get('memory_limit_mb')} MB)")
+
+        # Row fingerprints from earlier runs catch duplicates replayed in later deliveries
+        dedup_index_path = performance_config.get('dedup_index_path')
+        source['dedup_index_path'] = dedup_index_path
+        if dedup_index_path and os.path.exists(dedup_index_path):
+            source['dedup_index'] = FingerprintIndex.load(dedup_index_path)
+            print(f"Loaded {len(source['dedup_index']):,} row fingerprints "
+                  f"from '{dedup_index_path}'")
+        else:
+            source['dedup_index'] = FingerprintIndex(
+                mode=performance_config.get('dedup_index_mode', 'exact'),
+                capacity=performance_config.get('dedup_index_capacity') or DEFAULT_CAPACITY)
+
+        # Categories from earlier runs keep the dimension codes stable
+        category_dictionary_path = performance_config.get('category_dictionary_path')
+        source['category_dictionary_path'] = category_dictionary_path
+        if category_dictionary_path and os.path.exists(category_dictionary_path):
+            source['category_dictionary'] = CategoryDictionary.load(category_dictionary_path)
+            print(f"Loaded {len(source['category_dictionary']):,} category values "
+                  f"from '{category_dictionary_path}'")
+    elif not input_path:
+        import pandas as pd
+
+        # Create the DataFrame (simulating loaded CSV data)
+        df = pd.DataFrame(raw_data)
+        source['chunks'] = [df]
+
+        print(f"Original dataset created with {len(df)} rows and {len(df.columns)} columns")
+        print("Dataset includes known issues: extraneous index column, duplicates, and negative revenue")
+    print()
+    return source
+
 
 # ============================================================================
-# STEP 3: SUMMARY PIVOT TABLE
+# STEP 2: DATA CLEANING AND PREPARATION
 # ============================================================================
 
-print("Step 3: Sales Performance Summary (Pivot Table)")
-print("-" * 50)
+def clean_sales_data(source, config, query_cube=None):
+    """
+    Step 2: clean the Step 1 chunks and fold them into the Step 3-5 aggregates.
+
+    A `query_cube` (`sales_aggregation.SalesQueryCube`) is filled alongside,
+    for the analysis service.
+    """
+    from sales_batch import run_batch
+    from sales_cache import CleanedDataCacheWriter, read_cleaned_cache
+    from sales_cleaning import merge_cleaning_stats
+    from sales_config import get_template
+    from sales_missing import MissingValueHandler
+    from sales_outliers import OutlierDetector
+    from sales_pipeline import run_cleaned_pipeline, run_pipeline
+
+    performance_config = config.get('performance_config', {})
+    cleaning_rules = get_template(config).get('cleaning_rules', {})
+
+    print("Step 2: Data Cleaning and Preparation")
+    print("-" * 40)
+
+    # Clean each chunk and fold it into the running Step 3-5 aggregates; the
+    # full cleaned frame is only kept for the in-memory sample
+    if source['batch_mode']:
+        results = run_batch(
+            source['batch_files'],
+            max_workers=performance_config.get('max_workers'),
+            chunksize=performance_config.get('chunk_size'),
+            memory_limit_mb=performance_config.get('memory_limit_mb'),
+            config=config,
+            query_cube=query_cube,
+        )
+        print(f"Column mapping: {results['mapping_seconds'] * 1000:.2f} ms across "
+              f"{results['files_processed']} file(s)")
+    elif source['cache_hit']:
+        cached_chunks, cached_stats = read_cleaned_cache(source['cache_dir'], source['cache_key'])
+        results = run_cleaned_pipeline(cached_chunks, cached_stats, query_cube=query_cube)
+    elif source['sql_pushdown'] == 'aggregate':
+        # Only aggregates and cleaning counters come back from the database
+        aggregator, sql_stats = source['sql_source'].aggregate(
+            cleaning_rules.get('handle_missing_values'), query_cube)
+        results = run_cleaned_pipeline([], sql_stats, aggregator=aggregator)
+    else:
+        cache_writer = (CleanedDataCacheWriter(source['cache_dir'], source['cache_key'])
+                        if source['cache_dir'] else None)
+        results = run_pipeline(source['chunks'], keep_frame=not source['input_path'],
+                               dedup_index=source['dedup_index'],
+                               cache_writer=cache_writer,
+                               outlier_detector=OutlierDetector.from_config(cleaning_rules),
+                               missing_handler=MissingValueHandler.from_config(cleaning_rules),
+                               category_dictionary=source['category_dictionary'],
+                               query_cube=query_cube)
+        if source['dedup_index_path']:
+            results['dedup_index'].save(source['dedup_index_path'])
+        if source['category_dictionary_path']:
+            results['category_dictionary'].save(source['category_dictionary_path'])
+        if source['sql_pushdown'] == 'filters':
+            # Count the rows the database filtered before streaming the rest
+            merge_cleaning_stats(results['cleaning_stats'], source['sql_source'].pushed_stats(
+                cleaning_rules.get('handle_missing_values')))
+    cleaning_stats = results['cleaning_stats']
+    negative_revenue_removed = cleaning_stats['negative_revenue_removed']
+    duplicates_removed = cleaning_stats['duplicates_removed']
+    outliers_detected = cleaning_stats.get('outliers_detected', 0)
+    missing_values_filled = cleaning_stats.get('missing_values_filled', 0)
+    missing_rows_dropped = cleaning_stats.get('missing_rows_dropped', 0)
+
+    # 2.1 Remove the extraneous 'Unnamed: 0' column
+    print("2.1 Removing extraneous 'Unnamed: 0' column...")
+    print(f"    ✓ Removed extraneous index column")
+
+    # 2.2 Correct data types
+    print("2.2 Correcting data types...")
+    print(f"    ✓ Converted Date to datetime format")
+    print(f"    ✓ Ensured Revenue and Deals Closed are numeric")
+
+    # 2.3 Handle missing values
+    missing_strategy = cleaning_rules.get('handle_missing_values')
+    if missing_strategy:
+        print(f"2.3 Handling missing values ({missing_strategy})...")
+        print(f"    ✓ Filled {missing_values_filled} missing value(s)")
+        print(f"    ✓ Dropped {missing_rows_dropped} row(s) that could not be repaired")
+
+    # 2.4 Handle negative revenue (treat as data entry errors)
+    print("2.4 Removing rows with negative revenue...")
+    if not missing_strategy and missing_rows_dropped:
+        print(f"    ✓ Removed {missing_rows_dropped} row(s) with missing or unparseable revenue")
+    print(f"    ✓ Removed {negative_revenue_removed} row(s) with negative revenue")
+    print(f"    → Rationale: Negative revenue values are treated as data entry errors")
+
+    # 2.5 Remove complete duplicate rows
+    print("2.5 Removing duplicate rows...")
+    print(f"    ✓ Removed {duplicates_removed} complete duplicate row(s)")
+    print(f"    → Rationale: Duplicate records skew analysis and indicate data quality issues")
+
+    # 2.6 Detect outliers in Revenue and Deals Closed
+    outlier_method = cleaning_rules.get('outlier_detection', 'none')
+    if outlier_method and outlier_method != 'none':
+        outlier_action = cleaning_rules.get('outlier_action', 'flag')
+        print(f"2.6 Detecting outliers ({outlier_method.upper()}, action: {outlier_action})...")
+        print(f"    ✓ Detected {outliers_detected} outlier row(s)")
+        outlier_share = outliers_detected / max(cleaning_stats['rows_clean'], 1)
+        outlier_threshold = config.get('data_quality_config', {}).get('outlier_threshold')
+        if outlier_threshold is not None and outlier_share > outlier_threshold:
+            print(f"    ⚠ Outlier share {outlier_share:.1%} exceeds the "
+                  f"{outlier_threshold:.0%} data quality threshold")
+
+    # 2.7 Compact dtypes: shared-dictionary categoricals and downcast integers
+    bytes_before = cleaning_stats.get('bytes_before_optimization', 0)
+    bytes_after = cleaning_stats.get('bytes_after_optimization', 0)
+    if bytes_before and bytes_after:
+        print("2.7 Optimizing column dtypes...")
+        print(f"    ✓ Reduced cleaned data from {bytes_before / 1024:,.1f} KB to "
+              f"{bytes_after / 1024:,.1f} KB ({bytes_before / bytes_after:.1f}x smaller)")
+        print(f"    → Dimension columns share one category dictionary; integers are downcast")
+
+    print()
+    print("Data Cleaning Summary:")
+    print(f"  • Original rows: {cleaning_stats['rows_read']}")
+    if missing_strategy:
+        print(f"  • Missing values filled: {missing_values_filled}")
+        print(f"  • Rows with unrepairable missing values removed: {missing_rows_dropped}")
+    elif missing_rows_dropped:
+        print(f"  • Rows with missing revenue removed: {missing_rows_dropped}")
+    print(f"  • Rows with negative revenue removed: {negative_revenue_removed}")
+    print(f"  • Duplicate rows removed: {duplicates_removed}")
+    if outlier_method and outlier_method != 'none':
+        print(f"  • Outlier rows detected: {outliers_detected}")
+    print(f"  • Final clean dataset: {cleaning_stats['rows_clean']} rows")
+    print()
+
+    # 2.8 Final validation - show cleaned dataset info
+    if 'df_cleaned' in results:
+        df_cleaned = results['df_cleaned']
+        print("2.8 Final Dataset Validation:")
+        print("=" * 30)
+        df_cleaned.info()
+        print()
+
+    return results
+
 
-# Create pivot table with Region and Sales Rep as multi-level index
-sales_summary = df_cleaned.pivot_table(
-    index=['Region', 'Sales Rep'], 
-    values=['Revenue', 'Deals Closed'], 
-    aggfunc='sum'
-).round(0)
+# ============================================================================
+# STEP 3: SUMMARY PIVOT TABLE
+# ============================================================================
 
-# Reorder columns for better readability
-sales_summary = sales_summary[['Deals Closed', 'Revenue']]
+def print_sales_summary(results):
+    """Step 3: print the Region x Sales Rep pivot table."""
+    print("Step 3: Sales Performance Summary (Pivot Table)")
+    print("-" * 50)
+
+    # Region x Sales Rep totals, combined across all cleaned chunks
+    sales_summary = results['sales_summary']
+
+    print("SALES PERFORMANCE SUMMARY BY REGION AND SALES REP")
+    print("=" * 55)
+    print(sales_summary)
+    print()
+
+
+def print_time_series(results, config):
+    """Step 3: print the calendar rollups and weekday seasonality, as enabled."""
+    import pandas as pd
+
+    from sales_config import get_template
+
+    analysis_config = get_template(config).get('analysis_config', {})
+    time_series = results['time_series']
+
+    if analysis_config.get('trend_analysis', True):
+        print("REVENUE TRENDS")
+        print("=" * 55)
+        for name in ('monthly', 'quarterly'):
+            print(f"{name.capitalize()} totals:")
+            print(time_series[name].round(0).astype('int64'))
+            print()
+        print(f"Weekly totals (last {TREND_WEEKS_SHOWN} weeks):")
+        print(time_series['weekly'].tail(TREND_WEEKS_SHOWN).round(0).astype('int64'))
+        print()
+        rolling = time_series['rolling']
+        trailing = [f"{column.split()[-1]} " + ('n/a' if pd.isna(value) else f"${value:,.0f}")
+                    for column, value in rolling.iloc[-1].items()]
+        print(f"Trailing revenue as of {rolling.index[-1]:%B %d, %Y}: {', '.join(trailing)}")
+        print()
+
+    if analysis_config.get('seasonal_analysis', True):
+        print("DAY-OF-WEEK SEASONALITY")
+        print("=" * 55)
+        print(time_series['day_of_week'].round({'Average Revenue': 0, 'Seasonal Index': 2})
+              .astype({'Average Revenue': 'Int64'}))
+        print()
+
+
+def print_breakdowns(results, config):
+    """Step 3: print per-dimension breakdowns and the correlation matrix, as enabled."""
+    from sales_breakdown import BREAKDOWN_DIMENSIONS
+    from sales_config import get_template
+
+    analysis_config = get_template(config).get('analysis_config', {})
+    breakdowns = results['breakdowns']
+
+    dimensions = analysis_config.get('breakdown_dimensions', BREAKDOWN_DIMENSIONS)
+    shown = [dimension for dimension in dimensions if (dimension,) in breakdowns]
+    if shown:
+        print("REVENUE BREAKDOWNS")
+        print("=" * 55)
+        for dimension in shown:
+            breakdown = breakdowns[(dimension,)].sort_values('Revenue', ascending=False)
+            print(breakdown.round({'Revenue': 0, 'Avg Deal Size': 0})
+                  .astype({'Revenue': 'int64', 'Avg Deal Size': 'Int64'}))
+            print()
+
+    if analysis_config.get('correlation_analysis', True):
+        print("REVENUE / DEALS CORRELATION")
+        print("=" * 55)
+        print(results['correlation'].round(3))
+        print()
+
+
+def print_rankings(results, config):
+    """Step 3: print the top and bottom revenue leaderboards, if enabled."""
+    from sales_config import get_template
+    from sales_rankings import format_entries
+
+    analysis_config = get_template(config).get('analysis_config', {})
+    if not analysis_config.get('performance_ranking', True):
+        return
+
+    print("PERFORMANCE LEADERBOARDS")
+    print("=" * 55)
+    for dimension, leaderboard in results['rankings'].items():
+        label = 'Day' if dimension == 'Date' else dimension
+        print(f"Top {label} by revenue: {format_entries(leaderboard['top'])}")
+        print(f"Bottom {label} by revenue: {format_entries(leaderboard['bottom'])}")
+    print()
 
-print("SALES PERFORMANCE SUMMARY BY REGION AND SALES REP")
-print("=" * 55)
-print(sales_summary)
-print()
 
 # ============================================================================
 # STEP 4: EXECUTIVE DASHBOARD WITH VISUALIZATIONS
 # ============================================================================
 
-print("Step 4: Creating Executive Dashboard...")
-print()
-
-# Set up the dashboard with two subplots side by side
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
-fig.suptitle('SaaS Sales Executive Dashboard - January 2025', fontsize=16, fontweight='bold')
-
-# Chart 1: Daily Sales Revenue Trend (Left subplot)
-daily_revenue = df_cleaned.groupby('Date')['Revenue'].sum()
-ax1.plot(daily_revenue.index, daily_revenue.values, linewidth=2.5, marker='o', markersize=4)
-ax1.set_title('Daily Sales Revenue Trend - Jan 2025', fontsize=14, fontweight='bold')
-ax1.set_ylabel('Total Revenue ($)', fontsize=12)
-ax1.set_xlabel('Date', fontsize=12)
-ax1.grid(True, alpha=0.3)
-
-# Format y-axis to show currency
-ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-
-# Rotate x-axis labels for better readability
-plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-# Chart 2: Regional Performance (Right subplot)
-regional_revenue = df_cleaned.groupby('Region')['Revenue'].sum().sort_values(ascending=False)
-bars = ax2.bar(regional_revenue.index, regional_revenue.values, 
-               color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'])
-ax2.set_title('Total Revenue by Region', fontsize=14, fontweight='bold')
-ax2.set_ylabel('Total Revenue ($)', fontsize=12)
-ax2.set_xlabel('Region', fontsize=12)
-
-# Format y-axis to show currency
-ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-
-# Add value labels on top of each bar
-for bar in bars:
-    height = bar.get_height()
-    ax2.text(bar.get_x() + bar.get_width()/2., height + height*0.01, 
-             f'${height:,.0f}', ha='center', va='bottom', fontweight='bold')
-
-# Adjust layout and save/display
-plt.tight_layout()
-
-# Save the dashboard as an image file
-plt.savefig('saas_sales_dashboard.png', dpi=300, bbox_inches='tight')
-print("Dashboard saved as 'saas_sales_dashboard.png'")
-
-# Display the dashboard (comment out if running in non-interactive environment)
-try:
-    plt.show()
-    print("Dashboard displayed successfully!")
-except:
-    print("Dashboard saved to file (display not available in current environment)")
-    
-print()
+def start_dashboard(results, config, output_dir='.', no_charts=False):
+    """
+    Step 4: start rendering the dashboard charts in the background.
+
+    Returns the running `sales_charts.ChartRenderer`, or None when charts
+    are disabled.
+    """
+    from sales_charts import ChartRenderer
+    from sales_config import get_template
+
+    print("Step 4: Creating Executive Dashboard...")
+    print()
+
+    # Charts render in background worker processes, one chart per worker, while
+    # Step 5 runs; the files are collected at the end of the analysis
+    visualization_config = get_template(config).get('visualization_config', {})
+    if no_charts or not visualization_config.get('save_charts', True):
+        chart_renderer = None
+        print("Chart rendering skipped (headless mode)")
+    else:
+        chart_renderer = ChartRenderer(visualization_config, output_dir=output_dir).submit(results)
+        print(f"Rendering dashboard charts in the background "
+              f"({', '.join(chart_renderer.formats)})...")
+
+    print()
+    return chart_renderer
+
 
 # ============================================================================
 # STEP 5: BUSINESS INSIGHTS AND FINAL SUMMARY
 # ============================================================================
 
-print("Step 5: Business Insights and Recommendations")
-print("=" * 50)
+def print_business_insights(results):
+    """Step 5: print the executive summary and recommendations."""
+    print("Step 5: Business Insights and Recommendations")
+    print("=" * 50)
+
+    cleaning_stats = results['cleaning_stats']
+    negative_revenue_removed = cleaning_stats['negative_revenue_removed']
+    duplicates_removed = cleaning_stats['duplicates_removed']
+    daily_revenue = results['daily_revenue']
+    regional_revenue = results['regional_revenue']
 
-# Calculate key metrics for insights
-total_revenue = df_cleaned['Revenue'].sum()
-total_deals = df_cleaned['Deals Closed'].sum()
-avg_deal_size = total_revenue / total_deals
+    # Calculate key metrics for insights
+    total_revenue = results['total_revenue']
+    total_deals = results['total_deals']
+    avg_deal_size = total_revenue / total_deals
 
-# Top performers
-top_region = regional_revenue.index[0]
-top_region_revenue = regional_revenue.iloc[0]
+    # Top performers
+    rankings = results['rankings']
+    top_region = rankings['Region']['top'].index[0]
+    top_region_revenue = rankings['Region']['top'].iloc[0]
 
-rep_performance = df_cleaned.groupby('Sales Rep')['Revenue'].sum().sort_values(ascending=False)
-top_rep = rep_performance.index[0]
-top_rep_revenue = rep_performance.iloc[0]
+    top_rep = rankings['Sales Rep']['top'].index[0]
+    top_rep_revenue = rankings['Sales Rep']['top'].iloc[0]
 
-# Sales trend analysis
-daily_revenue_sorted = daily_revenue.sort_values(ascending=False)
-best_day = daily_revenue_sorted.index[0]
-best_day_revenue = daily_revenue_sorted.iloc[0]
+    # Sales trend analysis
+    best_day = rankings['Date']['top'].index[0]
+    best_day_revenue = rankings['Date']['top'].iloc[0]
 
-# Print comprehensive business summary
-summary = f"""
+    # Print comprehensive business summary
+    summary = f"""
 EXECUTIVE SUMMARY - JANUARY 2025 SAAS SALES PERFORMANCE
 ======================================================
 
 DATA QUALITY & CLEANING ACTIONS:
 • Successfully cleaned dataset by removing {negative_revenue_removed} record(s) with erroneous negative revenue
 • Eliminated {duplicates_removed} duplicate entries to ensure data integrity
-• Final analysis based on {len(df_cleaned)} validated sales records
+• Final analysis based on {cleaning_stats['rows_clean']} validated sales records
 
 KEY PERFORMANCE INDICATORS:
 • Total Revenue: ${total_revenue:,.0f}
@@ -285,10 +739,10 @@ TOP PERFORMERS:
 REGIONAL PERFORMANCE RANKING:
 """
 
-for i, (region, revenue) in enumerate(regional_revenue.items(), 1):
-    summary += f"  {i}. {region}: ${revenue:,.0f}\n"
+    for i, (region, revenue) in enumerate(regional_revenue.items(), 1):
+        summary += f"  {i}. {region}: ${revenue:,.0f}\n"
 
-summary += f"""
+    summary += f"""
 SALES TREND INSIGHTS:
 • Peak Sales Day: {best_day.strftime('%B %d, %Y')} (${best_day_revenue:,.0f})
 • Sales Pattern: {"Consistent performance" if daily_revenue.std() < daily_revenue.mean() * 0.3 else "Variable daily performance"}
@@ -309,8 +763,191 @@ AREAS FOR FURTHER INVESTIGATION:
 This analysis provides a solid foundation for strategic sales decisions and performance optimization.
 """
 
-print(summary)
+    print(summary)
+
+
+# ============================================================================
+# STEP 6: SCOPED REPORTS
+# ============================================================================
+
+def generate_reports(results, config, output_dir='.'):
+    """
+    Step 6: write one report per configured scope value (region, sales rep,
+    month) in every configured format.
+
+    Returns the written paths per scope.
+    """
+    from sales_reports import DEFAULT_REPORT_DIR, MetricsStore, write_reports
+
+    report_config = config.get('report_config', {})
+    print("Step 6: Generating Scoped Reports")
+    print("-" * 40)
+
+    started = time.perf_counter()
+    store = MetricsStore(results)
+    report_dir = os.path.join(output_dir, report_config.get('output_dir') or DEFAULT_REPORT_DIR)
+    report_files = write_reports(store, report_dir,
+                                 scopes=report_config.get('scopes'),
+                                 formats=report_config.get('formats') or ['text'],
+                                 max_workers=report_config.get('max_workers'))
+    for scope, paths in report_files.items():
+        print(f"  • {scope}: {len(paths):,} file(s)")
+    print(f"Reports written to '{report_dir}' in {time.perf_counter() - started:.2f} s")
+    print()
+    return report_files
+
+
+# ============================================================================
+# SERVICE MODE
+# ============================================================================
 
-print("=" * 60)
-print("Analysis Complete - Ready for Management Review")
-print("=" * 60)
+def ingest_sales_data(input_path, config):
+    """
+    Steps 1-2 for the analysis service: clean one input into mergeable state.
+
+    Runs in a service worker process, so the step-by-step output is
+    discarded.
+
+    Returns
+    -------
+    dict
+        The input's `aggregator`, `query_cube` and `cleaning_stats`.
+    """
+    from sales_aggregation import SalesQueryCube
+
+    query_cube = SalesQueryCube()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = clean_sales_data(load_sales_data(input_path, config), config, query_cube)
+    return {'aggregator': results['aggregator'], 'query_cube': query_cube,
+            'cleaning_stats': results['cleaning_stats']}
+
+
+def serve_sales_data(input_path, config):
+    """Run the analysis service until interrupted, preloading `input_path`."""
+    from sales_service import DEFAULT_DATASET, SalesService
+
+    service_config = config.get('service_config', {})
+    dataset = service_config.get('default_dataset') or DEFAULT_DATASET
+    service = SalesService(config, ingest_sales_data)
+    service.serve(preload={dataset: [input_path]} if input_path else None)
+    return service
+
+
+def main(argv=None):
+    """
+    Run the analysis from command-line style arguments.
+
+    Returns
+    -------
+    dict
+        The Step 2 results (see `sales_pipeline.run_pipeline`) plus
+        `startup_seconds`, `chart_files` when charts were rendered,
+        `report_files` when reports were generated and the stage `metrics`
+        when profiling was requested. With ``--serve``, only the stopped
+        `service`.
+    """
+    args = parse_args(argv)
+    from sales_config import load_config
+    from sales_profiling import StageProfiler, profile_stage
+
+    config = load_config(args.config)
+    if args.serve:
+        return {'service': serve_sales_data(args.input, config)}
+    profiler = None
+    if args.metrics or args.trace or args.profile_stage:
+        profiler = StageProfiler(args.profile_stage, args.profile_mode).activate()
+
+    print("=" * 60)
+    print("SaaS Sales Data Analysis - January 2025")
+    print("=" * 60)
+    print()
+
+    chart_renderer = None
+    try:
+        with profile_stage('load'):
+            source = load_sales_data(
+                args.input, config, sheet_name=args.sheet,
+                header_row=args.header_row - 1 if args.header_row else None,
+                table=args.table)
+
+        # Time to data: argument parsing, imports, config and input setup
+        startup_seconds = time.perf_counter() - _STARTUP_CLOCK
+        startup_budget = config.get('performance_config', {}).get(
+            'startup_budget_seconds', DEFAULT_STARTUP_BUDGET_SECONDS)
+        if startup_budget is not None and startup_seconds > startup_budget:
+            print(f"⚠ Startup took {startup_seconds * 1000:.0f} ms, over the "
+                  f"{startup_budget * 1000:.0f} ms budget")
+            print()
+
+        with profile_stage('clean') as stage:
+            results = clean_sales_data(source, config)
+            stage.rows_in = results['cleaning_stats']['rows_read']
+            stage.rows_out = results['cleaning_stats']['rows_clean']
+        results['startup_seconds'] = startup_seconds
+
+        steps = args.steps
+        if results['aggregator'].is_empty:
+            # E.g. a delivery replayed in full against a persisted dedup index
+            print(f"0 new rows: all {results['cleaning_stats']['rows_read']:,} row(s) read "
+                  f"were duplicates of rows already ingested or removed during cleaning - "
+                  f"nothing to analyze")
+            print()
+            steps = []
+
+        if 'summary' in steps:
+            with profile_stage('summary'):
+                print_sales_summary(results)
+                print_time_series(results, config)
+                print_breakdowns(results, config)
+                print_rankings(results, config)
+        if 'charts' in steps:
+            with profile_stage('charts.submit'):
+                chart_renderer = start_dashboard(results, config, args.output_dir,
+                                                 args.no_charts)
+        if 'insights' in steps:
+            with profile_stage('insights'):
+                print_business_insights(results)
+
+        if chart_renderer is not None:
+            with profile_stage('charts.wait'):
+                chart_files = chart_renderer.wait()
+            results['chart_files'] = chart_files
+            saved = [path for paths in chart_files.values() for path in paths]
+            print(f"Dashboard charts saved: {', '.join(saved)}")
+            print()
+
+        if 'reports' in steps:
+            with profile_stage('reports'):
+                results['report_files'] = generate_reports(results, config, args.output_dir)
+    finally:
+        # Chart workers are not left running if a step after submitting them failed
+        if chart_renderer is not None:
+            chart_renderer.close()
+        if profiler is not None:
+            profiler.deactivate()
+
+    if profiler is not None:
+        results['metrics'] = profiler.metrics(results['cleaning_stats'])
+        if args.metrics:
+            profiler.write_json(args.metrics, results['cleaning_stats'])
+            print(f"Stage metrics written to '{args.metrics}'")
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+            print(f"Chrome trace written to '{args.trace}'")
+        if args.profile_stage and not results['metrics']['profile']['ran']:
+            print(f"⚠ Stage '{args.profile_stage}' did not run; stages recorded: "
+                  f"{', '.join(profiler.records)}")
+        elif args.profile_mode == 'cprofile' and args.profile_stage:
+            profile_output = args.profile_output or f'{args.profile_stage}.prof'
+            profiler.dump_profile(profile_output)
+            print(f"cProfile statistics for '{args.profile_stage}' written to '{profile_output}'")
+        print()
+
+    print("=" * 60)
+    print("Analysis Complete - Ready for Management Review")
+    print("=" * 60)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""
+Sales Aggregation
+=================
+
+Incremental, mergeable aggregates for the Step 3-5 outputs of
+saas_sales_analysis.py.
+
+A `SalesAggregator` keeps per-key partial sums, row counts and min/max for
+`Deals Closed` and `Revenue` at two grains: the finest breakdown grain
+(Region, Sales Rep, Product, Customer Type) and Date, plus the co-moments
+behind the Revenue / Deals Closed correlation. New rows are folded in with
+`update`, states built by separate workers or on separate days are combined
+with `merge`, and the state can be saved to disk so that appending one day
+of sales costs O(new rows) instead of a rescan of the month. The Region x
+Sales Rep summary, regional and rep totals and the breakdown cube (see
+`sales_breakdown`) are rolled up from the finest grain, and calendar rollups
+from the Date grain (see `sales_timeseries`), so only two groupings are
+ever computed on row-level data.
+
+A `SalesQueryCube` keeps the same state at the combined Date x breakdown
+grain, so ad-hoc questions such as revenue by Region for one week and one
+Product are rolled up without row-level data. It grows with days x
+dimension combinations rather than with rows, and is only kept where such
+queries are served (see `sales_service`).
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from sales_breakdown import (BREAKDOWN_DIMENSIONS, breakdown_cube, correlation_matrix,
+                             merge_moments, partial_moments)
+from sales_rankings import revenue_leaderboards
+from sales_timeseries import ROLLUP_FREQUENCIES, time_series_rollups
+
+SUMMARY_KEYS = ['Region', 'Sales Rep']
+DATE_KEY = 'Date'
+SUMMARY_VALUES = ['Deals Closed', 'Revenue']
+
+QUERY_KEYS = [DATE_KEY] + BREAKDOWN_DIMENSIONS
+
+# Query period name -> pandas period frequency the Date key is bucketed by
+QUERY_PERIODS = {'daily': 'D', **ROLLUP_FREQUENCIES}
+
+# How each state column is combined when partial states are merged
+STATE_REDUCERS = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _reducer_for(column):
+    return STATE_REDUCERS[column.rsplit(' ', 1)[-1]]
+
+
+def _partial_state(cleaned, keys):
+    """Compute the mergeable state of `cleaned` grouped by `keys`."""
+    # Integers downcast in cleaning are widened first: pandas keeps the narrow
+    # dtype for some groupby sums, which would then overflow
+    wide = {value: 'Int64' if isinstance(cleaned[value].dtype, pd.api.extensions.ExtensionDtype)
+            else 'int64'
+            for value in SUMMARY_VALUES if pd.api.types.is_integer_dtype(cleaned[value].dtype)}
+    if wide:
+        cleaned = cleaned.astype(wide)
+    # Rows with a blank optional dimension still count towards the others
+    grouped = cleaned.groupby(keys, observed=True, dropna=False)
+    state = grouped[SUMMARY_VALUES].agg(['sum', 'min', 'max'])
+    state.columns = [f'{value} {stat}' for value, stat in state.columns]
+    state.insert(0, 'count', grouped.size())
+    return state
+
+
+def _key_order(name):
+    return QUERY_KEYS.index(name) if name in QUERY_KEYS else len(QUERY_KEYS)
+
+
+def _with_levels(state, names):
+    """`state` indexed by `names`; keys it lacks are added as missing values."""
+    if list(state.index.names) == names:
+        return state
+    frame = state.reset_index()
+    absent = {name: None for name in names if name not in frame}
+    return frame.assign(**absent).set_index(names)
+
+
+def _combine_states(states):
+    """
+    Combine state frames in one concatenation and grouping.
+
+    Inputs read from sources with different optional columns are keyed by
+    different dimensions; their keys are aligned first, with rows from a
+    source lacking a dimension kept under a missing key.
+    """
+    states = [state for state in states if state is not None]
+    if not states:
+        return None
+    if len(states) == 1:
+        return states[0]
+    names = sorted({name for state in states for name in state.index.names}, key=_key_order)
+    combined = pd.concat([_with_levels(state, names) for state in states])
+    return _rollup(combined, list(range(len(names))) if len(names) > 1 else 0, dropna=False)
+
+
+def _merge_states(left, right):
+    """Combine two state frames."""
+    return _combine_states([left, right])
+
+
+def _rollup(state, levels, dropna=True):
+    """Re-aggregate a state frame to the index `levels`."""
+    reducers = {column: _reducer_for(column) for column in state.columns}
+    return state.groupby(level=levels, observed=True, dropna=dropna).agg(reducers)
+
+
+def _revenue_by(summary, key):
+    """Revenue per `key` of the summary; empty when `key` is absent from the data."""
+    if key not in summary.index.names:
+        return pd.Series(dtype='float64', index=pd.Index([], name=key), name='Revenue')
+    return summary.groupby(level=key, observed=True)['Revenue'].sum()
+
+
+class SalesAggregator:
+    """
+    Mergeable running aggregates of cleaned sales rows.
+
+    Examples
+    --------
+    >>> january = SalesAggregator.load('january.pkl')
+    >>> january.update(cleaned_new_day)
+    >>> january.save('january.pkl')
+    """
+
+    def __init__(self):
+        self.cube_state = None
+        self.daily_state = None
+        self.moments = None
+
+    @classmethod
+    def from_states(cls, cube_state, daily_state, moments=None):
+        """
+        Build an aggregator from states computed elsewhere, e.g. by a database.
+
+        The states need the columns `update` produces; keys that coincide
+        once parsed (such as one date written two ways) are combined.
+        """
+        aggregator = cls()
+        aggregator.cube_state = _rollup(cube_state, list(range(cube_state.index.nlevels)),
+                                        dropna=False)
+        aggregator.daily_state = _rollup(daily_state, 0, dropna=False)
+        aggregator.moments = moments
+        return aggregator
+
+    @property
+    def is_empty(self):
+        return self.cube_state is None
+
+    def update(self, cleaned):
+        """Fold a cleaned chunk of rows into the state. Returns self."""
+        if len(cleaned) == 0:
+            return self
+        # Optional dimensions missing from the source are left out of the grain
+        keys = [key for key in BREAKDOWN_DIMENSIONS if key in cleaned]
+        self.cube_state = _merge_states(self.cube_state, _partial_state(cleaned, keys))
+        self.daily_state = _merge_states(self.daily_state, _partial_state(cleaned, DATE_KEY))
+        self.moments = merge_moments(self.moments, partial_moments(cleaned))
+        return self
+
+    def merge(self, *others):
+        """
+        Combine other aggregators' states into this one. Returns self.
+
+        Many partial aggregators (e.g. one per batch file) are combined in
+        one concatenation and grouping rather than folded in one by one.
+        """
+        self.cube_state = _combine_states([self.cube_state]
+                                          + [other.cube_state for other in others])
+        self.daily_state = _combine_states([self.daily_state]
+                                           + [other.daily_state for other in others])
+        for other in others:
+            self.moments = merge_moments(self.moments, other.moments)
+        return self
+
+    def save(self, path):
+        """Persist the state so a later run can keep folding into it."""
+        with open(path, 'wb') as handle:
+            pickle.dump({'cube_state': self.cube_state,
+                         'daily_state': self.daily_state,
+                         'moments': self.moments}, handle,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        """Load a state written by `save`."""
+        with open(path, 'rb') as handle:
+            payload = pickle.load(handle)
+        aggregator = cls()
+        # States saved before the breakdown grain existed hold only the
+        # (Region, Sales Rep) summary, which serves as a coarser cube
+        aggregator.cube_state = payload.get('cube_state', payload.get('summary_state'))
+        aggregator.daily_state = payload['daily_state']
+        aggregator.moments = payload.get('moments')
+        return aggregator
+
+    def finalize(self):
+        """
+        Turn the state into the report-ready outputs.
+
+        Returns a dict with `sales_summary`, `daily_revenue`,
+        `regional_revenue`, `rep_performance`, `total_revenue`,
+        `total_deals`, the calendar rollups of `time_series` (see
+        `sales_timeseries.time_series_rollups`), the `breakdowns` cube
+        (see `sales_breakdown.breakdown_cube`), the revenue `rankings` (see
+        `sales_rankings.revenue_leaderboards`), the Revenue / Deals Closed
+        `correlation` matrix and the raw `summary_stats` state
+        (sum/count/min/max per Region and Sales Rep).
+
+        `regional_revenue` is ranked best first; `rep_performance` is in
+        rep order, as reps can number in the hundreds of thousands.
+        """
+        if self.is_empty:
+            raise ValueError("No sales data to analyze: aggregator is empty")
+
+        # Rows with a blank Region or Sales Rep stay in the summary (under a
+        # missing key) and totals come from the full cube, so they are counted
+        summary_keys = [key for key in SUMMARY_KEYS if key in self.cube_state.index.names]
+        state = _rollup(self.cube_state, summary_keys, dropna=False).sort_index()
+        summary = (state[[f'{value} sum' for value in SUMMARY_VALUES]]
+                   .set_axis(SUMMARY_VALUES, axis=1))
+
+        daily_revenue = self.daily_state['Revenue sum'].sort_index()
+        daily_revenue.index.name = DATE_KEY
+        daily_revenue.name = 'Revenue'
+
+        regional_revenue = _revenue_by(summary, 'Region').sort_values(ascending=False)
+        rep_performance = _revenue_by(summary, 'Sales Rep')
+        breakdowns = breakdown_cube(self.cube_state)
+
+        return {
+            'sales_summary': summary.round(0),
+            'daily_revenue': daily_revenue,
+            'regional_revenue': regional_revenue,
+            'rep_performance': rep_performance,
+            'total_revenue': self.cube_state['Revenue sum'].sum(),
+            'total_deals': self.cube_state['Deals Closed sum'].sum(),
+            'time_series': time_series_rollups(self.daily_state),
+            'breakdowns': breakdowns,
+            'rankings': revenue_leaderboards(breakdowns, daily_revenue),
+            'correlation': correlation_matrix(self.moments),
+            'summary_stats': state,
+        }
+
+
+class SalesQueryCube:
+    """
+    Mergeable running aggregates at the Date x breakdown-dimension grain.
+
+    Folded and merged like `SalesAggregator`, and answers filtered rollups
+    with `query`.
+
+    Examples
+    --------
+    >>> cube = SalesQueryCube().update(cleaned)
+    >>> cube.query(['Region'], start='2025-01-01', end='2025-01-31',
+    ...            filters={'Product': 'Enterprise'})
+    """
+
+    def __init__(self):
+        self.state = None
+
+    @classmethod
+    def from_state(cls, state):
+        """Build a cube from a state computed elsewhere, e.g. by a database."""
+        cube = cls()
+        cube.state = _rollup(state, list(range(state.index.nlevels)), dropna=False)
+        return cube
+
+    @property
+    def is_empty(self):
+        return self.state is None
+
+    def update(self, cleaned):
+        """Fold a cleaned chunk of rows into the state. Returns self."""
+        if len(cleaned) == 0:
+            return self
+        keys = [key for key in QUERY_KEYS if key in cleaned]
+        self.state = _merge_states(self.state, _partial_state(cleaned, keys))
+        return self
+
+    def merge(self, *others):
+        """Combine other cubes' states into this one in one grouping. Returns self."""
+        self.state = _combine_states([self.state] + [other.state for other in others])
+        return self
+
+    def query(self, group_by=(), start=None, end=None, filters=None, period=None):
+        """
+        Roll the state up to `group_by` over a date range and dimension filters.
+
+        Parameters
+        ----------
+        group_by : list of str
+            Keys of the result, any of `QUERY_KEYS` present in the data;
+            none for the grand total.
+        start, end : str or datetime-like, optional
+            First and last day included.
+        filters : dict, optional
+            Dimension -> value, or list of values, to keep.
+        period : str, optional
+            One of `QUERY_PERIODS`; buckets the Date key when grouping by it.
+
+        Returns
+        -------
+        pandas.DataFrame
+            `sales_breakdown.BREAKDOWN_VALUES` indexed by `group_by`.
+        """
+        if self.is_empty:
+            raise ValueError("No sales data to query: cube is empty")
+        group_by = list(group_by)
+        filters = filters or {}
+        names = list(self.state.index.names)
+        unknown = [key for key in [*group_by, *filters] if key not in names]
+        if unknown:
+            raise ValueError(f"Unknown query dimension(s): {', '.join(unknown)}. "
+                             f"Options: {', '.join(names)}")
+        if period is not None and period not in QUERY_PERIODS:
+            raise ValueError(f"Unknown query period '{period}'. "
+                             f"Options: {', '.join(QUERY_PERIODS)}")
+
+        index = self.state.index
+        keep = np.ones(len(index), dtype=bool)
+        dates = index.get_level_values(DATE_KEY)
+        if start is not None:
+            keep &= dates >= pd.Timestamp(start)
+        if end is not None:
+            # The whole end day is included, intraday timestamps too
+            keep &= dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        for key, values in filters.items():
+            values = list(values) if pd.api.types.is_list_like(values) else [values]
+            keep &= index.get_level_values(key).isin(values)
+        state = self.state[keep]
+
+        if period is not None and DATE_KEY in group_by:
+            state.index = pd.MultiIndex.from_arrays(
+                [state.index.get_level_values(name).to_period(QUERY_PERIODS[period])
+                 if name == DATE_KEY else state.index.get_level_values(name)
+                 for name in names], names=names)
+        return breakdown_cube(state, group_by)[tuple(group_by)]
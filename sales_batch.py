@@ -0,0 +1,206 @@
+"""
+Batch Analysis
+==============
+
+Parallel analysis of many input files, e.g. one export per region per day.
+
+Each file is ingested, cleaned and aggregated in its own worker process;
+workers send back only their `SalesAggregator` state and cleaning counters.
+All partial states are combined in one concatenation and grouping, giving
+the same outputs a single-file run produces. Work per file is independent
+and the merged state is small, so throughput scales with the number of
+cores.
+
+A batch may mix CSV exports, Excel workbooks and PDF reports; each file is
+read by the reader for its extension.
+
+Limitation: duplicates are removed, outlier bounds computed and missing
+values interpolated within each file only. Each worker keeps its own
+fingerprint index, so a row repeated in two files of one batch is counted
+twice, and `performance_config.dedup_index_path` is not used in batch mode.
+If deliveries replay each other's rows, analyze them one at a time with a
+persisted fingerprint index instead.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sales_aggregation import SalesAggregator, SalesQueryCube
+from sales_cleaning import clean_sales_chunk, merge_cleaning_stats, new_cleaning_stats
+from sales_config import get_template, load_config
+from sales_dedup import FingerprintIndex
+from sales_dialect import sniff_csv
+from sales_dtypes import CategoryDictionary
+from sales_excel import EXCEL_EXTENSIONS, detect_sheet_layouts, read_sales_excel
+from sales_ingestion import DEFAULT_MEMORY_LIMIT_MB, read_csv_header, read_sales_csv
+from sales_missing import MissingValueHandler
+from sales_outliers import OutlierDetector
+from sales_pdf import read_sales_pdf
+from schema_mapper import SchemaMapper
+
+GLOB_CHARACTERS = '*?['
+
+# Delimited exports, read by the dialect-sniffing CSV reader
+CSV_EXTENSIONS = ('.csv', '.tsv')
+
+BATCH_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS + ('.pdf',)
+
+
+def is_batch_input(path):
+    """Return True if `path` names a directory or a glob pattern."""
+    return os.path.isdir(path) or any(char in path for char in GLOB_CHARACTERS)
+
+
+def is_batch_file(path):
+    """Return True if `path` names a file type batch mode can read."""
+    return str(path).lower().endswith(BATCH_EXTENSIONS)
+
+
+def resolve_inputs(path):
+    """
+    Expand a directory or glob pattern into sorted input file paths.
+
+    A directory contributes its CSV, Excel and PDF files and ignores
+    anything else; every match of a glob pattern must be such a file.
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path))
+        files = [f for f in files if os.path.isfile(f) and is_batch_file(f)]
+    else:
+        files = sorted(p for p in glob.glob(path) if os.path.isfile(p))
+        unsupported = [f for f in files if not is_batch_file(f)]
+        if unsupported:
+            raise ValueError(f"Cannot batch-process '{unsupported[0]}'. "
+                             f"Options: {', '.join(BATCH_EXTENSIONS)} files")
+    if not files:
+        raise FileNotFoundError(f"No input files match '{path}'")
+    return files
+
+
+# Per-process schema mapper, so files sharing a header layout are matched
+# once per worker rather than once per file
+_worker_mapper = None
+_worker_config = None
+_worker_cleaning_rules = {}
+_worker_csv_options = {}
+
+
+def _init_worker(config):
+    global _worker_mapper, _worker_config, _worker_cleaning_rules, _worker_csv_options
+    _worker_config = config if config is not None else load_config()
+    _worker_mapper = SchemaMapper(_worker_config)
+    _worker_cleaning_rules = get_template(_worker_config).get('cleaning_rules', {})
+    _worker_csv_options = _worker_config.get('file_format_config', {}).get('csv', {})
+
+
+def _file_chunks(path, chunksize, memory_limit_mb):
+    """
+    Worker: typed chunks of one file, read by the reader for its type.
+
+    Returns the chunks and the seconds spent mapping headers (PDF tables
+    are mapped page by page while they are read, so none is reported).
+    """
+    if path.lower().endswith(EXCEL_EXTENSIONS):
+        started = time.perf_counter()
+        layouts = detect_sheet_layouts(path, _worker_mapper, config=_worker_config)
+        mapping_seconds = time.perf_counter() - started
+        return read_sales_excel(path, layouts=layouts, chunksize=chunksize, max_workers=1,
+                                config=_worker_config), mapping_seconds
+    if path.lower().endswith('.pdf'):
+        return read_sales_pdf(path, mapper=_worker_mapper, chunksize=chunksize, max_workers=1,
+                              config=_worker_config), 0.0
+
+    dialect = sniff_csv(path, _worker_csv_options)
+    column_mapping = _worker_mapper.map_columns(read_csv_header(path, dialect))
+    if column_mapping['missing_required']:
+        raise ValueError(f"'{path}' has no column matching required "
+                         f"{', '.join(column_mapping['missing_required'])}")
+    chunks = read_sales_csv(path, chunksize=chunksize, memory_limit_mb=memory_limit_mb,
+                            rename=column_mapping['rename'], dialect=dialect)
+    return chunks, column_mapping['elapsed_seconds']
+
+
+def _analyze_file(path, chunksize, memory_limit_mb, with_query_cube=False):
+    """Worker: clean and aggregate one file, returning only mergeable state."""
+    chunks, mapping_seconds = _file_chunks(path, chunksize, memory_limit_mb)
+    stats = new_cleaning_stats()
+    aggregator = SalesAggregator()
+    # Per file: duplicates across the files of a batch are not detected
+    dedup_index = FingerprintIndex()
+    category_dictionary = CategoryDictionary()
+    outlier_detector = OutlierDetector.from_config(_worker_cleaning_rules)
+    missing_handler = MissingValueHandler.from_config(_worker_cleaning_rules)
+    query_cube = SalesQueryCube() if with_query_cube else None
+    for chunk in chunks:
+        cleaned = clean_sales_chunk(chunk, stats, dedup_index, outlier_detector,
+                                    missing_handler, category_dictionary)
+        aggregator.update(cleaned)
+        if query_cube is not None:
+            query_cube.update(cleaned)
+    return aggregator, stats, mapping_seconds, query_cube
+
+
+def run_batch(inputs, max_workers=None, chunksize=None, memory_limit_mb=None, config=None,
+              query_cube=None):
+    """
+    Analyze many files in a process pool and merge the results.
+
+    Parameters
+    ----------
+    inputs : str or list of str
+        Directory, glob pattern or explicit list of CSV, Excel and PDF
+        files (see `resolve_inputs`).
+    max_workers : int, optional
+        Worker processes; defaults to one per CPU, capped at the file count.
+    chunksize : int, optional
+        Rows per chunk within each worker.
+    memory_limit_mb : float, optional
+        Memory budget for the whole batch, split evenly across workers.
+    config : dict, optional
+        Parsed analysis_config.yaml used for column mapping; the bundled
+        file is loaded when omitted.
+    query_cube : sales_aggregation.SalesQueryCube, optional
+        Also receives the merged Date x dimension state of every file.
+
+    Returns
+    -------
+    dict
+        The outputs of `SalesAggregator.finalize` plus the merged
+        `cleaning_stats`, the merged `aggregator`, `files_processed` and
+        the total column `mapping_seconds` spent across files.
+    """
+    files = resolve_inputs(inputs) if isinstance(inputs, str) else list(inputs)
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    worker_memory_mb = (memory_limit_mb or DEFAULT_MEMORY_LIMIT_MB) / workers
+
+    stats = new_cleaning_stats()
+    aggregators, cubes = [], []
+    mapping_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config,)) as pool:
+        futures = [pool.submit(_analyze_file, path, chunksize, worker_memory_mb,
+                               query_cube is not None)
+                   for path in files]
+        # Every file is analyzed before the single reduce below, so results
+        # are taken in file order, which keeps merged floats reproducible
+        for future in futures:
+            file_aggregator, file_stats, file_mapping_seconds, file_cube = future.result()
+            aggregators.append(file_aggregator)
+            cubes.append(file_cube)
+            merge_cleaning_stats(stats, file_stats)
+            mapping_seconds += file_mapping_seconds
+
+    # One concatenation and grouping of every file's state, rather than
+    # re-grouping the growing merged state once per file
+    aggregator = SalesAggregator().merge(*aggregators)
+    if query_cube is not None:
+        query_cube.merge(*cubes)
+
+    results = aggregator.finalize()
+    results['cleaning_stats'] = stats
+    results['aggregator'] = aggregator
+    results['files_processed'] = len(files)
+    results['mapping_seconds'] = mapping_seconds
+    return results
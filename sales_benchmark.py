@@ -0,0 +1,218 @@
+"""
+Benchmark Harness
+=================
+
+Reproducible performance benchmark of the analysis pipeline on synthetic
+data (see `sales_synthetic`), from 10K to 100M rows.
+
+For every scale a synthetic export is generated once (and reused from
+`--data-dir` on later runs), then read, cleaned and aggregated in a fresh
+process under the stage profiler, so each run reports its own per-stage
+wall/CPU time, throughput (rows/s) and peak RSS. The best of `--repeat`
+runs is kept.
+
+Results can be saved as a baseline and later runs compared against it; any
+stage that slows down by more than `--tolerance` (or peak memory growing by
+as much) is reported as a regression and the command exits with status 1:
+
+    python sales_benchmark.py --rows 10000 1000000 --save-baseline
+    python sales_benchmark.py --rows 10000 1000000   # compare
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE_PATH = 'benchmark_baseline.json'
+DEFAULT_DATA_DIR = 'benchmark_data'
+DEFAULT_TOLERANCE = 0.25
+
+# Stages faster than this are too noisy to flag as regressions
+MIN_REGRESSION_SECONDS = 0.01
+
+
+def _run_pipeline_once(path, config_path):
+    """Worker: clean and aggregate `path` under the stage profiler."""
+    from sales_config import get_template, load_config
+    from sales_ingestion import read_sales_csv
+    from sales_missing import MissingValueHandler
+    from sales_outliers import OutlierDetector
+    from sales_pipeline import run_pipeline
+    from sales_profiling import StageProfiler, profile_stage
+
+    config = load_config(config_path)
+    performance_config = config.get('performance_config', {})
+    cleaning_rules = get_template(config).get('cleaning_rules', {})
+
+    profiler = StageProfiler().activate()
+    with profile_stage('pipeline') as stage:
+        chunks = read_sales_csv(path, chunksize=performance_config.get('chunk_size'),
+                                memory_limit_mb=performance_config.get('memory_limit_mb'))
+        results = run_pipeline(chunks,
+                               outlier_detector=OutlierDetector.from_config(cleaning_rules),
+                               missing_handler=MissingValueHandler.from_config(cleaning_rules))
+        stage.rows_in = results['cleaning_stats']['rows_read']
+        stage.rows_out = results['cleaning_stats']['rows_clean']
+    profiler.deactivate()
+    return profiler.metrics(results['cleaning_stats'])
+
+
+def _scale_result(rows, metrics):
+    stages = {}
+    for record in metrics['stages']:
+        seconds = record['wall_seconds']
+        stages[record['stage']] = {
+            'wall_seconds': seconds,
+            'cpu_seconds': record['cpu_seconds'],
+            'rows_per_second': rows / seconds if seconds > 0 else None,
+        }
+    seconds = stages['pipeline']['wall_seconds']
+    return {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else None,
+        'peak_rss_bytes': metrics['peak_rss_bytes'],
+        'stages': stages,
+        'cleaning_stats': metrics['cleaning_stats'],
+    }
+
+
+def environment():
+    """Describe the machine and library versions a benchmark ran on."""
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmark(scales=None, repeat=3, seed=0, data_dir=DEFAULT_DATA_DIR, config_path=None):
+    """
+    Benchmark the pipeline at each row count in `scales`.
+
+    Returns
+    -------
+    dict
+        ``environment`` plus ``scales``: row count (as a string) -> total
+        ``seconds``, ``rows_per_second``, ``peak_rss_bytes``, per-stage
+        timings and the cleaning counters of the best run.
+    """
+    from sales_synthetic import write_sales_csv
+
+    os.makedirs(data_dir, exist_ok=True)
+    context = multiprocessing.get_context('spawn')
+    report = {'environment': environment(), 'seed': seed, 'scales': {}}
+    for rows in scales or DEFAULT_SCALES:
+        path = os.path.join(data_dir, f'synthetic_{rows}_seed{seed}.csv')
+        if not os.path.exists(path):
+            print(f"Generating {rows:,} synthetic rows -> '{path}'...")
+            write_sales_csv(path + '.tmp', rows, seed=seed)
+            os.replace(path + '.tmp', path)
+
+        best = None
+        for _ in range(repeat):
+            # A fresh process per run keeps peak RSS and warm caches per scale
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = _scale_result(rows, pool.submit(_run_pipeline_once, path,
+                                                         config_path).result())
+            if best is None or result['seconds'] < best['seconds']:
+                best = result
+        report['scales'][str(rows)] = best
+        print(f"{rows:>12,} rows  {best['seconds']:8.3f} s  "
+              f"{best['rows_per_second']:>14,.0f} rows/s  "
+              f"peak RSS {(best['peak_rss_bytes'] or 0) / 2**20:8.1f} MB")
+    return report
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return the regressions of `report` against `baseline`.
+
+    Compares total and per-stage wall time and peak RSS for every scale
+    present in both. Each regression is a dict with ``scale``, ``metric``,
+    ``baseline``, ``current`` and relative ``change``.
+    """
+    regressions = []
+
+    def check(scale, metric, old, new, floor=0.0):
+        if old is None or new is None or new <= floor:
+            return
+        if new > old * (1 + tolerance):
+            regressions.append({'scale': scale, 'metric': metric, 'baseline': old,
+                                'current': new, 'change': new / old - 1 if old else None})
+
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        check(scale, 'seconds', previous['seconds'], current['seconds'], MIN_REGRESSION_SECONDS)
+        check(scale, 'peak_rss_bytes', previous['peak_rss_bytes'], current['peak_rss_bytes'])
+        for stage, timing in current['stages'].items():
+            old = previous['stages'].get(stage)
+            if old is not None:
+                check(scale, f'stages.{stage}', old['wall_seconds'], timing['wall_seconds'],
+                      MIN_REGRESSION_SECONDS)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the sales analysis pipeline on synthetic data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f"row counts to benchmark "
+                             f"(default: {' '.join(str(r) for r in DEFAULT_SCALES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scale; the best is kept')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic data seed')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help=f'where generated inputs are kept (default: {DEFAULT_DATA_DIR})')
+    parser.add_argument('--config', help='analysis configuration YAML')
+    parser.add_argument('--output', help='write this run\'s results as JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH,
+                        help=f'baseline results to compare against (default: {DEFAULT_BASELINE_PATH})')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store this run as the new baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed relative slowdown before a regression is reported '
+                             f'(default: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.rows, repeat=args.repeat, seed=args.seed,
+                           data_dir=args.data_dir, config_path=args.config)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Baseline saved to '{args.baseline}'")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at '{args.baseline}'; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    if baseline.get('environment') != report['environment']:
+        print("⚠ Baseline was recorded on a different environment; timings may not compare")
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {int(regression['scale']):,} rows  {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} "
+              f"(+{regression['change']:.0%})")
+    if not regressions:
+        print(f"No regressions against '{args.baseline}' (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
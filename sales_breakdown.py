@@ -0,0 +1,139 @@
+"""
+Breakdown and Correlation Analysis
+==================================
+
+Multi-dimension revenue breakdowns and the Revenue / Deals Closed
+correlation, for the `correlation_analysis` switch and the
+`breakdown_dimensions` of the analysis template.
+
+The breakdowns form a cube with subtotals: Revenue, Deals Closed,
+Transactions and Avg Deal Size for every combination of Region, Sales
+Rep, Product and Customer Type, down to the grand total. Every
+combination is rolled up from the `SalesAggregator` state at the finest
+grain, each from its smallest already-computed parent, so row-level data
+is grouped once per chunk however many combinations are reported.
+
+The correlation comes from mergeable co-moments (count, means and centered
+cross-products), combined across chunks and workers with the parallel
+update of Chan et al., so it never needs the full dataset at once.
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+BREAKDOWN_DIMENSIONS = ['Region', 'Sales Rep', 'Product', 'Customer Type']
+
+CORRELATION_VALUES = ['Revenue', 'Deals Closed']
+
+BREAKDOWN_VALUES = ['Revenue', 'Deals Closed', 'Transactions', 'Avg Deal Size']
+
+GRAND_TOTAL_LABEL = 'Total'
+
+
+def partial_moments(cleaned):
+    """Count, means and centered cross-products of `CORRELATION_VALUES`."""
+    values = cleaned[CORRELATION_VALUES].to_numpy(dtype='float64', na_value=np.nan)
+    values = values[~np.isnan(values).any(axis=1)]
+    if len(values) == 0:
+        return None
+    mean = values.mean(axis=0)
+    centered = values - mean
+    return {'count': len(values), 'mean': mean, 'comoment': centered.T @ centered}
+
+
+def moments_from_sums(count, sums, products):
+    """
+    Co-moments from raw power sums, e.g. computed by a database.
+
+    `sums` holds the sum of each of `CORRELATION_VALUES` and `products` the
+    matrix of sums of their pairwise products. Less stable numerically than
+    `partial_moments`, which is fine for a correlation coefficient.
+    """
+    if not count:
+        return None
+    sums = np.asarray(sums, dtype='float64')
+    mean = sums / count
+    return {'count': int(count), 'mean': mean,
+            'comoment': np.asarray(products, dtype='float64') - np.outer(sums, sums) / count}
+
+
+def merge_moments(left, right):
+    """Combine two `partial_moments` results (either may be None)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    count = left['count'] + right['count']
+    delta = right['mean'] - left['mean']
+    return {
+        'count': count,
+        'mean': left['mean'] + delta * right['count'] / count,
+        'comoment': (left['comoment'] + right['comoment']
+                     + np.outer(delta, delta) * left['count'] * right['count'] / count),
+    }
+
+
+def correlation_matrix(moments):
+    """Pearson correlation matrix of `CORRELATION_VALUES` from merged moments."""
+    if moments is None or moments['count'] < 2:
+        return pd.DataFrame(np.nan, index=CORRELATION_VALUES, columns=CORRELATION_VALUES)
+    spread = np.sqrt(np.diag(moments['comoment']))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = moments['comoment'] / np.outer(spread, spread)
+    return pd.DataFrame(correlation, index=CORRELATION_VALUES, columns=CORRELATION_VALUES)
+
+
+def _with_ratios(totals):
+    totals = totals.copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        totals['Avg Deal Size'] = totals['Revenue'] / totals['Deals Closed'].replace(0, np.nan)
+    return totals[BREAKDOWN_VALUES]
+
+
+def breakdown_cube(cube_state, dimensions=None):
+    """
+    Roll the finest-grain state up to every combination of `dimensions`.
+
+    Parameters
+    ----------
+    cube_state : pandas.DataFrame
+        `SalesAggregator.cube_state`, indexed by the breakdown dimensions
+        present in the data, with ``Revenue sum``, ``Deals Closed sum`` and
+        ``count`` columns.
+    dimensions : list of str, optional
+        Dimensions to cross; defaults to `BREAKDOWN_DIMENSIONS`. Those
+        absent from the data are skipped.
+
+    Returns
+    -------
+    dict
+        Tuple of dimensions (in `dimensions` order; ``()`` for the grand
+        total) -> DataFrame of `BREAKDOWN_VALUES` indexed by those
+        dimensions.
+    """
+    dimensions = [d for d in (dimensions or BREAKDOWN_DIMENSIONS)
+                  if d in cube_state.index.names]
+    finest = pd.DataFrame({
+        'Revenue': cube_state['Revenue sum'],
+        'Deals Closed': cube_state['Deals Closed sum'],
+        'Transactions': cube_state['count'],
+    })
+    if not dimensions:
+        return {(): _with_ratios(finest.sum().to_frame(GRAND_TOTAL_LABEL).T)}
+    if list(finest.index.names) != dimensions:
+        finest = finest.groupby(level=dimensions, observed=True, dropna=False).sum()
+
+    totals = {tuple(dimensions): finest}
+    for size in range(len(dimensions) - 1, 0, -1):
+        for combo in combinations(dimensions, size):
+            # Roll up from the smallest combination with one more dimension
+            parents = [tuple(d for d in dimensions if d in combo or d == extra)
+                       for extra in dimensions if extra not in combo]
+            parent = min(parents, key=lambda candidate: len(totals[candidate]))
+            totals[combo] = totals[parent].groupby(level=list(combo), observed=True,
+                                                   dropna=False).sum()
+    top = totals[tuple(dimensions[:1])]
+    totals[()] = top.sum().to_frame(GRAND_TOTAL_LABEL).T.astype(top.dtypes.to_dict())
+    return {combo: _with_ratios(frame) for combo, frame in totals.items()}
@@ -0,0 +1,167 @@
+"""
+Cleaned Data Cache
+==================
+
+Columnar on-disk cache of the Step 2 cleaned dataset.
+
+Cache entries are keyed by a hash of the source file's bytes together with
+the `cleaning_rules` block of analysis_config.yaml, so a rerun on unchanged
+input with unchanged rules skips parsing, type coercion, negative-revenue
+filtering and deduplication entirely. Entries are uncompressed Arrow IPC
+files that are memory-mapped on read; cleaned chunks are appended as record
+batches, so streamed inputs larger than memory can be cached too.
+
+Each entry is an ``<key>.arrow`` data file plus an ``<key>.json`` sidecar
+holding the cleaning counters. The sidecar is written last and marks the
+entry as complete.
+
+Requires `pyarrow`.
+"""
+
+import hashlib
+import json
+import os
+
+from sales_dtypes import downcast_integers
+from sales_ingestion import CATEGORICAL_COLUMNS
+
+# Bump when the cleaning code changes in a way that invalidates cached output
+CACHE_FORMAT_VERSION = 3
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as exc:
+        raise ImportError(
+            "The cleaned-data cache requires pyarrow. Install it with "
+            "'pip install pyarrow' or disable performance_config.cache_dir."
+        ) from exc
+    return pyarrow
+
+
+def cache_key(source_path, cleaning_rules=None):
+    """
+    Return the cache key for `source_path` cleaned under `cleaning_rules`.
+
+    The file is hashed in fixed-size blocks, which is I/O bound and much
+    cheaper than parsing it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'v{CACHE_FORMAT_VERSION}'.encode())
+    digest.update(json.dumps(cleaning_rules or {}, sort_keys=True).encode())
+    _hash_file(digest, source_path)
+    return digest.hexdigest()
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+
+def file_digest(path):
+    """Return a hex digest of the bytes of `path`."""
+    digest = hashlib.blake2b(digest_size=16)
+    _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+def cache_paths(cache_dir, key):
+    """Return the (data, sidecar) file paths of a cache entry."""
+    base = os.path.join(cache_dir, key)
+    return base + '.arrow', base + '.json'
+
+
+def is_cached(cache_dir, key):
+    """Return True if a complete cache entry exists for `key`."""
+    data_path, meta_path = cache_paths(cache_dir, key)
+    return os.path.exists(data_path) and os.path.exists(meta_path)
+
+
+class CleanedDataCacheWriter:
+    """
+    Append cleaned chunks to a new cache entry.
+
+    The data file is written under a temporary name and only renamed into
+    place by `close`, so an interrupted run never leaves a partial entry.
+    """
+
+    def __init__(self, cache_dir, key):
+        self._pa = _require_pyarrow()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.data_path, self.meta_path = cache_paths(cache_dir, key)
+        self._tmp_path = self.data_path + '.tmp'
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def _to_table(self, cleaned):
+        pa = self._pa
+        table = pa.Table.from_pandas(cleaned, preserve_index=False)
+        # Dictionaries differ between chunks, so categoricals are stored as
+        # plain strings and re-encoded on read; integers downcast to different
+        # widths per chunk are stored as int64 and downcast again on read
+        columns = [column.cast(column.type.value_type)
+                   if pa.types.is_dictionary(column.type)
+                   else column.cast(pa.int64()) if pa.types.is_integer(column.type)
+                   else column
+                   for column in table.columns]
+        return pa.Table.from_arrays(columns, names=table.column_names)
+
+    def write(self, cleaned):
+        """Append one cleaned chunk."""
+        table = self._to_table(cleaned)
+        if self._writer is None:
+            self._schema = table.schema
+            self._sink = self._pa.OSFile(self._tmp_path, 'wb')
+            self._writer = self._pa.ipc.new_file(self._sink, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self, cleaning_stats):
+        """Finish the entry and record the cleaning counters."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._tmp_path, self.data_path)
+        with open(self.meta_path, 'w', encoding='utf-8') as handle:
+            json.dump({'cleaning_stats': cleaning_stats}, handle)
+
+    def abort(self):
+        """Discard a partially written entry."""
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def read_cleaned_cache(cache_dir, key):
+    """
+    Open a cache entry.
+
+    Returns
+    -------
+    tuple
+        ``(chunks, cleaning_stats)`` where `chunks` yields one DataFrame per
+        cached record batch, read from a memory-mapped file.
+    """
+    pa = _require_pyarrow()
+    data_path, meta_path = cache_paths(cache_dir, key)
+    with open(meta_path, 'r', encoding='utf-8') as handle:
+        cleaning_stats = json.load(handle)['cleaning_stats']
+
+    def chunks():
+        with pa.memory_map(data_path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            categories = {c: 'category' for c in CATEGORICAL_COLUMNS
+                          if c in reader.schema.names}
+            for i in range(reader.num_record_batches):
+                # Re-encode with sorted categories, as read_csv would
+                yield downcast_integers(reader.get_batch(i).to_pandas().astype(categories))
+
+    return chunks(), cleaning_stats
@@ -0,0 +1,206 @@
+"""
+Chart Rendering
+===============
+
+Step 4 dashboard charts, rendered off the critical path.
+
+Each chart is drawn and saved by its own worker process, in every format of
+`visualization_config.chart_formats`, while the main process carries on with
+Step 5. Only the small aggregated series produced by Step 3 are sent to the
+workers. matplotlib and seaborn are imported inside the workers, so runs
+that skip charts never pay for importing them.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sales_profiling import get_profiler
+
+DEFAULT_CHART_FORMATS = ['png']
+CHART_DPI = 300
+REGION_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
+DASHBOARD_TITLE = 'SaaS Sales Executive Dashboard - January 2025'
+
+
+def _setup_matplotlib(style, palette):
+    """Import matplotlib for off-screen rendering and apply the configured style."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Styles were renamed in matplotlib 3.6 ('seaborn-whitegrid' -> 'seaborn-v0_8-whitegrid')
+    for candidate in (style, style.replace('seaborn-', 'seaborn-v0_8-', 1)):
+        if candidate in plt.style.available:
+            plt.style.use(candidate)
+            break
+    sns.set_palette(palette)
+    return plt
+
+
+def _currency_axis(plt, ax):
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+
+
+def _plot_daily_revenue(plt, ax, daily_revenue):
+    ax.plot(daily_revenue.index, daily_revenue.values, linewidth=2.5, marker='o', markersize=4)
+    ax.set_title('Daily Sales Revenue Trend - Jan 2025', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Total Revenue ($)', fontsize=12)
+    ax.set_xlabel('Date', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    _currency_axis(plt, ax)
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+
+def _plot_regional_revenue(plt, ax, regional_revenue):
+    bars = ax.bar(regional_revenue.index, regional_revenue.values, color=REGION_COLORS)
+    ax.set_title('Total Revenue by Region', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Total Revenue ($)', fontsize=12)
+    ax.set_xlabel('Region', fontsize=12)
+    _currency_axis(plt, ax)
+
+    # Value labels on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height + height * 0.01,
+                f'${height:,.0f}', ha='center', va='bottom', fontweight='bold')
+
+
+def _draw_dashboard(plt, data):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle(DASHBOARD_TITLE, fontsize=16, fontweight='bold')
+    _plot_daily_revenue(plt, ax1, data['daily_revenue'])
+    _plot_regional_revenue(plt, ax2, data['regional_revenue'])
+    return fig
+
+
+def _draw_daily_revenue(plt, data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _plot_daily_revenue(plt, ax, data['daily_revenue'])
+    return fig
+
+
+def _draw_regional_revenue(plt, data):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    _plot_regional_revenue(plt, ax, data['regional_revenue'])
+    return fig
+
+
+# Output file stem -> (drawing function, Step 3 results it needs)
+CHARTS = {
+    'saas_sales_dashboard': (_draw_dashboard, ['daily_revenue', 'regional_revenue']),
+    'daily_revenue_trend': (_draw_daily_revenue, ['daily_revenue']),
+    'regional_revenue': (_draw_regional_revenue, ['regional_revenue']),
+}
+
+
+def render_chart(name, data, output_dir='.', formats=None, style='seaborn-whitegrid',
+                 palette='husl'):
+    """
+    Draw chart `name` from `data` and save it in each of `formats`.
+
+    Returns
+    -------
+    list of str
+        Paths of the files written.
+    """
+    plt = _setup_matplotlib(style, palette)
+    draw, _ = CHARTS[name]
+    fig = draw(plt, data)
+    fig.tight_layout()
+
+    paths = []
+    for fmt in formats or DEFAULT_CHART_FORMATS:
+        path = os.path.normpath(os.path.join(output_dir, f'{name}.{fmt}'))
+        fig.savefig(path, format=fmt, dpi=CHART_DPI, bbox_inches='tight')
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def _render_chart_timed(name, data, output_dir, formats, style, palette):
+    """Worker entry point: `render_chart` plus its timings for the stage profiler."""
+    started = time.time()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    paths = render_chart(name, data, output_dir, formats, style, palette)
+    return paths, {
+        'started': started,
+        'wall_seconds': time.perf_counter() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'pid': os.getpid(),
+    }
+
+
+class ChartRenderer:
+    """
+    Render the dashboard charts in a background process pool.
+
+    Parameters
+    ----------
+    visualization_config : dict
+        The template's `visualization_config`; `chart_formats`,
+        `chart_style` and `color_palette` are honoured.
+    output_dir : str
+        Directory the chart files are written to.
+    max_workers : int, optional
+        Worker processes; defaults to one per chart, capped at the CPU count.
+    """
+
+    def __init__(self, visualization_config=None, output_dir='.', max_workers=None):
+        visualization_config = visualization_config or {}
+        self.formats = list(visualization_config.get('chart_formats') or DEFAULT_CHART_FORMATS)
+        self.style = visualization_config.get('chart_style', 'seaborn-whitegrid')
+        self.palette = visualization_config.get('color_palette', 'husl')
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self._pool = None
+        self._futures = {}
+
+    def submit(self, results):
+        """Start rendering every chart from the Step 3 `results`. Returns self."""
+        workers = min(self.max_workers or os.cpu_count() or 1, len(CHARTS))
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        for name, (_, keys) in CHARTS.items():
+            data = {key: results[key] for key in keys}
+            self._futures[name] = self._pool.submit(
+                _render_chart_timed, name, data, self.output_dir, self.formats,
+                self.style, self.palette)
+        return self
+
+    def wait(self):
+        """
+        Block until every chart is written. Worker render times are
+        recorded on the active stage profiler, if any.
+
+        Returns
+        -------
+        dict
+            Chart name -> list of paths written.
+        """
+        profiler = get_profiler()
+        try:
+            chart_files = {}
+            for name, future in self._futures.items():
+                paths, timing = future.result()
+                chart_files[name] = paths
+                if profiler is not None:
+                    profiler.record(f'charts.render.{name}', timing['wall_seconds'],
+                                    timing['cpu_seconds'],
+                                    start=profiler.epoch_offset(timing['started']),
+                                    pid=timing['pid'])
+            return chart_files
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def close(self):
+        """
+        Shut the pool down without waiting for charts, e.g. when a later
+        step failed before `wait`. Charts not yet started are cancelled.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
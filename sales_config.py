@@ -0,0 +1,25 @@
+"""
+Analysis Configuration
+======================
+
+Helpers for reading analysis_config.yaml.
+"""
+
+import os
+
+import yaml
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'analysis_config.yaml')
+DEFAULT_TEMPLATE = 'sales_analysis'
+
+
+def load_config(path=None):
+    """Load the YAML configuration, defaulting to the bundled analysis_config.yaml."""
+    with open(path or DEFAULT_CONFIG_PATH, 'r', encoding='utf-8') as handle:
+        return yaml.safe_load(handle) or {}
+
+
+def get_template(config, name=DEFAULT_TEMPLATE):
+    """Return one entry of `analysis_templates`, or an empty dict if absent."""
+    return config.get('analysis_templates', {}).get(name, {})
@@ -0,0 +1,198 @@
+"""
+Sales Deduplication
+===================
+
+Streaming-safe duplicate removal for Step 2.5 of the analysis.
+
+Every row is reduced to a 64-bit fingerprint of its schema columns in one
+vectorized pass (`pandas.util.hash_pandas_object`). Fingerprints are kept in
+a `FingerprintIndex` that outlives a single chunk and can be saved to disk,
+so duplicates spanning file boundaries or replayed in a later daily delivery
+are caught without re-reading earlier data.
+
+Two index modes are available:
+
+- ``exact``: sorted uint64 runs merged log-structured style; lookups are
+  vectorized binary searches and memory is 8 bytes per unique row.
+- ``bloom``: fixed-size Bloom filter sized from `capacity` and `error_rate`.
+  Memory no longer grows with the data, at the cost of dropping roughly
+  `error_rate` of unique rows as false-positive duplicates.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from sales_ingestion import SALES_COLUMNS
+
+INDEX_MODES = ('exact', 'bloom')
+
+# Expected unique rows a Bloom filter is sized for unless configured
+DEFAULT_CAPACITY = 10_000_000
+
+
+def row_fingerprints(df, columns=None):
+    """
+    Return a uint64 fingerprint per row of `df` over `columns`.
+
+    Values are normalized before hashing so the same record hashes alike
+    whether it arrived as categorical or string, int or float, or with a
+    different datetime resolution.
+    """
+    columns = [c for c in (columns or SALES_COLUMNS) if c in df.columns]
+    normalized = {}
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.astype('datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(values):
+            values = values.astype('float64')
+        elif not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        normalized[column] = values
+    frame = pd.DataFrame(normalized, index=df.index)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class FingerprintIndex:
+    """
+    Set of row fingerprints that persists across chunks and runs.
+
+    Parameters
+    ----------
+    mode : {'exact', 'bloom'}
+        Storage strategy, see the module docstring.
+    capacity : int
+        Expected number of unique rows; only used to size a Bloom filter.
+    error_rate : float
+        Target false-positive rate of a Bloom filter.
+    """
+
+    def __init__(self, mode='exact', capacity=DEFAULT_CAPACITY, error_rate=1e-6):
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown fingerprint index mode '{mode}'. "
+                             f"Options: {', '.join(INDEX_MODES)}")
+        self.mode = mode
+        self.size = 0
+        self._runs = []
+        if mode == 'bloom':
+            bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            self._num_bits = max(64, bits)
+            self._num_hashes = max(1, int(round(self._num_bits / capacity * math.log(2))))
+            self._bits = np.zeros((self._num_bits + 7) // 8, dtype=np.uint8)
+
+    def __len__(self):
+        return self.size
+
+    # -- exact mode -------------------------------------------------------
+
+    def _exact_contains(self, fingerprints):
+        # Sorted probes walk each run in order, which is far more cache
+        # friendly than random binary searches
+        order = np.argsort(fingerprints)
+        probes = fingerprints[order]
+        found_sorted = np.zeros(len(probes), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, probes)
+            positions[positions == len(run)] = 0
+            found_sorted |= run[positions] == probes
+        found = np.empty_like(found_sorted)
+        found[order] = found_sorted
+        return found
+
+    def _exact_add(self, fingerprints):
+        run = np.sort(fingerprints)
+        # Merge equally sized runs so lookups touch O(log n) sorted arrays;
+        # a stable sort of two concatenated sorted runs is a linear merge
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]), kind='stable')
+        self._runs.append(run)
+
+    # -- bloom mode -------------------------------------------------------
+
+    def _bloom_positions(self, fingerprints):
+        # Double hashing: derive k bit positions from the two 32-bit halves
+        low = (fingerprints & np.uint64(0xFFFFFFFF)).astype(np.uint64)
+        high = (fingerprints >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self._num_hashes, dtype=np.uint64)
+        return (low[:, None] + steps[None, :] * high[:, None]) % np.uint64(self._num_bits)
+
+    def _bloom_contains(self, fingerprints):
+        positions = self._bloom_positions(fingerprints)
+        bits = (self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def _bloom_add(self, fingerprints):
+        positions = self._bloom_positions(fingerprints).ravel()
+        offsets = positions >> np.uint64(3)
+        shifts = (positions & np.uint64(7)).astype(np.uint8)
+        # One pass per bit offset: repeated byte indices within a pass all
+        # set the same bit, so buffered fancy-index assignment is safe
+        for shift in range(8):
+            targets = offsets[shifts == shift]
+            self._bits[targets] |= np.uint8(1 << shift)
+
+    # -- public API -------------------------------------------------------
+
+    def contains(self, fingerprints):
+        """Return a boolean mask of fingerprints already in the index."""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        if len(fingerprints) == 0 or self.size == 0:
+            return np.zeros(len(fingerprints), dtype=bool)
+        if self.mode == 'exact':
+            return self._exact_contains(fingerprints)
+        return self._bloom_contains(fingerprints)
+
+    def add(self, fingerprints):
+        """Add unique fingerprints that are known not to be in the index."""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        if len(fingerprints) == 0:
+            return
+        if self.mode == 'exact':
+            self._exact_add(fingerprints)
+        else:
+            self._bloom_add(fingerprints)
+        self.size += len(fingerprints)
+
+    def drop_seen(self, df, columns=None):
+        """
+        Return `df` without rows already seen in this or earlier chunks.
+
+        First occurrences are kept, matching `DataFrame.drop_duplicates`,
+        and their fingerprints are added to the index.
+        """
+        fingerprints = row_fingerprints(df, columns)
+        duplicated = (pd.Series(fingerprints).duplicated().to_numpy()
+                      | self.contains(fingerprints))
+        self.add(fingerprints[~duplicated])
+        return df[~duplicated]
+
+    def save(self, path):
+        """Write the index to an .npz file."""
+        payload = {'mode': np.array(self.mode), 'size': np.array(self.size)}
+        if self.mode == 'exact':
+            payload['fingerprints'] = (np.concatenate(self._runs) if self._runs
+                                       else np.empty(0, dtype=np.uint64))
+        else:
+            payload['bits'] = self._bits
+            payload['num_bits'] = np.array(self._num_bits)
+            payload['num_hashes'] = np.array(self._num_hashes)
+        with open(path, 'wb') as handle:
+            np.savez_compressed(handle, **payload)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by `save`."""
+        with np.load(path) as payload:
+            # Bloom bits are restored below, so size the placeholder minimally
+            index = cls(mode=str(payload['mode']), capacity=1)
+            index.size = int(payload['size'])
+            if index.mode == 'exact':
+                fingerprints = payload['fingerprints']
+                index._runs = [np.sort(fingerprints)] if len(fingerprints) else []
+            else:
+                index._bits = payload['bits']
+                index._num_bits = int(payload['num_bits'])
+                index._num_hashes = int(payload['num_hashes'])
+        return index
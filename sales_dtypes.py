@@ -0,0 +1,162 @@
+"""
+Compact Dtypes
+==============
+
+Step 2.7 of the cleaning pipeline: shrink each cleaned chunk before it is
+aggregated, cached or kept.
+
+- The low-cardinality dimension columns (`CATEGORICAL_COLUMNS`) become
+  categoricals over one shared `CategoryDictionary`, so every chunk is
+  encoded with the same categories and integer codes. Chunks then
+  concatenate without falling back to strings, and groupbys run on the
+  codes. The dictionary can be saved and reloaded, so codes stay stable
+  across runs and only values never seen before grow it.
+- Integer columns are downcast to the narrowest type holding their values.
+  Sums of narrow integers are still computed in int64. Float columns are
+  left as float64: pandas keeps float32 sums (and so the running
+  aggregates) in float32, which cannot represent cents beyond $167,772.16.
+
+Savings are reported against `plain_frame_bytes`, the size of the chunk
+with its dimensions held as plain strings, since CSV exports are already
+read with categorical dimensions.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from sales_ingestion import CATEGORICAL_COLUMNS
+
+
+class CategoryDictionary:
+    """
+    Shared category vocabularies for the dimension columns.
+
+    Vocabularies are kept sorted, matching the categories `read_csv`
+    infers, so outputs grouped on the codes come out in the usual order.
+    Values are stored as text: numeric dimension values (Region codes 1,
+    2, ...) are encoded under their string labels.
+
+    Parameters
+    ----------
+    columns : list of str, optional
+        Columns to encode; defaults to `CATEGORICAL_COLUMNS`.
+    """
+
+    def __init__(self, columns=None):
+        self.vocabularies = {column: pd.Index([], dtype='str')
+                             for column in (columns or CATEGORICAL_COLUMNS)}
+
+    def __len__(self):
+        return sum(len(vocabulary) for vocabulary in self.vocabularies.values())
+
+    def _vocabulary(self, column, categories):
+        """Return the vocabulary of `column`, grown by any unseen `categories`."""
+        vocabulary = self.vocabularies[column]
+        new = categories.difference(vocabulary)
+        if len(new):
+            vocabulary = vocabulary.append(new).astype('str').sort_values()
+            self.vocabularies[column] = vocabulary
+        return vocabulary
+
+    def encode(self, chunk):
+        """Return `chunk` with its dimension columns encoded over the shared vocabularies."""
+        encoded = {}
+        for column in self.vocabularies:
+            if column not in chunk:
+                continue
+            values = chunk[column]
+            changed = not isinstance(values.dtype, pd.CategoricalDtype)
+            if changed:
+                values = values.astype('category')
+            # Only the categories need checking, not every row
+            categories = values.cat.categories
+            if pd.api.types.infer_dtype(categories) != 'string':
+                values = values.cat.rename_categories(_text_labels(categories))
+                changed = True
+            vocabulary = self._vocabulary(column, values.cat.categories)
+            if not values.cat.categories.equals(vocabulary):
+                values = values.cat.set_categories(vocabulary)
+                changed = True
+            if changed:
+                encoded[column] = values
+        return chunk.assign(**encoded) if encoded else chunk
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({column: vocabulary.tolist()
+                       for column, vocabulary in self.vocabularies.items()}, handle)
+
+    @classmethod
+    def load(cls, path):
+        """Load vocabularies written by `save`."""
+        with open(path, 'r', encoding='utf-8') as handle:
+            payload = json.load(handle)
+        dictionary = cls(list(payload))
+        dictionary.vocabularies = {column: pd.Index(values, dtype='str').sort_values()
+                                   for column, values in payload.items()}
+        return dictionary
+
+
+def _text_labels(categories):
+    """String labels of non-string categories; whole floats lose their '.0'."""
+    if (pd.api.types.is_float_dtype(categories.dtype) and np.isfinite(categories).all()
+            and (categories == np.floor(categories)).all()):
+        categories = categories.astype('int64')
+    return categories.astype('str')
+
+
+def downcast_integers(chunk):
+    """Return `chunk` with integer columns in the narrowest type holding their values."""
+    downcast = {}
+    for column in chunk.columns:
+        values = chunk[column]
+        # NumPy and nullable integers; bool and categorical columns are left alone
+        if pd.api.types.is_integer_dtype(values.dtype) and not isinstance(
+                values.dtype, pd.CategoricalDtype):
+            narrow = pd.to_numeric(values, downcast='integer')
+            if narrow.dtype != values.dtype:
+                downcast[column] = narrow
+    return chunk.assign(**downcast) if downcast else chunk
+
+
+def optimize_dtypes(chunk, category_dictionary=None):
+    """
+    Apply the compact dtypes to a cleaned chunk.
+
+    Dimension columns are encoded over `category_dictionary` (a fresh
+    dictionary when omitted) and integer columns are downcast.
+    """
+    dictionary = category_dictionary if category_dictionary is not None else CategoryDictionary()
+    return downcast_integers(dictionary.encode(chunk))
+
+
+def frame_bytes(df):
+    """Memory held by `df`, including the strings of text columns."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _plain_text_bytes(values):
+    """
+    Estimate the memory of categorical `values` held as a plain string
+    column: each category's size times its count, so no per-row strings
+    are built.
+    """
+    labels = pd.Series(values.cat.categories.astype('str'))
+    codes = values.cat.codes.to_numpy()
+    if labels.empty:
+        return frame_bytes(values.astype('str').to_frame())
+    lengths = labels.str.encode('utf-8').str.len().to_numpy()
+    # Per-value overhead of the string storage (offsets or object headers)
+    overhead = (labels.memory_usage(deep=True, index=False) - lengths.sum()) / len(labels)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return int(counts @ (lengths + overhead) + (codes < 0).sum() * overhead)
+
+
+def plain_frame_bytes(df):
+    """Memory `df` would hold with its categorical columns as plain strings."""
+    return sum(_plain_text_bytes(df[column])
+               if isinstance(df[column].dtype, pd.CategoricalDtype)
+               else int(df[column].memory_usage(deep=True, index=False))
+               for column in df.columns)
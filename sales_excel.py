@@ -0,0 +1,289 @@
+"""
+Excel Ingestion
+===============
+
+Streaming reader for .xlsx/.xlsm sales workbooks, driven by
+`file_format_config.excel` in analysis_config.yaml:
+
+- ``auto_detect_sheets``: every sheet whose header maps onto the sales
+  schema is read; sheets without one (notes, pivots) are skipped. When
+  false, only the first sheet is read.
+- ``header_row_detection``: the header is the row, among the first
+  `HEADER_SCAN_ROWS`, whose cells map the most schema columns, so title
+  rows and blank lines above the table are skipped. When false, the first
+  row is the header.
+- ``skip_empty_rows``: blank rows inside the table are dropped.
+
+Rows are pulled as plain value tuples, never as cell objects, and only one
+chunk of rows is held at a time before it becomes a typed DataFrame. The
+Rust-based `python-calamine` reader is used when installed; otherwise the
+workbook is opened with openpyxl in read-only mode
+(`iter_rows(values_only=True)`), which is several times slower.
+Multi-sheet workbooks are parsed in parallel, one sheet per worker process,
+and their chunks are yielded in sheet order. A new sheet is only submitted
+as an earlier one is consumed, so no more sheets than workers are held in
+memory at once.
+
+Requires `python-calamine` or `openpyxl`.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+
+import pandas as pd
+
+from sales_config import load_config
+from sales_ingestion import coerce_sales_dtypes
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# Rows searched for the header when header_row_detection is on
+HEADER_SCAN_ROWS = 20
+
+# Rows buffered as Python tuples before conversion to a typed DataFrame
+EXCEL_CHUNK_ROWS = 50_000
+
+
+try:
+    import python_calamine
+except ImportError:  # Optional dependency; openpyxl is a slower fallback
+    python_calamine = None
+
+
+def _require_openpyxl():
+    try:
+        import openpyxl
+    except ImportError as exc:
+        raise ImportError(
+            "Reading Excel workbooks requires python-calamine or openpyxl. Install "
+            "one with 'pip install python-calamine' or 'pip install openpyxl'."
+        ) from exc
+    return openpyxl
+
+
+class _WorkbookReader:
+    """
+    Row-value access to a workbook through python-calamine or, failing
+    that, a read-only openpyxl workbook. Rows are numbered from the top of
+    the sheet by both backends.
+    """
+
+    def __init__(self, path):
+        if python_calamine is not None:
+            self._calamine = python_calamine.CalamineWorkbook.from_path(path)
+            self._openpyxl = None
+            self.sheetnames = list(self._calamine.sheet_names)
+        else:
+            self._calamine = None
+            self._openpyxl = _require_openpyxl().load_workbook(path, read_only=True,
+                                                               data_only=True)
+            self.sheetnames = list(self._openpyxl.sheetnames)
+
+    def iter_rows(self, sheet, skip_rows=0):
+        """Yield the value tuples of `sheet`, starting `skip_rows` from the top."""
+        if self._calamine is None:
+            return self._openpyxl[sheet].iter_rows(min_row=skip_rows + 1, values_only=True)
+        calamine_sheet = self._calamine.get_sheet_by_name(sheet)
+        # calamine starts at the first used row; pad back to the sheet top
+        first_row = calamine_sheet.start[0] if calamine_sheet.start else 0
+        rows = chain(repeat((), first_row), calamine_sheet.iter_rows())
+        return islice(rows, skip_rows, None)
+
+    def close(self):
+        if self._openpyxl is not None:
+            self._openpyxl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_excel_file(path):
+    """Return True if `path` names an .xlsx/.xlsm workbook."""
+    return str(path).lower().endswith(EXCEL_EXTENSIONS)
+
+
+def _excel_options(config):
+    return (config or {}).get('file_format_config', {}).get('excel', {})
+
+
+def _header_names(row):
+    return ['' if value is None else str(value).strip() for value in row]
+
+
+def _is_empty(row):
+    return all(value is None or (isinstance(value, str) and not value.strip())
+               for value in row)
+
+
+def _is_header_candidate(row):
+    """Header rows have at least two cells and only text in them."""
+    values = [value for value in row if value is not None and value != '']
+    return len(values) >= 2 and all(isinstance(value, str) for value in values)
+
+
+def _layout(sheet, header_row, headers, mapper):
+    mapping = mapper.map_columns([header for header in headers if header])
+    return {
+        'sheet': sheet,
+        'header_row': header_row,
+        # Column position -> canonical column, robust to blank/duplicate headers
+        'columns': {position: mapping['rename'][header]
+                    for position, header in enumerate(headers)
+                    if header in mapping['rename']},
+        'rename': mapping['rename'],
+        'missing_required': mapping['missing_required'],
+    }
+
+
+def detect_sheet_layouts(path, mapper, sheet_name=None, header_row=None, config=None):
+    """
+    Locate the sales table in each sheet of a workbook.
+
+    Only the first rows of each sheet are read.
+
+    Parameters
+    ----------
+    path : str
+        Workbook to inspect.
+    mapper : schema_mapper.SchemaMapper
+        Resolves header cells to canonical columns.
+    sheet_name : str, optional
+        Inspect only this sheet.
+    header_row : int, optional
+        0-based header row, overriding detection.
+    config : dict, optional
+        Parsed analysis_config.yaml; supplies `file_format_config.excel`.
+
+    Returns
+    -------
+    list of dict
+        Per sheet: ``sheet``, 0-based ``header_row``, ``columns`` (column
+        position -> canonical name), ``rename`` and ``missing_required``.
+    """
+    options = _excel_options(config)
+    with _WorkbookReader(path) as workbook:
+        if sheet_name is not None:
+            if sheet_name not in workbook.sheetnames:
+                raise ValueError(f"Unknown sheet '{sheet_name}'. "
+                                 f"Options: {', '.join(workbook.sheetnames)}")
+            sheets = [sheet_name]
+        elif options.get('auto_detect_sheets', True):
+            sheets = workbook.sheetnames
+        else:
+            sheets = workbook.sheetnames[:1]
+
+        layouts = []
+        for sheet in sheets:
+            scan_rows = max(HEADER_SCAN_ROWS, (header_row or 0) + 1)
+            head = list(islice(workbook.iter_rows(sheet), scan_rows))
+            if header_row is not None or not options.get('header_row_detection', True):
+                index = header_row or 0
+                headers = _header_names(head[index]) if index < len(head) else []
+                layouts.append(_layout(sheet, index, headers, mapper))
+                continue
+
+            # The header is the all-text row mapping the most schema columns
+            candidates = [_layout(sheet, index, _header_names(row), mapper)
+                          for index, row in enumerate(head) if _is_header_candidate(row)]
+            complete = [c for c in candidates if not c['missing_required']] or candidates
+            if complete:
+                layouts.append(max(complete, key=lambda c: (len(c['columns']), -c['header_row'])))
+            else:
+                layouts.append(_layout(sheet, 0, [], mapper))
+        return layouts
+
+
+def _rows_to_frame(rows, columns):
+    """Build a typed, canonically named DataFrame from row value tuples."""
+    data = {name: [row[position] if position < len(row) else None for row in rows]
+            for position, name in columns.items()}
+    # calamine reports blank cells as ''
+    return coerce_sales_dtypes(pd.DataFrame(data).replace({'': None}))
+
+
+def iter_sheet_chunks(path, layout, chunksize=EXCEL_CHUNK_ROWS, skip_empty_rows=True):
+    """Stream the table described by `layout` as typed DataFrame chunks."""
+    with _WorkbookReader(path) as workbook:
+        rows = workbook.iter_rows(layout['sheet'], skip_rows=layout['header_row'] + 1)
+        if skip_empty_rows:
+            rows = (row for row in rows if not _is_empty(row))
+        while True:
+            block = list(islice(rows, chunksize))
+            if not block:
+                break
+            yield _rows_to_frame(block, layout['columns'])
+
+
+def _read_sheet(path, layout, chunksize, skip_empty_rows):
+    """Worker: parse one sheet into typed chunks."""
+    return list(iter_sheet_chunks(path, layout, chunksize, skip_empty_rows))
+
+
+def read_sales_excel(path, layouts=None, mapper=None, chunksize=None, max_workers=None,
+                     config=None, sheet_name=None, header_row=None):
+    """
+    Stream the sales tables of a workbook as typed DataFrame chunks.
+
+    Parameters
+    ----------
+    path : str
+        .xlsx/.xlsm workbook.
+    layouts : list of dict, optional
+        Output of `detect_sheet_layouts`; detected here when omitted.
+    mapper : schema_mapper.SchemaMapper, optional
+        Used for detection when `layouts` is omitted.
+    chunksize : int, optional
+        Rows per chunk; defaults to `EXCEL_CHUNK_ROWS`.
+    max_workers : int, optional
+        Processes parsing sheets in parallel; defaults to one per CPU,
+        capped at the sheet count. Also bounds the parsed sheets waiting
+        to be consumed. With one worker (or one sheet) sheets are streamed
+        in this process.
+    config : dict, optional
+        Parsed analysis_config.yaml; the bundled file is loaded when omitted.
+    sheet_name, header_row : optional
+        Passed to `detect_sheet_layouts`.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunks with the canonical column names and production dtypes.
+    """
+    config = config if config is not None else load_config()
+    if layouts is None:
+        if mapper is None:
+            from schema_mapper import SchemaMapper
+            mapper = SchemaMapper(config)
+        layouts = detect_sheet_layouts(path, mapper, sheet_name, header_row, config)
+    usable = [layout for layout in layouts if not layout['missing_required']]
+    if not usable:
+        raise ValueError(f"No sheet in '{path}' has columns matching the required "
+                         f"sales columns")
+
+    chunksize = chunksize or EXCEL_CHUNK_ROWS
+    skip_empty_rows = _excel_options(config).get('skip_empty_rows', True)
+    workers = min(max_workers or os.cpu_count() or 1, len(usable))
+    if workers <= 1:
+        for layout in usable:
+            yield from iter_sheet_chunks(path, layout, chunksize, skip_empty_rows)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(layout):
+            return pool.submit(_read_sheet, path, layout, chunksize, skip_empty_rows)
+
+        # A sliding window of `workers` sheets: the next sheet is submitted
+        # as the oldest is taken, so parsed sheets never pile up faster than
+        # they are consumed. Sheet order is kept so time-ordered workbooks
+        # stay time-ordered.
+        remaining = iter(usable)
+        pending = deque(submit(layout) for layout in islice(remaining, workers))
+        while pending:
+            chunks = pending.popleft().result()
+            pending.extend(submit(layout) for layout in islice(remaining, 1))
+            yield from chunks
@@ -0,0 +1,385 @@
+"""
+Image Ingestion
+===============
+
+Table extraction from scanned sales sheets (PNG, JPEG, TIFF, ...), driven
+by `file_format_config.image` in analysis_config.yaml:
+
+- ``ocr_engine``: only local ``tesseract`` recognition is supported.
+- ``preprocessing``: each page is straightened by its EXIF orientation,
+  converted to grayscale, upscaled to at least `OCR_MIN_WIDTH` pixels,
+  contrast-stretched, despeckled and binarized at its Otsu threshold
+  before recognition.
+- ``table_structure_detection``: recognized words are assembled into
+  cells, and the cells of consecutive lines aligned into column bands, so a
+  blank cell keeps the row's values under the right headers. When false,
+  each line's cells are taken in order.
+- ``table_detection_threshold``: as for PDF reports, the share of
+  non-empty cells a table needs to be kept.
+- ``decimal_separator``: as for PDF reports, '.', ',' or ``auto``.
+
+Recognized tables are mapped onto the sales schema exactly like PDF tables
+(see `sales_pdf.map_table_rows`), with a headerless table continuing the
+layout of the previous page or scan.
+
+Every page of every scan (each frame of a multi-page TIFF) is one worker
+task; recognition dominates the cost, so throughput scales with the number
+of cores. With a cache directory, each page's tables are cached by the
+scan's content hash, so a re-submitted scan - under any file name - is not
+recognized again.
+
+Requires `Pillow` and `pytesseract`, with the tesseract binary on PATH.
+"""
+
+import glob
+import json
+import os
+import statistics
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sales_batch import is_batch_file, is_batch_input
+from sales_cache import file_digest
+from sales_config import load_config
+from sales_pdf import (DEFAULT_TABLE_DETECTION_THRESHOLD, decimal_option, map_table_rows,
+                       table_rows_to_frame)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif', '.webp')
+
+OCR_ENGINES = ('tesseract',)
+
+# Assume a single uniform block of text, so each table row is one line
+TESSERACT_CONFIG = '--psm 6'
+
+# Narrower scans are upscaled before recognition
+OCR_MIN_WIDTH = 1600
+
+# Words further apart than this many median word heights are separate cells
+CELL_GAP_FACTOR = 1.0
+
+# Rows buffered before conversion to a typed DataFrame
+IMAGE_CHUNK_ROWS = 50_000
+
+OCR_CACHE_SUBDIR = 'ocr_tables'
+
+# Bump when recognition changes in a way that invalidates cached tables
+OCR_CACHE_VERSION = 1
+
+
+def _require_pillow():
+    try:
+        from PIL import Image
+    except ImportError as exc:
+        raise ImportError(
+            "Reading scanned images requires Pillow. Install it with "
+            "'pip install Pillow'."
+        ) from exc
+    return Image
+
+
+def _require_pytesseract():
+    try:
+        import pytesseract
+    except ImportError as exc:
+        raise ImportError(
+            "Reading scanned images requires pytesseract and the tesseract "
+            "binary. Install them with 'pip install pytesseract' and your "
+            "system package manager."
+        ) from exc
+    return pytesseract
+
+
+def is_image_file(path):
+    """Return True if `path` names a scanned image."""
+    return str(path).lower().endswith(IMAGE_EXTENSIONS)
+
+
+def resolve_image_inputs(path):
+    """
+    Return the scans named by `path`: an image file, the images in a
+    directory holding no CSV, Excel or PDF exports, or the matches of a
+    glob pattern that matches only images. Empty when `path` names
+    anything else.
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path))
+        if any(is_batch_file(f) for f in files):
+            return []
+        return [f for f in files if os.path.isfile(f) and is_image_file(f)]
+    if is_batch_input(path):
+        files = sorted(f for f in glob.glob(path) if os.path.isfile(f))
+        return files if files and all(is_image_file(f) for f in files) else []
+    return [path] if is_image_file(path) else []
+
+
+def _image_options(config):
+    return (config or {}).get('file_format_config', {}).get('image', {})
+
+
+def count_image_frames(path):
+    """Return the number of pages (frames) of the image at `path`."""
+    with _require_pillow().open(path) as image:
+        return getattr(image, 'n_frames', 1)
+
+
+def _otsu_threshold(histogram):
+    """Gray level that best separates ink from paper in a 256-bin `histogram`."""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    best_level, best_variance = 0, -1.0
+    background = background_sum = 0
+    for level, count in enumerate(histogram):
+        background += count
+        foreground = total - background
+        if not background:
+            continue
+        if not foreground:
+            break
+        background_sum += level * count
+        mean_gap = background_sum / background - (weighted_total - background_sum) / foreground
+        variance = background * foreground * mean_gap ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def preprocess_image(image):
+    """Return `image` prepared for OCR as a binarized grayscale page."""
+    Image = _require_pillow()
+    from PIL import ImageFilter, ImageOps
+
+    page = ImageOps.grayscale(ImageOps.exif_transpose(image))
+    if page.width < OCR_MIN_WIDTH:
+        height = round(page.height * OCR_MIN_WIDTH / page.width)
+        page = page.resize((OCR_MIN_WIDTH, height), Image.Resampling.LANCZOS)
+    page = ImageOps.autocontrast(page, cutoff=1).filter(ImageFilter.MedianFilter(3))
+    threshold = _otsu_threshold(page.histogram())
+    return page.point([0] * (threshold + 1) + [255] * (255 - threshold))
+
+
+def _line_cells(words, gap):
+    """Join one line's words, left to right, into cells split at gaps wider than `gap`."""
+    cells = []
+    for word in sorted(words, key=lambda w: w['left']):
+        if cells and word['left'] - cells[-1]['right'] <= gap:
+            cells[-1]['right'] = max(cells[-1]['right'], word['right'])
+            cells[-1]['text'] += ' ' + word['text']
+        else:
+            cells.append(dict(word))
+    return cells
+
+
+def _column_bands(lines):
+    """Merge the overlapping horizontal extents of the cells of `lines` into column bands."""
+    bands = []
+    for left, right in sorted((cell['left'], cell['right']) for cells in lines for cell in cells):
+        if bands and left <= bands[-1][1]:
+            bands[-1][1] = max(bands[-1][1], right)
+        else:
+            bands.append([left, right])
+    return bands
+
+
+def _aligned_row(cells, bands):
+    row = [''] * len(bands)
+    for cell in cells:
+        # Bands cover every cell, so the cell lies within exactly one band
+        position = next(i for i, (left, right) in enumerate(bands)
+                        if left <= cell['left'] <= right)
+        row[position] = f"{row[position]} {cell['text']}".strip()
+    return row
+
+
+def words_to_tables(data, structure_detection=True):
+    """
+    Rebuild tables from tesseract ``image_to_data`` output (dict form).
+
+    Lines with at least two cells are table rows; consecutive rows form a
+    table, and single-cell lines such as titles and footers separate
+    tables.
+
+    Returns
+    -------
+    list
+        Tables as lists of rows of cell strings, like
+        `sales_pdf` extraction output.
+    """
+    lines, heights = {}, []
+    for i, text in enumerate(data['text']):
+        text = str(text).strip()
+        # Tesseract reports confidence -1 for layout entries without text
+        if not text or float(data['conf'][i]) < 0:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left = data['left'][i]
+        lines.setdefault(key, []).append({'left': left, 'right': left + data['width'][i],
+                                          'top': data['top'][i], 'text': text})
+        heights.append(data['height'][i])
+    if not lines:
+        return []
+
+    gap = CELL_GAP_FACTOR * statistics.median(heights)
+    tables, rows = [], []
+    for words in sorted(lines.values(), key=lambda words: min(w['top'] for w in words)):
+        cells = _line_cells(words, gap)
+        if len(cells) >= 2:
+            rows.append(cells)
+        elif rows:
+            tables.append(rows)
+            rows = []
+    if rows:
+        tables.append(rows)
+
+    if not structure_detection:
+        return [[[cell['text'] for cell in cells] for cells in table] for table in tables]
+    result = []
+    for table in tables:
+        bands = _column_bands(table)
+        result.append([_aligned_row(cells, bands) for cells in table])
+    return result
+
+
+def _recognize_frame(path, frame, preprocessing, structure_detection):
+    """Worker: recognize the tables on page `frame` of the image at `path`."""
+    Image = _require_pillow()
+    pytesseract = _require_pytesseract()
+    with Image.open(path) as image:
+        image.seek(frame)
+        page = preprocess_image(image) if preprocessing else image.convert('L')
+        data = pytesseract.image_to_data(page, config=TESSERACT_CONFIG,
+                                         output_type=pytesseract.Output.DICT)
+    return words_to_tables(data, structure_detection)
+
+
+class OcrTableCache:
+    """
+    On-disk cache of recognized page tables.
+
+    Entries are small JSON files keyed by (content hash, page, recognition
+    settings), written under a temporary name and renamed into place.
+    """
+
+    def __init__(self, cache_dir, settings):
+        self.directory = os.path.join(cache_dir, OCR_CACHE_SUBDIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self.settings = settings
+
+    def _entry_path(self, digest, frame):
+        return os.path.join(self.directory,
+                            f'{digest}-v{OCR_CACHE_VERSION}-f{frame}-{self.settings}.json')
+
+    def get(self, digest, frame):
+        """Return the cached tables of page `frame` of the scan hashed `digest`, or None."""
+        entry_path = self._entry_path(digest, frame)
+        if not os.path.exists(entry_path):
+            return None
+        with open(entry_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def put(self, digest, frame, tables):
+        entry_path = self._entry_path(digest, frame)
+        with open(entry_path + '.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(tables, handle)
+        os.replace(entry_path + '.tmp', entry_path)
+
+
+def read_sales_images(paths, mapper=None, chunksize=None, max_workers=None, config=None,
+                      cache_dir=None):
+    """
+    Stream the sales tables of scanned sheets as typed DataFrame chunks.
+
+    Parameters
+    ----------
+    paths : str or list of str
+        Image file(s), read in order.
+    mapper : schema_mapper.SchemaMapper, optional
+        Resolves table headers to canonical columns.
+    chunksize : int, optional
+        Rows per chunk; defaults to `IMAGE_CHUNK_ROWS`.
+    max_workers : int, optional
+        Processes recognizing pages in parallel; defaults to one per CPU.
+        With one worker pages are recognized in this process.
+    config : dict, optional
+        Parsed analysis_config.yaml; the bundled file is loaded when omitted.
+    cache_dir : str, optional
+        Directory for the recognized-table cache; no caching when omitted.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunks with the canonical column names and production dtypes.
+    """
+    config = config if config is not None else load_config()
+    options = _image_options(config)
+    engine = options.get('ocr_engine', 'tesseract')
+    if engine not in OCR_ENGINES:
+        raise ValueError(f"Unsupported OCR engine '{engine}'. "
+                         f"Options: {', '.join(OCR_ENGINES)}")
+    preprocessing = bool(options.get('preprocessing', True))
+    structure_detection = bool(options.get('table_structure_detection', True))
+    decimal = decimal_option(options)
+    threshold = options.get('table_detection_threshold', DEFAULT_TABLE_DETECTION_THRESHOLD)
+    if mapper is None:
+        from schema_mapper import SchemaMapper
+        mapper = SchemaMapper(config)
+    chunksize = chunksize or IMAGE_CHUNK_ROWS
+
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    frames = [(path, frame) for path in paths for frame in range(count_image_frames(path))]
+
+    recognized = {}
+    cache = digests = None
+    if cache_dir:
+        cache = OcrTableCache(cache_dir, f'p{int(preprocessing)}s{int(structure_detection)}')
+        digests = {path: file_digest(path) for path in paths}
+        for path, frame in frames:
+            tables = cache.get(digests[path], frame)
+            if tables is not None:
+                recognized[(path, frame)] = tables
+    tasks = [page for page in frames if page not in recognized]
+
+    def recognized_tasks():
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        if workers <= 1:
+            for path, frame in tasks:
+                yield _recognize_frame(path, frame, preprocessing, structure_detection)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            def submit(task):
+                path, frame = task
+                return pool.submit(_recognize_frame, path, frame, preprocessing,
+                                   structure_detection)
+
+            # Frames are recognized `workers` at a time in page order; each
+            # finished frame frees a slot for the next, so a long scan never
+            # queues every decoded frame at once
+            remaining = iter(tasks)
+            pending = deque(submit(task) for task in islice(remaining, workers))
+            while pending:
+                tables = pending.popleft().result()
+                pending.extend(submit(task) for task in islice(remaining, 1))
+                yield tables
+
+    results = recognized_tasks()
+    layout, buffer, rows_yielded = None, [], 0
+    for path, frame in frames:
+        tables = recognized.pop((path, frame), None)
+        if tables is None:
+            tables = next(results)
+            if cache is not None:
+                cache.put(digests[path], frame, tables)
+
+        layout, rows = map_table_rows(tables, layout, mapper, threshold)
+        buffer.extend(rows)
+        if len(buffer) >= chunksize:
+            yield table_rows_to_frame(buffer, decimal)
+            rows_yielded += len(buffer)
+            buffer = []
+
+    if buffer:
+        yield table_rows_to_frame(buffer, decimal)
+    elif not rows_yielded:
+        raise ValueError(f"No table in {', '.join(repr(path) for path in paths[:3])}"
+                         f"{' ...' if len(paths) > 3 else ''} has columns matching the "
+                         f"required sales columns")
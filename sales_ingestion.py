@@ -0,0 +1,357 @@
+"""
+Sales Data Ingestion
+====================
+
+Streaming readers that load sales exports in bounded-size chunks with
+explicit dtypes, so files far larger than memory can be fed through the
+cleaning and aggregation steps of the analysis pipeline.
+
+CSV exports are read in the dialect sniffed by `sales_dialect` (encoding,
+delimiter, quoting, decimal separator, rows above the header). When pyarrow
+is installed the file is memory-mapped and parsed by Arrow's multithreaded
+CSV reader, with dimensions decoded straight into dictionaries; otherwise
+pandas' C parser reads the same dialects.
+
+Both engines read the numeric columns as text and parse them leniently
+(see `parse_number_text`), so thousands separators, integers written as
+'9.0' and stray non-numeric cells do not abort the read; cells that are
+not numbers become missing values for the cleaning stage.
+"""
+
+import pandas as pd
+
+from sales_dialect import sniff_csv
+
+# Canonical sales schema used throughout the analysis pipeline
+SALES_COLUMNS = ['Date', 'Sales Rep', 'Region', 'Deals Closed', 'Revenue',
+                 'Customer Type', 'Product']
+
+CATEGORICAL_COLUMNS = ['Region', 'Sales Rep', 'Product', 'Customer Type']
+
+# Explicit dtypes avoid pandas' per-chunk type inference and keep the
+# low-cardinality string columns as compact categoricals. Deals Closed is
+# nullable so blank cells load; the missing-value stage restores int32.
+SALES_DTYPES = {
+    'Region': 'category',
+    'Sales Rep': 'category',
+    'Product': 'category',
+    'Customer Type': 'category',
+    'Deals Closed': 'Int32',
+    'Revenue': 'float64',
+}
+
+NUMERIC_COLUMNS = [column for column, dtype in SALES_DTYPES.items() if dtype != 'category']
+
+DATE_COLUMNS = ['Date']
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MEMORY_LIMIT_MB = 512
+
+# Rows sampled from the head of a file to estimate the in-memory row size
+SAMPLE_ROWS = 1_000
+
+# Bytes of CSV text Arrow parses per block (one block per thread)
+ARROW_BLOCK_BYTES = 4 * 1024 * 1024
+
+CSV_ENGINES = ('pyarrow', 'c')
+
+# A chunk is held alongside its cleaned copy and partial aggregates, so only
+# a fraction of the memory budget is handed to a single chunk
+CHUNK_MEMORY_FRACTION = 0.25
+
+
+def _is_index_column(name):
+    """Return True for extraneous index columns such as 'Unnamed: 0'."""
+    return str(name).startswith('Unnamed:')
+
+
+def _usecols(name):
+    return not _is_index_column(name)
+
+
+def _read_dtype(column):
+    """`read_csv` dtype of a schema column: numbers are read as text."""
+    return 'str' if column in NUMERIC_COLUMNS else SALES_DTYPES[column]
+
+
+def _typed_read_options(rename=None):
+    """
+    Return `read_csv` keyword arguments that load only schema columns with
+    their production dtypes (numeric columns as text, see
+    `parse_number_columns`).
+
+    `rename` maps source headers to canonical schema columns, e.g. as
+    resolved by `schema_mapper.SchemaMapper`; dtypes are then keyed by the
+    source headers and only mapped columns are loaded.
+    """
+    if rename is None:
+        return {'usecols': _usecols,
+                'dtype': {column: _read_dtype(column) for column in SALES_DTYPES},
+                'parse_dates': DATE_COLUMNS}
+    return {
+        'usecols': list(rename),
+        'dtype': {source: _read_dtype(column) for source, column in rename.items()
+                  if column in SALES_DTYPES},
+        'parse_dates': [source for source, column in rename.items()
+                        if column in DATE_COLUMNS],
+    }
+
+
+def parse_number_text(values, decimal='.', dtype='float64'):
+    """
+    Parse a Series of numbers read as text into `dtype`.
+
+    Thousands separators are dropped ('1,234.50', or '1.234,50' with a
+    decimal comma) and integer columns accept whole numbers written as
+    '9.0'. Cells that still are not numbers become missing values.
+    """
+    text = values.str.strip()
+    if decimal != '.':
+        text = text.str.replace('.', '', regex=False).str.replace(decimal, '.', regex=False)
+    numbers = pd.to_numeric(text, errors='coerce')
+    # Only cells that failed the plain parse pay for separator stripping
+    unparsed = numbers.isna() & text.notna()
+    if decimal == '.' and unparsed.any():
+        numbers = numbers.astype('float64')
+        numbers[unparsed] = pd.to_numeric(text[unparsed].str.replace(',', '', regex=False),
+                                          errors='coerce')
+    if pd.api.types.is_integer_dtype(dtype):
+        numbers = numbers.round()
+    return numbers.astype(dtype)
+
+
+def parse_number_columns(chunk, decimal='.'):
+    """Parse the canonically named numeric columns of a chunk read as text."""
+    numbers = {column: parse_number_text(chunk[column], decimal, SALES_DTYPES[column])
+               for column in NUMERIC_COLUMNS
+               if column in chunk and not pd.api.types.is_numeric_dtype(chunk[column])}
+    return chunk.assign(**numbers) if numbers else chunk
+
+
+def _load_pyarrow():
+    """Return pyarrow with its CSV reader, or None when it is not installed."""
+    try:
+        import pyarrow
+        import pyarrow.csv
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _dialect_read_options(dialect):
+    """Translate a sniffed dialect into `pandas.read_csv` keyword arguments."""
+    return {
+        'encoding': dialect['encoding'],
+        'sep': dialect['delimiter'],
+        'quotechar': dialect['quotechar'],
+        'decimal': dialect['decimal'],
+        'skiprows': dialect['header_row'],
+    }
+
+
+def _csv_read_kwargs(path, dialect, read_kwargs):
+    dialect = dialect if dialect is not None else sniff_csv(path)
+    return {**_dialect_read_options(dialect), **read_kwargs}
+
+
+def read_csv_header(path, dialect=None, **read_kwargs):
+    """
+    Return the column headers of a CSV without reading any rows.
+
+    `dialect` is the output of `sales_dialect.sniff_csv`; the file is
+    sniffed when it is omitted.
+    """
+    return list(pd.read_csv(path, nrows=0, **_csv_read_kwargs(path, dialect, read_kwargs)).columns)
+
+
+def estimate_chunk_rows(path, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, rename=None,
+                        dialect=None, **read_kwargs):
+    """
+    Estimate how many rows of `path` fit in one chunk under `memory_limit_mb`.
+
+    A small sample is parsed with the production dtypes and its deep memory
+    usage is extrapolated to the chunk size.
+    """
+    read_kwargs.pop('nrows', None)
+    dialect = dialect if dialect is not None else sniff_csv(path)
+    sample = pd.read_csv(path, nrows=SAMPLE_ROWS, **_typed_read_options(rename),
+                         **_csv_read_kwargs(path, dialect, read_kwargs))
+    sample = parse_number_columns(sample.rename(columns=rename) if rename else sample,
+                                  dialect['decimal'])
+    if sample.empty:
+        return DEFAULT_CHUNK_ROWS
+
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    budget = memory_limit_mb * 1024 * 1024 * CHUNK_MEMORY_FRACTION
+    return max(1, int(budget // bytes_per_row))
+
+
+def _arrow_column_types(pyarrow, columns, rename):
+    """Arrow types of each loaded source column: dictionaries, or text for the rest."""
+    dimension = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    column_types = {}
+    for source in columns:
+        column = rename.get(source, source) if rename else source
+        if column in DATE_COLUMNS or SALES_DTYPES.get(column) == 'category':
+            # Few distinct dates per block too: each is parsed once, see _decode_dates
+            column_types[source] = dimension
+        else:
+            # Numbers are parsed leniently after conversion, see parse_number_text
+            column_types[source] = pyarrow.string()
+    return column_types
+
+
+def _decode_dates(values):
+    """Parse a categorical of date strings by parsing each distinct value once."""
+    dates = pd.to_datetime(values.cat.categories, errors='coerce')
+    return pd.Series(dates.take(values.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT),
+                     index=values.index, name=values.name)
+
+
+def _cast_clean_numbers(pyarrow, table, rename, decimal):
+    """Cast numeric text columns that parse strictly in Arrow; the rest stay text."""
+    if decimal != '.':
+        return table
+    arrow_types = {'Int32': pyarrow.int32(), 'float64': pyarrow.float64()}
+    for index, source in enumerate(table.column_names):
+        column = rename.get(source, source) if rename else source
+        if column not in NUMERIC_COLUMNS:
+            continue
+        try:
+            values = table.column(index).cast(arrow_types[SALES_DTYPES[column]])
+        except pyarrow.ArrowInvalid:
+            continue
+        table = table.set_column(index, source, values)
+    return table
+
+
+def _arrow_to_frame(pyarrow, table, rename, decimal):
+    table = _cast_clean_numbers(pyarrow, table, rename, decimal)
+    chunk = table.to_pandas(types_mapper={pyarrow.int32(): pd.Int32Dtype()}.get)
+    dates = {column: _decode_dates(chunk[column]) for column in chunk
+             if (rename.get(column, column) if rename else column) in DATE_COLUMNS}
+    if dates:
+        chunk = chunk.assign(**dates)
+    return parse_number_columns(chunk.rename(columns=rename) if rename else chunk, decimal)
+
+
+def _iter_arrow_chunks(path, chunksize, rename, dialect):
+    """Parse a memory-mapped CSV with Arrow, re-sliced into `chunksize`-row chunks."""
+    pyarrow = _load_pyarrow()
+    # Column names come from pandas' header parse so both engines agree on
+    # blank ('Unnamed: N') and repeated ('Name.1') headers
+    headers = read_csv_header(path, dialect)
+    columns = list(rename) if rename else [name for name in headers if _usecols(name)]
+    encoding = dialect['encoding'].lower().replace('-', '')
+    reader = pyarrow.csv.open_csv(
+        pyarrow.memory_map(path),
+        read_options=pyarrow.csv.ReadOptions(
+            column_names=headers,
+            skip_rows=dialect['header_row'] + 1,
+            block_size=ARROW_BLOCK_BYTES,
+            # Arrow skips a UTF-8 byte-order mark itself
+            encoding='utf8' if encoding in ('utf8', 'utf8sig') else dialect['encoding'],
+        ),
+        parse_options=pyarrow.csv.ParseOptions(delimiter=dialect['delimiter'],
+                                               quote_char=dialect['quotechar']),
+        convert_options=pyarrow.csv.ConvertOptions(
+            include_columns=columns,
+            column_types=_arrow_column_types(pyarrow, columns, rename),
+            strings_can_be_null=True,
+        ),
+    )
+
+    pending, pending_rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunksize:
+            table = pyarrow.Table.from_batches(pending)
+            yield _arrow_to_frame(pyarrow, table.slice(0, chunksize), rename, dialect['decimal'])
+            rest = table.slice(chunksize)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield _arrow_to_frame(pyarrow, pyarrow.Table.from_batches(pending), rename, dialect['decimal'])
+
+
+def read_sales_csv(path, chunksize=None, memory_limit_mb=None, rename=None, dialect=None,
+                   engine=None, **read_kwargs):
+    """
+    Stream a sales CSV as typed DataFrame chunks.
+
+    Parameters
+    ----------
+    path : str or path-like
+        CSV file to read.
+    chunksize : int, optional
+        Rows per chunk. Derived from `memory_limit_mb` when omitted.
+    memory_limit_mb : float, optional
+        Memory budget for the pipeline; used to size chunks when
+        `chunksize` is not given.
+    rename : dict, optional
+        Source header -> canonical column mapping. Only mapped columns are
+        loaded and chunks are yielded with canonical names.
+    dialect : dict, optional
+        Output of `sales_dialect.sniff_csv`; the file is sniffed when it is
+        omitted.
+    engine : {'pyarrow', 'c'}, optional
+        Parser to use. Defaults to pyarrow when it is installed and no
+        `read_kwargs` are given, else pandas' C parser.
+    **read_kwargs
+        Extra keyword arguments passed through to `pandas.read_csv`.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunks with categorical dimensions, nullable Int32 deal counts and a
+        datetime64 `Date` column. Extraneous 'Unnamed: N' index columns
+        are never loaded.
+    """
+    if engine is None:
+        engine = 'pyarrow' if not read_kwargs and _load_pyarrow() is not None else 'c'
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine '{engine}'. Options: {', '.join(CSV_ENGINES)}")
+    if engine == 'pyarrow' and read_kwargs:
+        raise ValueError("read_kwargs are only supported by the 'c' engine")
+
+    dialect = dialect if dialect is not None else sniff_csv(path)
+    if chunksize is None:
+        chunksize = estimate_chunk_rows(
+            path, memory_limit_mb or DEFAULT_MEMORY_LIMIT_MB, rename, dialect, **read_kwargs)
+
+    if engine == 'pyarrow':
+        yield from _iter_arrow_chunks(path, chunksize, rename, dialect)
+        return
+
+    reader = pd.read_csv(path, chunksize=chunksize, **_typed_read_options(rename),
+                         **_csv_read_kwargs(path, dialect, read_kwargs))
+    with reader:
+        for chunk in reader:
+            chunk = chunk.rename(columns=rename) if rename else chunk
+            yield parse_number_columns(chunk, dialect['decimal'])
+
+
+def coerce_sales_dtypes(df):
+    """
+    Cast the schema columns of a frame built from untyped values (e.g.
+    spreadsheet cells) to the dtypes `read_sales_csv` produces.
+
+    Unparseable dates and numbers become missing values for the cleaning
+    stage to handle.
+    """
+    typed = {}
+    for column in DATE_COLUMNS:
+        if column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            typed[column] = pd.to_datetime(df[column], errors='coerce')
+    for column, dtype in SALES_DTYPES.items():
+        if column not in df or df[column].dtype == dtype:
+            continue
+        if dtype == 'category':
+            typed[column] = df[column].astype('category')
+        else:
+            values = pd.to_numeric(df[column], errors='coerce')
+            if pd.api.types.is_integer_dtype(dtype):
+                values = values.round()
+            typed[column] = values.astype(dtype)
+    return df.assign(**typed) if typed else df
+
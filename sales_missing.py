@@ -0,0 +1,163 @@
+"""
+Missing Value Handling
+======================
+
+Missing-value stage of the Step 2 cleaning pipeline, driven by the
+`handle_missing_values` cleaning rule:
+
+- ``drop``: remove rows with a missing `Revenue` or `Deals Closed`.
+- ``fill_zero``: replace missing values with 0.
+- ``fill_mean``: replace missing values with the running mean of every
+  value seen so far, including the current chunk.
+- ``interpolate``: interpolate linearly in time within each Sales Rep's
+  series. Rows are sorted once by (Sales Rep, Date) and the previous and
+  next known points of every gap are found with grouped forward/backward
+  fills, so no Python loop runs per group.
+
+Rows without a `Date` cannot be placed in time and are always dropped.
+
+For chunked input the handler carries state between chunks: the running
+sums for ``fill_mean`` and the last known (Date, value) per Sales Rep for
+``interpolate``, which serves as the left end of gaps at the start of the
+next chunk. Gaps at the end of a chunk have no right end yet and are
+filled with the last known value. Carrying assumes each rep's rows arrive
+in date order across chunks, as in time-ordered exports.
+"""
+
+import numpy as np
+import pandas as pd
+
+MISSING_VALUE_COLUMNS = ['Revenue', 'Deals Closed']
+MISSING_VALUE_STRATEGIES = ('drop', 'fill_zero', 'fill_mean', 'interpolate')
+
+
+class MissingValueHandler:
+    """
+    Apply one missing-value strategy chunk by chunk.
+
+    Parameters
+    ----------
+    strategy : {'drop', 'fill_zero', 'fill_mean', 'interpolate'}
+    columns : list of str
+        Numeric columns to repair.
+    group_by : str
+        Column whose series are interpolated independently.
+    """
+
+    def __init__(self, strategy='interpolate', columns=None, group_by='Sales Rep'):
+        if strategy not in MISSING_VALUE_STRATEGIES:
+            raise ValueError(f"Unknown handle_missing_values '{strategy}'. "
+                             f"Options: {', '.join(MISSING_VALUE_STRATEGIES)}")
+        self.strategy = strategy
+        self.columns = list(columns or MISSING_VALUE_COLUMNS)
+        self.group_by = group_by
+        # fill_mean: running (sum, count) per column
+        self._sums = {}
+        # interpolate: last known Date and value per group, per column
+        self._carry = {}
+
+    @classmethod
+    def from_config(cls, cleaning_rules):
+        """Build a handler from a template's `cleaning_rules`, or None if unset."""
+        strategy = cleaning_rules.get('handle_missing_values')
+        return cls(strategy=strategy) if strategy else None
+
+    def _fill_mean(self, chunk, column):
+        values = chunk[column].astype('float64')
+        total, count = self._sums.get(column, (0.0, 0))
+        total += float(values.sum())
+        count += int(values.count())
+        self._sums[column] = (total, count)
+        return values.fillna(total / count) if count else values
+
+    def _remember(self, column, groups, times, values):
+        """Keep each group's latest known (time, value) for the next chunk."""
+        last = (pd.DataFrame({'time': times, 'value': values.to_numpy()}, index=groups)
+                .sort_values('time', kind='stable').groupby(level=0, dropna=False).last())
+        carry = self._carry.get(column)
+        if carry is not None:
+            last = pd.concat([carry, last]).groupby(level=0, dropna=False).last()
+        self._carry[column] = last
+
+    def _interpolate(self, chunk, column):
+        """Time-weighted linear interpolation within each group, vectorized."""
+        values = chunk[column].astype('float64')
+        known = values.notna().to_numpy()
+        times = chunk['Date'].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype('float64')
+        groups = chunk[self.group_by].astype(object).to_numpy()
+        if known.all():
+            self._remember(column, groups, times, values)
+            return values
+
+        # One stable sort puts every group's series in time order; the
+        # previous/next known point of each gap is then a grouped fill
+        order = np.lexsort((times, pd.factorize(groups, use_na_sentinel=False)[0]))
+        groups, times = groups[order], times[order]
+        values = values.iloc[order]
+        known_times = pd.Series(np.where(known[order], times, np.nan), index=values.index)
+        by_values = values.groupby(groups, dropna=False, sort=False)
+        by_times = known_times.groupby(groups, dropna=False, sort=False)
+        prev_value, prev_time = by_values.ffill(), by_times.ffill()
+        next_value, next_time = by_values.bfill(), by_times.bfill()
+
+        # Gaps at the start of a group continue from the previous chunk
+        carry = self._carry.get(column)
+        if carry is not None:
+            from_carry = prev_value.isna().to_numpy()
+            carried = carry.reindex(groups)
+            prev_value = prev_value.where(~from_carry, carried['value'].to_numpy())
+            prev_time = prev_time.where(~from_carry, carried['time'].to_numpy())
+
+        span = (next_time - prev_time).to_numpy()
+        weight = np.divide(times - prev_time.to_numpy(), span,
+                           out=np.zeros_like(span), where=span > 0)
+        interpolated = prev_value + (next_value - prev_value) * weight
+        # One-sided gaps take the nearest known value
+        interpolated = interpolated.fillna(prev_value).fillna(next_value)
+
+        is_known = known[order]
+        self._remember(column, groups[is_known], times[is_known], values[is_known])
+        return values.where(is_known, interpolated).reindex(chunk.index)
+
+    def _repair(self, chunk, column):
+        if self.strategy == 'fill_zero':
+            return chunk[column].fillna(0)
+        if self.strategy == 'fill_mean':
+            return self._fill_mean(chunk, column)
+        return self._interpolate(chunk, column)
+
+    def apply(self, chunk, stats):
+        """
+        Repair missing values in `chunk` and count them in
+        `stats['missing_values_filled']` and `stats['missing_rows_dropped']`.
+        """
+        stats.setdefault('missing_values_filled', 0)
+        stats.setdefault('missing_rows_dropped', 0)
+        columns = [c for c in self.columns if c in chunk.columns]
+
+        rows_before = len(chunk)
+        cleaned = chunk[chunk['Date'].notna()]
+        missing = cleaned[columns].isna().sum()
+        if self.strategy == 'drop':
+            cleaned = cleaned.dropna(subset=columns)
+        else:
+            # Repair every column even without gaps, so running state stays current
+            repaired = {column: self._repair(cleaned, column) for column in columns}
+            repaired = {column: values for column, values in repaired.items()
+                        if missing[column]}
+            if repaired:
+                stats['missing_values_filled'] += int(sum(
+                    missing[column] - values.isna().sum() for column, values in repaired.items()))
+                cleaned = cleaned.assign(**repaired)
+                # A series with no known value at all cannot be repaired
+                cleaned = cleaned.dropna(subset=list(repaired))
+
+        # Integer columns are read as nullable to admit blanks; restore the
+        # compact dtype once every gap is gone
+        for column in columns:
+            dtype = chunk[column].dtype
+            if pd.api.types.is_integer_dtype(dtype) and (missing[column] or not isinstance(dtype, np.dtype)):
+                cleaned[column] = cleaned[column].round().astype('int32')
+
+        stats['missing_rows_dropped'] += rows_before - len(cleaned)
+        return cleaned
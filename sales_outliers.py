@@ -0,0 +1,252 @@
+"""
+Outlier Detection
+=================
+
+Outlier stage of the Step 2 cleaning pipeline, driven by the
+`outlier_detection` ("iqr" / "zscore" / "none") and `outlier_action`
+("flag" / "remove" / "cap") cleaning rules.
+
+Bounds are computed for `Revenue` and `Deals Closed`, either globally or per
+group (e.g. per Region, or per Region and Sales Rep), from mergeable
+streaming state so the stage works chunk by chunk on data too large for
+exact quantiles:
+
+- ``iqr`` keeps a relative-error quantile sketch per group and column: each
+  value is counted in a logarithmic bucket whose width is set by
+  `relative_accuracy` (the DDSketch construction), with the bucket's
+  min/max kept for interpolation. Sketches merge by adding counts and
+  taking min/max per bucket, and all groups are updated and queried with
+  vectorized groupby operations rather than per-group Python objects.
+- ``zscore`` keeps exact per-group count, sum and sum of squares.
+
+In streaming mode each chunk is judged against the state of every row seen
+so far, including the chunk itself; with a single chunk the bounds cover the
+whole dataset.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+OUTLIER_COLUMNS = ['Revenue', 'Deals Closed']
+OUTLIER_METHODS = ('none', 'iqr', 'zscore')
+OUTLIER_ACTIONS = ('flag', 'remove', 'cap')
+FLAG_COLUMN = 'Outlier'
+
+# Offset that keeps bucket keys of positive and negative values disjoint
+_BUCKET_OFFSET = 1 << 20
+_GLOBAL_KEY = '__all__'
+
+
+def _merge_buckets(left, right):
+    """Combine two quantile sketches indexed by (group..., column, bucket)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return (pd.concat([left, right])
+            .groupby(level=list(range(left.index.nlevels)))
+            .agg({'count': 'sum', 'min': 'min', 'max': 'max'}))
+
+
+class OutlierDetector:
+    """
+    Streaming outlier detection with mergeable per-group state.
+
+    Parameters
+    ----------
+    method : {'none', 'iqr', 'zscore'}
+    action : {'flag', 'remove', 'cap'}
+        'flag' adds a boolean `Outlier` column, 'remove' drops outlier rows
+        and 'cap' clips values to the bounds.
+    columns : list of str
+        Numeric columns to check.
+    group_by : list of str, optional
+        Columns whose groups get their own bounds; global when empty.
+    iqr_multiplier, zscore_threshold : float
+        Width of the accepted range for each method.
+    relative_accuracy : float
+        Relative error of the IQR quantile sketch.
+    min_group_size : int
+        Groups with fewer rows than this are never flagged.
+    """
+
+    def __init__(self, method='iqr', action='flag', columns=None, group_by=None,
+                 iqr_multiplier=1.5, zscore_threshold=3.0, relative_accuracy=0.01,
+                 min_group_size=4):
+        if method not in OUTLIER_METHODS:
+            raise ValueError(f"Unknown outlier_detection '{method}'. "
+                             f"Options: {', '.join(OUTLIER_METHODS)}")
+        if action not in OUTLIER_ACTIONS:
+            raise ValueError(f"Unknown outlier_action '{action}'. "
+                             f"Options: {', '.join(OUTLIER_ACTIONS)}")
+        self.method = method
+        self.action = action
+        self.columns = list(columns or OUTLIER_COLUMNS)
+        self.group_by = list(group_by or [])
+        self.iqr_multiplier = iqr_multiplier
+        self.zscore_threshold = zscore_threshold
+        self.min_group_size = min_group_size
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        # IQR: count/min/max per (group..., column, bucket); z-score: moments per (group..., column)
+        self._buckets = None
+        self._moments = None
+
+    @classmethod
+    def from_config(cls, cleaning_rules):
+        """Build a detector from a template's `cleaning_rules`, or None if disabled."""
+        method = cleaning_rules.get('outlier_detection', 'none') or 'none'
+        if method == 'none':
+            return None
+        return cls(method=method,
+                   action=cleaning_rules.get('outlier_action', 'flag'),
+                   group_by=cleaning_rules.get('outlier_group_by'))
+
+    @property
+    def _state_keys(self):
+        return (self.group_by or ['group']) + ['column']
+
+    def _long_values(self, chunk):
+        """Stack `columns` of `chunk` into a (group..., column, value) frame."""
+        columns = [c for c in self.columns if c in chunk.columns]
+        keys = chunk[self.group_by].astype(str) if self.group_by else pd.DataFrame(
+            {'group': _GLOBAL_KEY}, index=chunk.index)
+        parts = [keys.assign(column=column, value=chunk[column].to_numpy(dtype='float64'))
+                 for column in columns]
+        long = pd.concat(parts, ignore_index=True)
+        return long[long['value'].notna()]
+
+    # -- sketch ----------------------------------------------------------
+
+    def _bucket(self, values):
+        magnitude = np.abs(values)
+        keys = np.zeros(len(values), dtype=np.int64)
+        nonzero = magnitude > 0
+        keys[nonzero] = (np.ceil(np.log(magnitude[nonzero]) / self._log_gamma)
+                         .astype(np.int64) + _BUCKET_OFFSET)
+        return keys * np.sign(values).astype(np.int64)
+
+    def update(self, chunk):
+        """Fold a chunk into the detector state. Returns self."""
+        if self.method == 'none' or len(chunk) == 0:
+            return self
+        long = self._long_values(chunk)
+        keys = self._state_keys
+
+        if self.method == 'iqr':
+            long['bucket'] = self._bucket(long['value'].to_numpy())
+            buckets = long.groupby(keys + ['bucket'])['value'].agg(['count', 'min', 'max'])
+            self._buckets = _merge_buckets(self._buckets, buckets)
+        else:
+            long['square'] = long['value'] ** 2
+            moments = long.groupby(keys).agg(count=('value', 'size'), sum=('value', 'sum'),
+                                             sumsq=('square', 'sum'))
+            self._moments = moments if self._moments is None else (
+                pd.concat([self._moments, moments]).groupby(level=list(range(len(keys)))).sum())
+        return self
+
+    def merge(self, other):
+        """Combine another detector's state into this one. Returns self."""
+        self._buckets = _merge_buckets(self._buckets, other._buckets)
+        if other._moments is not None:
+            self._moments = other._moments if self._moments is None else (
+                pd.concat([self._moments, other._moments])
+                .groupby(level=list(range(self._moments.index.nlevels))).sum())
+        return self
+
+    def _quantiles(self, probabilities):
+        """Approximate quantiles per (group..., column) from the bucket counts."""
+        keys = self._state_keys
+        buckets = self._buckets.sort_index()
+        counts = buckets['count']
+        group_levels = list(range(len(keys)))
+        cumulative = counts.groupby(level=group_levels).cumsum()
+        totals = counts.groupby(level=group_levels).transform('sum')
+
+        result = {}
+        for probability in probabilities:
+            # Locate the bucket holding the target rank, then interpolate
+            # between the smallest and largest value seen in that bucket
+            rank = probability * (totals - 1)
+            reached = cumulative > rank
+            position = ((rank - (cumulative - counts)) / counts.where(counts > 1, 2).sub(1)
+                        ).clip(0, 1)
+            values = buckets['min'] + position * (buckets['max'] - buckets['min'])
+            result[probability] = values[reached].groupby(level=group_levels).first()
+        frame = pd.DataFrame(result)
+        frame['count'] = counts.groupby(level=group_levels).sum()
+        return frame
+
+    def bounds(self):
+        """
+        Return the current bounds as a DataFrame indexed by
+        (group..., column) with `lower`, `upper` and `count` columns.
+        """
+        if self.method == 'iqr':
+            if self._buckets is None:
+                return None
+            quantiles = self._quantiles([0.25, 0.75])
+            spread = quantiles[0.75] - quantiles[0.25]
+            lower = quantiles[0.25] - self.iqr_multiplier * spread
+            upper = quantiles[0.75] + self.iqr_multiplier * spread
+            count = quantiles['count']
+        else:
+            if self._moments is None:
+                return None
+            moments = self._moments
+            mean = moments['sum'] / moments['count']
+            std = np.sqrt((moments['sumsq'] / moments['count'] - mean ** 2).clip(lower=0))
+            lower = mean - self.zscore_threshold * std
+            upper = mean + self.zscore_threshold * std
+            count = moments['count']
+
+        # Too few observations for meaningful bounds: accept everything
+        small = count < self.min_group_size
+        return pd.DataFrame({'lower': lower.mask(small, -np.inf),
+                             'upper': upper.mask(small, np.inf),
+                             'count': count})
+
+    def apply(self, chunk, stats):
+        """
+        Flag, remove or cap outliers in `chunk` using the current bounds and
+        count them in `stats['outliers_detected']`.
+        """
+        stats.setdefault('outliers_detected', 0)
+        if self.method == 'none':
+            return chunk
+        if self.action == 'flag':
+            chunk = chunk.assign(**{FLAG_COLUMN: False})
+        bounds = self.bounds()
+        if bounds is None or len(chunk) == 0:
+            return chunk
+
+        if len(self.group_by) > 1:
+            row_keys = pd.MultiIndex.from_frame(chunk[self.group_by].astype(str))
+        elif self.group_by:
+            row_keys = pd.Index(chunk[self.group_by[0]].astype(str))
+        else:
+            row_keys = pd.Index([_GLOBAL_KEY] * len(chunk), name='group')
+
+        is_outlier = np.zeros(len(chunk), dtype=bool)
+        capped = {}
+        for column in [c for c in self.columns if c in chunk.columns]:
+            column_bounds = bounds.xs(column, level='column').reindex(row_keys)
+            lower = column_bounds['lower'].fillna(-np.inf).to_numpy()
+            upper = column_bounds['upper'].fillna(np.inf).to_numpy()
+            values = chunk[column].to_numpy(dtype='float64', na_value=np.nan)
+            is_outlier |= (values < lower) | (values > upper)
+            if self.action == 'cap':
+                clipped = np.clip(values, lower, upper)
+                if pd.api.types.is_integer_dtype(chunk[column]):
+                    clipped = np.clip(values, np.ceil(lower), np.floor(upper))
+                # Series.astype also restores nullable dtypes such as Int32
+                capped[column] = pd.Series(clipped, index=chunk.index).astype(chunk[column].dtype)
+
+        stats['outliers_detected'] += int(is_outlier.sum())
+        if self.action == 'flag':
+            return chunk.assign(**{FLAG_COLUMN: is_outlier})
+        if self.action == 'remove':
+            return chunk[~is_outlier]
+        return chunk.assign(**capped)
@@ -0,0 +1,360 @@
+"""
+PDF Ingestion
+=============
+
+Table extraction from multi-page PDF sales reports, driven by
+`file_format_config.pdf` in analysis_config.yaml:
+
+- ``table_extraction_method``: ``lattice`` finds tables by their ruling
+  lines, ``stream`` by the alignment of their text. ``both`` runs the two
+  on each page and keeps whichever yields more sales rows.
+- ``multiple_pages``: every page is read; when false, only the first.
+- ``table_detection_threshold``: the share of non-empty cells a table
+  needs to be kept, which discards page furniture detected as tables.
+- ``decimal_separator``: '.' or ','. ``auto`` detects a decimal comma
+  ('1.234,50') from the numbers of the table, as `sales_dialect` does
+  for CSV exports.
+
+A table whose first row maps onto the sales schema (see `schema_mapper`)
+starts a new layout; a table without a header but with the same number of
+columns continues the previous one, as when a long table spans pages.
+Report formatting such as '$1,234.50', '1.234,50 €' or '(120.00)' is parsed
+into numbers.
+
+Pages are extracted in parallel, `PDF_PAGES_PER_TASK` pages per worker
+task, and rows are yielded in page order. With a cache directory, each
+page's tables are cached by (file hash, page, method), so reruns - and
+switching to or from ``both`` - only parse pages not extracted before.
+
+Requires `pdfplumber`.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from sales_cache import file_digest
+from sales_config import load_config
+from sales_ingestion import SALES_COLUMNS, coerce_sales_dtypes
+
+PDF_EXTRACTION_METHODS = ('lattice', 'stream', 'both')
+
+DECIMAL_SEPARATORS = ('auto', '.', ',')
+
+# pdfplumber table finder settings per extraction method
+TABLE_SETTINGS = {
+    'lattice': {'vertical_strategy': 'lines', 'horizontal_strategy': 'lines'},
+    'stream': {'vertical_strategy': 'text', 'horizontal_strategy': 'text'},
+}
+
+DEFAULT_TABLE_DETECTION_THRESHOLD = 0.8
+
+# Pages per worker task; each task opens the document once
+PDF_PAGES_PER_TASK = 10
+
+# Rows buffered before conversion to a typed DataFrame
+PDF_CHUNK_ROWS = 50_000
+
+PDF_CACHE_SUBDIR = 'pdf_tables'
+
+# Bump when extraction changes in a way that invalidates cached tables
+PDF_CACHE_VERSION = 1
+
+_NUMERIC_COLUMNS = ['Revenue', 'Deals Closed']
+_NUMBER = re.compile(r'^[-+($€£]*\s*[\d.,]+\)?$')
+
+# A separator followed by one or two final digits, or a thousands group
+# followed by the other separator, tells the decimal separator apart
+_DECIMAL_COMMA = r',\d{1,2}$|\.\d{3},'
+_DECIMAL_POINT = r'\.\d{1,2}$|,\d{3}\.'
+
+
+def _require_pdfplumber():
+    try:
+        import pdfplumber
+    except ImportError as exc:
+        raise ImportError(
+            "Reading PDF reports requires pdfplumber. Install it with "
+            "'pip install pdfplumber'."
+        ) from exc
+    return pdfplumber
+
+
+def is_pdf_file(path):
+    """Return True if `path` names a PDF document."""
+    return str(path).lower().endswith('.pdf')
+
+
+def _pdf_options(config):
+    return (config or {}).get('file_format_config', {}).get('pdf', {})
+
+
+def count_pdf_pages(path):
+    """Return the number of pages of the PDF at `path`."""
+    with _require_pdfplumber().open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pages(path, requests):
+    """
+    Worker: extract the tables of each ``(page, methods)`` in `requests`.
+
+    Returns a dict of ``(page, method)`` -> list of tables, each a list of
+    rows of stripped cell strings.
+    """
+    pdfplumber = _require_pdfplumber()
+    extracted = {}
+    with pdfplumber.open(path) as pdf:
+        for number, methods in requests:
+            page = pdf.pages[number]
+            # Every method reads the same parsed page objects
+            for method in methods:
+                extracted[(number, method)] = [
+                    [['' if cell is None else str(cell).strip() for cell in row]
+                     for row in table]
+                    for table in page.extract_tables(TABLE_SETTINGS[method])]
+            page.close()
+    return extracted
+
+
+class PdfTableCache:
+    """
+    On-disk cache of extracted page tables for one PDF.
+
+    Entries are small JSON files keyed by (file hash, page, method), written
+    under a temporary name and renamed into place.
+    """
+
+    def __init__(self, cache_dir, path):
+        self.directory = os.path.join(cache_dir, PDF_CACHE_SUBDIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self.digest = file_digest(path)
+
+    def _entry_path(self, page, method):
+        return os.path.join(self.directory,
+                            f'{self.digest}-v{PDF_CACHE_VERSION}-p{page}-{method}.json')
+
+    def get(self, page, method):
+        """Return the cached tables of `page` under `method`, or None."""
+        entry_path = self._entry_path(page, method)
+        if not os.path.exists(entry_path):
+            return None
+        with open(entry_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def put(self, page, method, tables):
+        entry_path = self._entry_path(page, method)
+        with open(entry_path + '.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(tables, handle)
+        os.replace(entry_path + '.tmp', entry_path)
+
+
+def _fill_ratio(table):
+    cells = [cell for row in table for cell in row]
+    return sum(1 for cell in cells if cell) / len(cells) if cells else 0.0
+
+
+def _is_header_candidate(row):
+    """Header rows have at least two filled cells and no numbers in them."""
+    values = [cell for cell in row if cell]
+    return len(values) >= 2 and not any(_NUMBER.match(cell) for cell in values)
+
+
+def _table_rows(table, layout, mapper):
+    """
+    Return ``(layout, data rows)`` for one extracted table; no rows when the
+    table neither has a sales header nor continues the current layout.
+    """
+    header = table[0]
+    if _is_header_candidate(header):
+        mapping = mapper.map_columns([cell for cell in header if cell])
+        if not mapping['missing_required']:
+            layout = {
+                'width': len(header),
+                # Column position -> canonical column
+                'columns': {position: mapping['rename'][cell]
+                            for position, cell in enumerate(header)
+                            if cell in mapping['rename']},
+            }
+            return layout, table[1:]
+    if layout is not None and len(header) == layout['width']:
+        return layout, table
+    return layout, []
+
+
+def map_table_rows(tables, layout, mapper, threshold):
+    """
+    Map the tables of one page onto the sales schema; returns (layout, rows).
+
+    `tables` are lists of rows of cell strings; `layout` is the layout
+    returned for the previous page, or None, so headerless tables can
+    continue a table begun on an earlier page.
+    """
+    rows = []
+    for table in tables:
+        if not table or _fill_ratio(table) < threshold:
+            continue
+        layout, data = _table_rows(table, layout, mapper)
+        rows.extend({column: row[position] for position, column in layout['columns'].items()
+                     if position < len(row)}
+                    for row in data if any(row))
+    return layout, rows
+
+
+def _digits(values):
+    return values.astype('string').str.replace(r'[^0-9.,\-]', '', regex=True)
+
+
+def detect_decimal(values):
+    """Return ',' when the report-formatted numbers in `values` use a decimal comma, else '.'."""
+    digits = _digits(values)
+    commas = int(digits.str.contains(_DECIMAL_COMMA, regex=True).sum())
+    points = int(digits.str.contains(_DECIMAL_POINT, regex=True).sum())
+    return ',' if commas > points else '.'
+
+
+def _parse_numbers(values, decimal='.'):
+    """Parse report-formatted numbers ('$1,234.50', '(120.00)') as floats."""
+    text = values.astype('string').str.strip()
+    negative = (text.str.startswith('(') & text.str.endswith(')')).fillna(False)
+    thousands = ',' if decimal == '.' else '.'
+    digits = _digits(text).str.replace(thousands, '', regex=False)
+    if decimal != '.':
+        digits = digits.str.replace(decimal, '.', regex=False)
+    numbers = pd.to_numeric(digits, errors='coerce')
+    return numbers.where(~negative, -numbers)
+
+
+def table_rows_to_frame(rows, decimal='auto'):
+    """
+    Build a typed, canonically named DataFrame from `map_table_rows` rows.
+
+    `decimal` is the decimal separator of the numbers, or 'auto' to detect
+    it from them.
+    """
+    df = pd.DataFrame.from_records(rows).replace({'': None})
+    df = df[[column for column in SALES_COLUMNS if column in df]]
+    numeric = [column for column in _NUMERIC_COLUMNS if column in df]
+    if decimal == 'auto':
+        decimal = detect_decimal(pd.concat([df[column] for column in numeric])) if numeric else '.'
+    numbers = {column: _parse_numbers(df[column], decimal) for column in numeric}
+    return coerce_sales_dtypes(df.assign(**numbers))
+
+
+def decimal_option(options):
+    """Return the validated ``decimal_separator`` of a file format options block."""
+    decimal = options.get('decimal_separator', 'auto')
+    if decimal not in DECIMAL_SEPARATORS:
+        raise ValueError(f"Unknown decimal separator '{decimal}'. "
+                         f"Options: {', '.join(DECIMAL_SEPARATORS)}")
+    return decimal
+
+
+def read_sales_pdf(path, mapper=None, chunksize=None, max_workers=None, config=None,
+                   cache_dir=None):
+    """
+    Stream the sales tables of a PDF report as typed DataFrame chunks.
+
+    Parameters
+    ----------
+    path : str
+        PDF report.
+    mapper : schema_mapper.SchemaMapper, optional
+        Resolves table headers to canonical columns.
+    chunksize : int, optional
+        Rows per chunk; defaults to `PDF_CHUNK_ROWS`.
+    max_workers : int, optional
+        Processes extracting pages in parallel; defaults to one per CPU.
+        With one worker pages are extracted in this process.
+    config : dict, optional
+        Parsed analysis_config.yaml; the bundled file is loaded when omitted.
+    cache_dir : str, optional
+        Directory for the per-page table cache; no caching when omitted.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunks with the canonical column names and production dtypes.
+    """
+    config = config if config is not None else load_config()
+    options = _pdf_options(config)
+    method = options.get('table_extraction_method', 'lattice')
+    if method not in PDF_EXTRACTION_METHODS:
+        raise ValueError(f"Unknown table extraction method '{method}'. "
+                         f"Options: {', '.join(PDF_EXTRACTION_METHODS)}")
+    methods = ['lattice', 'stream'] if method == 'both' else [method]
+    decimal = decimal_option(options)
+    threshold = options.get('table_detection_threshold', DEFAULT_TABLE_DETECTION_THRESHOLD)
+    if mapper is None:
+        from schema_mapper import SchemaMapper
+        mapper = SchemaMapper(config)
+    chunksize = chunksize or PDF_CHUNK_ROWS
+
+    pages = list(range(count_pdf_pages(path)))
+    if not options.get('multiple_pages', True):
+        pages = pages[:1]
+
+    extracted = {}
+    cache = PdfTableCache(cache_dir, path) if cache_dir else None
+    if cache is not None:
+        for page in pages:
+            for page_method in methods:
+                tables = cache.get(page, page_method)
+                if tables is not None:
+                    extracted[(page, page_method)] = tables
+    requests = [(page, [m for m in methods if (page, m) not in extracted]) for page in pages]
+    requests = [request for request in requests if request[1]]
+    tasks = [requests[i:i + PDF_PAGES_PER_TASK]
+             for i in range(0, len(requests), PDF_PAGES_PER_TASK)]
+
+    def extracted_tasks():
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        if workers <= 1:
+            for task in tasks:
+                yield _extract_pages(path, task)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # At most `workers` tasks in flight, as in sales_excel: the next
+            # is submitted as the oldest is taken, so extracted tables of a
+            # long report never pile up ahead of the consumer. Task order is
+            # page order, so rows are yielded in page order.
+            remaining = iter(tasks)
+            pending = deque(pool.submit(_extract_pages, path, task)
+                            for task in islice(remaining, workers))
+            while pending:
+                task_tables = pending.popleft().result()
+                pending.extend(pool.submit(_extract_pages, path, task)
+                               for task in islice(remaining, 1))
+                yield task_tables
+
+    results = extracted_tasks()
+    layout, buffer, rows_yielded = None, [], 0
+    for page in pages:
+        while any((page, page_method) not in extracted for page_method in methods):
+            task_tables = next(results)
+            if cache is not None:
+                for (task_page, task_method), tables in task_tables.items():
+                    cache.put(task_page, task_method, tables)
+            extracted.update(task_tables)
+
+        # Under 'both' the extraction yielding more rows wins; lattice on ties
+        layout, rows = max((map_table_rows(extracted.pop((page, page_method)), layout,
+                                           mapper, threshold)
+                            for page_method in methods),
+                           key=lambda candidate: len(candidate[1]))
+        buffer.extend(rows)
+        if len(buffer) >= chunksize:
+            yield table_rows_to_frame(buffer, decimal)
+            rows_yielded += len(buffer)
+            buffer = []
+
+    if buffer:
+        yield table_rows_to_frame(buffer, decimal)
+    elif not rows_yielded:
+        raise ValueError(f"No table in '{path}' has columns matching the required "
+                         f"sales columns")
@@ -0,0 +1,132 @@
+"""
+Sales Analysis Pipeline
+=======================
+
+Drives Steps 2-3 of the analysis over an iterable of raw chunks: every chunk
+is cleaned and folded into running aggregates, so peak memory is bounded by
+the chunk size rather than the size of the input. Chunks restored from the
+cleaned-data cache skip straight to aggregation.
+"""
+
+import pandas as pd
+
+from sales_aggregation import SalesAggregator
+from sales_cleaning import clean_sales_chunk, new_cleaning_stats
+from sales_dedup import FingerprintIndex
+from sales_dtypes import CategoryDictionary
+from sales_profiling import iter_stage, profile_stage
+
+
+def _finish(aggregator, stats, cleaned_chunks, keep_frame, category_dictionary=None):
+    results = {}
+    # Nothing survived cleaning, e.g. a delivery already ingested in full
+    if not aggregator.is_empty:
+        with profile_stage('aggregate.finalize'):
+            results = aggregator.finalize()
+    results['cleaning_stats'] = stats
+    results['aggregator'] = aggregator
+    if keep_frame and cleaned_chunks:
+        if category_dictionary is not None:
+            # Chunks encoded before the vocabularies last grew get the final
+            # categories, so the concatenation stays categorical
+            cleaned_chunks = [category_dictionary.encode(chunk) for chunk in cleaned_chunks]
+        results['df_cleaned'] = pd.concat(cleaned_chunks)
+    return results
+
+
+def run_pipeline(chunks, keep_frame=False, aggregator=None, dedup_index=None,
+                 cache_writer=None, outlier_detector=None, missing_handler=None,
+                 category_dictionary=None, query_cube=None):
+    """
+    Clean and aggregate `chunks` in a single pass.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Raw chunks, e.g. from `sales_ingestion.read_sales_csv`.
+    keep_frame : bool
+        Also return the concatenated cleaned frame. Only sensible for data
+        that fits in memory.
+    aggregator : SalesAggregator, optional
+        Existing state to fold the new chunks into, e.g. last night's
+        month-to-date summary. A fresh aggregator is used when omitted.
+    dedup_index : sales_dedup.FingerprintIndex, optional
+        Fingerprints of rows already ingested, so duplicates replayed from
+        earlier runs are dropped. A fresh exact index is used when omitted,
+        which still catches duplicates spanning chunk boundaries.
+    cache_writer : sales_cache.CleanedDataCacheWriter, optional
+        Receives every cleaned chunk so later runs can skip Steps 1-2.
+    outlier_detector : sales_outliers.OutlierDetector, optional
+        Flags, removes or caps outliers after deduplication.
+    missing_handler : sales_missing.MissingValueHandler, optional
+        Repairs missing Revenue / Deals Closed values before filtering.
+    category_dictionary : sales_dtypes.CategoryDictionary, optional
+        Categories of the dimension columns from earlier runs, so their
+        codes stay stable. A fresh dictionary is used when omitted.
+    query_cube : sales_aggregation.SalesQueryCube, optional
+        Also receives every cleaned chunk, for filtered rollups.
+
+    Returns
+    -------
+    dict
+        The outputs of `SalesAggregator.finalize` plus `cleaning_stats`,
+        the updated `aggregator`, `dedup_index` and `category_dictionary`
+        and, when requested, `df_cleaned`. The `finalize` outputs are
+        omitted when the aggregator is still empty, e.g. when every row was
+        a duplicate of rows in `dedup_index`.
+    """
+    stats = new_cleaning_stats()
+    aggregator = aggregator if aggregator is not None else SalesAggregator()
+    dedup_index = dedup_index if dedup_index is not None else FingerprintIndex()
+    if category_dictionary is None:
+        category_dictionary = CategoryDictionary()
+    cleaned_chunks = []
+
+    try:
+        for chunk in iter_stage('read', chunks):
+            cleaned = clean_sales_chunk(chunk, stats, dedup_index, outlier_detector,
+                                        missing_handler, category_dictionary)
+            with profile_stage('aggregate.update', len(cleaned)):
+                aggregator.update(cleaned)
+            if query_cube is not None:
+                with profile_stage('aggregate.query_cube', len(cleaned)):
+                    query_cube.update(cleaned)
+            if cache_writer is not None:
+                with profile_stage('cache.write', len(cleaned)):
+                    cache_writer.write(cleaned)
+            if keep_frame:
+                cleaned_chunks.append(cleaned)
+    except BaseException:
+        if cache_writer is not None:
+            cache_writer.abort()
+        raise
+
+    if cache_writer is not None:
+        cache_writer.close(stats)
+
+    results = _finish(aggregator, stats, cleaned_chunks, keep_frame, category_dictionary)
+    results['dedup_index'] = dedup_index
+    results['category_dictionary'] = category_dictionary
+    return results
+
+
+def run_cleaned_pipeline(cleaned_chunks, cleaning_stats, keep_frame=False, aggregator=None,
+                         query_cube=None):
+    """
+    Aggregate chunks that are already clean, e.g. from `sales_cache`.
+
+    Takes the `cleaning_stats` recorded when the chunks were cleaned and
+    returns the same result dict as `run_pipeline`, minus `dedup_index` and
+    `category_dictionary`. A `query_cube` receives the chunks too.
+    """
+    aggregator = aggregator if aggregator is not None else SalesAggregator()
+    kept = []
+    for cleaned in iter_stage('cache.read', cleaned_chunks):
+        with profile_stage('aggregate.update', len(cleaned)):
+            aggregator.update(cleaned)
+        if query_cube is not None:
+            with profile_stage('aggregate.query_cube', len(cleaned)):
+                query_cube.update(cleaned)
+        if keep_frame:
+            kept.append(cleaned)
+    return _finish(aggregator, cleaning_stats, kept, keep_frame)
@@ -0,0 +1,264 @@
+"""
+Stage Profiling
+===============
+
+Per-stage instrumentation of the analysis pipeline.
+
+Pipeline code marks its stages with ``with profile_stage(name, rows_in) as
+stage:`` and sets ``stage.rows_out``. While a `StageProfiler` is active,
+each stage records wall time, CPU time, the process's peak RSS and rows
+in/out; stages entered once per chunk ("read", "clean.dedup", ...) are
+summed into one record. With no active profiler, `profile_stage` is a
+no-op, so uninstrumented runs pay nothing.
+
+Metrics are written as JSON (`write_json`) and, optionally, as a Chrome
+trace (`write_chrome_trace`, viewable in chrome://tracing or Perfetto).
+One chosen stage can additionally run under cProfile or tracemalloc.
+
+Stages run in other processes (batch workers) are not recorded; chart
+workers report their own timings through `record`.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then omitted
+    resource = None
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+# The profiler stages report to, or None when profiling is off
+_active = None
+
+
+def get_profiler():
+    """Return the active `StageProfiler`, or None."""
+    return _active
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Stage:
+    """
+    Handle yielded by `profile_stage`; set `rows_out` before leaving, and
+    `calls` to 0 for a step whose time counts but that did no unit of work.
+    """
+
+    def __init__(self, rows_in=None):
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.calls = 1
+
+
+_NULL_STAGE = _Stage()
+
+
+def profile_stage(name, rows_in=None):
+    """Time the enclosed block as stage `name` on the active profiler, if any."""
+    if _active is None:
+        return nullcontext(_NULL_STAGE)
+    return _active.stage(name, rows_in)
+
+
+def iter_stage(name, iterable):
+    """
+    Yield from `iterable`, timing each step as stage `name`.
+
+    Only the time spent producing items is counted (e.g. CSV parsing in a
+    chunk reader), not the time the consumer spends on them. The stage's
+    calls are the items produced: the final step that finds the iterable
+    exhausted adds its time but no call.
+    """
+    iterator = iter(iterable)
+    while True:
+        with profile_stage(name) as stage:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage.calls = 0
+                return
+            stage.rows_out = len(item)
+        yield item
+
+
+class StageProfiler:
+    """
+    Collect per-stage metrics for one run.
+
+    Parameters
+    ----------
+    profile_stage : str, optional
+        Stage to run under a detailed profiler.
+    profile_mode : {'cprofile', 'tracemalloc'}
+        cProfile records function-level timings, written by `dump_profile`;
+        tracemalloc adds the stage's peak allocated bytes to its record.
+    """
+
+    def __init__(self, profile_stage=None, profile_mode='cprofile'):
+        if profile_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{profile_mode}'. "
+                             f"Options: {', '.join(PROFILE_MODES)}")
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.records = {}
+        self.events = []
+        self._origin = time.perf_counter()
+        self._epoch_origin = time.time()
+        self._cprofile = None
+
+    def activate(self):
+        """Make this the profiler `profile_stage` reports to. Returns self."""
+        global _active
+        _active = self
+        return self
+
+    def deactivate(self):
+        global _active
+        if _active is self:
+            _active = None
+
+    # -- detailed profiling hook ----------------------------------------
+
+    def _start_hook(self, name):
+        if name != self.profile_stage:
+            return
+        if self.profile_mode == 'cprofile':
+            import cProfile
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+    def _stop_hook(self, name):
+        """Stop the hook; returns the stage's peak allocated bytes under tracemalloc."""
+        if name != self.profile_stage:
+            return None
+        if self.profile_mode == 'cprofile':
+            self._cprofile.disable()
+            return None
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[1]
+
+    # -- recording -------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        handle = _Stage(rows_in)
+        self._start_hook(name)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield handle
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            allocated_peak = self._stop_hook(name)
+            self.record(name, wall, cpu, handle.rows_in, handle.rows_out,
+                        start=start - self._origin, allocated_peak_bytes=allocated_peak,
+                        calls=handle.calls)
+
+    def record(self, name, wall_seconds, cpu_seconds, rows_in=None, rows_out=None,
+               start=None, pid=None, allocated_peak_bytes=None, calls=1):
+        """
+        Add one stage occurrence measured elsewhere, e.g. in a worker.
+
+        `start` is in seconds since the profiler was created; use
+        `epoch_offset` to convert a worker's `time.time()`. `calls` is added
+        to the stage's call count.
+        """
+        record = self.records.setdefault(name, {
+            'stage': name,
+            'calls': 0,
+            'wall_seconds': 0.0,
+            'cpu_seconds': 0.0,
+            'rows_in': None,
+            'rows_out': None,
+            'peak_rss_bytes': None,
+        })
+        record['calls'] += calls
+        record['wall_seconds'] += wall_seconds
+        record['cpu_seconds'] += cpu_seconds
+        for key, value in (('rows_in', rows_in), ('rows_out', rows_out)):
+            if value is not None:
+                record[key] = (record[key] or 0) + int(value)
+        if pid is None:
+            record['peak_rss_bytes'] = peak_rss_bytes()
+        if allocated_peak_bytes is not None:
+            record['allocated_peak_bytes'] = max(record.get('allocated_peak_bytes', 0),
+                                                 allocated_peak_bytes)
+
+        start = start if start is not None else time.perf_counter() - self._origin - wall_seconds
+        self.events.append({
+            'name': name,
+            'start': start,
+            'wall_seconds': wall_seconds,
+            'pid': pid or os.getpid(),
+            'tid': threading.get_ident() if pid is None else 0,
+            'rows_in': rows_in,
+            'rows_out': rows_out,
+        })
+
+    def epoch_offset(self, epoch_seconds):
+        """Convert a `time.time()` value into seconds since the profiler started."""
+        return epoch_seconds - self._epoch_origin
+
+    # -- output ----------------------------------------------------------
+
+    def metrics(self, cleaning_stats=None):
+        """Return the run's metrics as a JSON-serializable dict."""
+        metrics = {
+            'wall_seconds': time.perf_counter() - self._origin,
+            'cpu_seconds': time.process_time(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': list(self.records.values()),
+        }
+        if cleaning_stats is not None:
+            metrics['cleaning_stats'] = {key: int(value) for key, value in cleaning_stats.items()}
+        if self.profile_stage is not None:
+            metrics['profile'] = {'stage': self.profile_stage, 'mode': self.profile_mode,
+                                  'ran': self.profile_stage in self.records}
+        return metrics
+
+    def write_json(self, path, cleaning_stats=None):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.metrics(cleaning_stats), handle, indent=2)
+
+    def write_chrome_trace(self, path):
+        """Write every stage occurrence as a Chrome trace-event file."""
+        events = [{
+            'name': event['name'],
+            'cat': event['name'].split('.')[0],
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['wall_seconds'] * 1e6,
+            'pid': event['pid'],
+            'tid': event['tid'],
+            'args': {key: event[key] for key in ('rows_in', 'rows_out')
+                     if event[key] is not None},
+        } for event in self.events]
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, handle)
+
+    def dump_profile(self, path):
+        """Write the cProfile statistics of the profiled stage (pstats format)."""
+        if self._cprofile is None:
+            return False
+        self._cprofile.dump_stats(path)
+        return True
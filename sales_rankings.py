@@ -0,0 +1,70 @@
+"""
+Performance Rankings
+====================
+
+Top-N / bottom-N revenue leaderboards of sales reps, regions, products and
+days, for the `performance_ranking` switch of the analysis template.
+
+Leaderboards are taken by partial selection (`Series.nlargest` /
+`Series.nsmallest`) from the per-key totals a `SalesAggregator` already
+maintains, so ranking K reps or days costs O(K) rather than the
+O(K log K) of sorting every total; only the N selected entries are
+ordered. A key's total can still grow with any later chunk or merged
+worker state, so leaderboards are selected from the merged totals when
+the report is produced rather than kept per chunk.
+"""
+
+import pandas as pd
+
+RANKING_DIMENSIONS = ['Sales Rep', 'Region', 'Product', 'Date']
+
+LEADERBOARD_SIZE = 5
+
+
+def leaderboard(totals, n=LEADERBOARD_SIZE):
+    """
+    Select the `n` highest and lowest of `totals`.
+
+    Keys that are missing (blank optional dimensions) and missing totals are
+    not ranked. Ties keep the order of `totals`.
+
+    Returns
+    -------
+    dict
+        ``top`` and ``bottom`` Series, best and worst first respectively.
+    """
+    totals = totals[totals.index.notna()]
+    return {'top': totals.nlargest(n), 'bottom': totals.nsmallest(n)}
+
+
+def revenue_leaderboards(breakdowns, daily_revenue, n=LEADERBOARD_SIZE):
+    """
+    Revenue leaderboards for each of `RANKING_DIMENSIONS` present.
+
+    Parameters
+    ----------
+    breakdowns : dict
+        `sales_breakdown.breakdown_cube` output; the single-dimension
+        entries supply the rep, region and product totals.
+    daily_revenue : pandas.Series
+        Revenue per date.
+    n : int
+        Entries per leaderboard.
+
+    Returns
+    -------
+    dict
+        Dimension -> `leaderboard` result.
+    """
+    totals = {dimension: breakdowns[(dimension,)]['Revenue']
+              for dimension in RANKING_DIMENSIONS if (dimension,) in breakdowns}
+    totals['Date'] = daily_revenue
+    return {dimension: leaderboard(totals[dimension], n)
+            for dimension in RANKING_DIMENSIONS if dimension in totals}
+
+
+def format_entries(entries):
+    """'Sarah ($12,340), Mike ($9,870)' style text for one leaderboard."""
+    labels = (f"{key:%Y-%m-%d}" if isinstance(key, pd.Timestamp) else str(key)
+              for key in entries.index)
+    return ', '.join(f"{label} (${value:,.0f})" for label, value in zip(labels, entries))
@@ -0,0 +1,357 @@
+"""
+Scoped Reports
+==============
+
+Batch generation of executive reports per scope - the whole dataset, each
+region, each sales rep and each month - driven by `report_config` in
+analysis_config.yaml:
+
+- ``scopes``: which of `REPORT_SCOPES` get reports. The data carries no
+  manager column, so ``sales_rep`` reports serve per-manager reporting.
+- ``formats``: any of `REPORT_FORMATS`; one file per report and format.
+- ``output_dir``: where report files are written.
+- ``max_workers``: threads rendering and writing reports.
+
+Every metric of every report is computed once into a `MetricsStore`, with
+one vectorized pass per scope over the aggregated results (the breakdown
+cube, calendar rollups and daily revenue), never over row-level data.
+Report text comes from templates parsed once into literal and field
+segments (`CompiledTemplate`), so rendering a report is string
+formatting only and thousands of reports cost little more than writing
+them out.
+"""
+
+import html
+import json
+import os
+import re
+import string
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+REPORT_SCOPES = ('overall', 'region', 'sales_rep', 'month')
+REPORT_FORMATS = ('text', 'json', 'html')
+
+DEFAULT_REPORT_DIR = 'reports'
+
+REPORT_EXTENSIONS = {'text': 'txt', 'json': 'json', 'html': 'html'}
+
+# Daily revenue spread, relative to the mean, below which sales count as consistent
+CONSISTENCY_THRESHOLD = 0.3
+
+REPORT_TITLE = 'SaaS Sales Performance Report'
+
+_SCOPE_DIMENSIONS = {'region': 'Region', 'sales_rep': 'Sales Rep'}
+_SCOPE_LABELS = {'overall': 'All Sales', 'region': 'Region', 'sales_rep': 'Sales Rep',
+                 'month': 'Month'}
+
+_TOTAL_LINES = [
+    ('Total Revenue', '${revenue:,.0f}'),
+    ('Total Deals Closed', '{deals:,.0f}'),
+    ('Transactions', '{transactions:,}'),
+    ('Average Deal Size', '${avg_deal_size:,.0f}'),
+]
+
+# Scope -> (label, format) lines of its reports; formats name metrics of the store
+REPORT_LINES = {
+    'overall': _TOTAL_LINES + [
+        ('Leading Region', '{top_region} (${top_region_revenue:,.0f})'),
+        ('Top Sales Representative', '{top_rep} (${top_rep_revenue:,.0f})'),
+        ('Peak Sales Day', '{best_day} (${best_day_revenue:,.0f})'),
+        ('Sales Pattern', '{sales_pattern}'),
+    ],
+    'region': _TOTAL_LINES + [
+        ('Share of Revenue', '{revenue_share:.1%}'),
+        ('Revenue Rank', '{rank} of {ranked}'),
+        ('Top Sales Representative', '{top_rep} (${top_rep_revenue:,.0f})'),
+        ('Top Product', '{top_product} (${top_product_revenue:,.0f})'),
+    ],
+    'sales_rep': _TOTAL_LINES + [
+        ('Share of Revenue', '{revenue_share:.1%}'),
+        ('Revenue Rank', '{rank} of {ranked}'),
+        ('Primary Region', '{top_region} (${top_region_revenue:,.0f})'),
+        ('Top Product', '{top_product} (${top_product_revenue:,.0f})'),
+    ],
+    'month': _TOTAL_LINES + [
+        ('Share of Revenue', '{revenue_share:.1%}'),
+        ('Peak Sales Day', '{best_day} (${best_day_revenue:,.0f})'),
+        ('Active Sales Days', '{active_days:,}'),
+        ('Sales Pattern', '{sales_pattern}'),
+    ],
+}
+
+_TEXT_HEADER = '{title}\n' + '=' * 60 + '\n{scope_label}\n\n'
+_HTML_HEADER = ('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8">'
+                '<title>{title} - {scope_label}</title></head>\n<body>\n'
+                '<h1>{title}</h1>\n<h2>{scope_label}</h2>\n<table>\n')
+_HTML_FOOTER = '</table>\n</body>\n</html>\n'
+
+
+class CompiledTemplate:
+    """
+    A `str.format` template parsed once into literal and field segments.
+
+    Rendering skips the parsing `str.format` repeats on every call. Fields
+    are plain names looked up in the context; a None value renders as
+    'n/a' whatever its format spec.
+    """
+
+    _formatter = string.Formatter()
+
+    def __init__(self, source):
+        self.source = source
+        self.segments = [(literal, field, spec or '')
+                         for literal, field, spec, _ in self._formatter.parse(source)]
+
+    def render(self, context):
+        parts = []
+        for literal, field, spec in self.segments:
+            parts.append(literal)
+            if field is not None:
+                value = context[field]
+                parts.append('n/a' if value is None else format(value, spec))
+        return ''.join(parts)
+
+
+def _compile_templates():
+    templates = {}
+    for scope, lines in REPORT_LINES.items():
+        text = _TEXT_HEADER + ''.join(f'• {label}: {line}\n' for label, line in lines)
+        page = (_HTML_HEADER
+                + ''.join(f'<tr><th>{html.escape(label)}</th><td>{line}</td></tr>\n'
+                          for label, line in lines)
+                + _HTML_FOOTER)
+        templates[scope] = {'text': CompiledTemplate(text), 'html': CompiledTemplate(page)}
+    return templates
+
+
+REPORT_TEMPLATES = _compile_templates()
+
+
+def _column_values(values):
+    """A metrics column as plain Python values for templates and JSON; missing values become None."""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        values = values.dt.strftime('%Y-%m-%d')
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _labelled(index):
+    """Mask of index entries without a missing (blank dimension) label."""
+    if isinstance(index, pd.MultiIndex):
+        return index.to_frame().notna().all(axis=1).to_numpy()
+    return index.notna()
+
+
+def _sales_pattern(std, mean):
+    if std is None or mean is None or pd.isna(std) or pd.isna(mean):
+        return None
+    return ('Consistent performance' if std < mean * CONSISTENCY_THRESHOLD
+            else 'Variable daily performance')
+
+
+def _cube_dimensions(breakdowns):
+    """Dimensions of the finest breakdown, in cube order."""
+    return max(breakdowns, key=len)
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(value)).strip('-').lower() or 'blank'
+
+
+class MetricsStore:
+    """
+    Every report metric, computed once from the aggregated results.
+
+    Parameters
+    ----------
+    results : dict
+        `SalesAggregator.finalize` output, e.g. as returned by
+        `sales_pipeline.run_pipeline`.
+
+    Examples
+    --------
+    >>> store = MetricsStore(results)
+    >>> store.metrics('region', 'West')['revenue']
+    24100.0
+    """
+
+    def __init__(self, results):
+        self.total_revenue = float(results['total_revenue'])
+        self.records = {'overall': self._overall_metrics(results)}
+        breakdowns = results['breakdowns']
+        for scope, dimension in _SCOPE_DIMENSIONS.items():
+            if (dimension,) in breakdowns:
+                self.records[scope] = self._dimension_metrics(breakdowns, dimension)
+        self.records['month'] = self._month_metrics(results)
+
+    def scopes(self):
+        """Scopes with at least one report."""
+        return [scope for scope in REPORT_SCOPES if self.records.get(scope)]
+
+    def keys(self, scope):
+        """Scope values (regions, reps, months) with a report."""
+        return list(self.records.get(scope, {}))
+
+    def metrics(self, scope, key):
+        """The metrics dict of one report."""
+        return self.records[scope][key]
+
+    def _records(self, scope, table):
+        """One metrics dict per row of `table`, keyed by the row's scope value."""
+        label = _SCOPE_LABELS[scope]
+        names = list(table.columns) + ['title', 'scope', 'scope_value', 'scope_label']
+        # Converted a column at a time; per-row access would dominate for many reps
+        columns = [_column_values(table[name]) for name in table.columns]
+        records = {}
+        for key, row in zip(table.index, zip(*columns)):
+            key = str(key)
+            scope_label = label if scope == 'overall' else f'{label}: {key}'
+            records[key] = dict(zip(names, row + (REPORT_TITLE, scope, key, scope_label)))
+        return records
+
+    def _totals(self, frame):
+        """Revenue, deals, transactions and average deal size columns of a breakdown."""
+        return pd.DataFrame({
+            'revenue': frame['Revenue'],
+            'deals': frame['Deals Closed'],
+            'transactions': frame['Transactions'],
+            'avg_deal_size': frame['Revenue'] / frame['Deals Closed'].replace(0, float('nan')),
+        })
+
+    def _overall_metrics(self, results):
+        rankings = results['rankings']
+        daily_revenue = results['daily_revenue']
+        values = self._totals(results['breakdowns'][()]).astype(object).iloc[0].to_dict()
+        for prefix, dimension in (('top_region', 'Region'), ('top_rep', 'Sales Rep'),
+                                  ('best_day', 'Date')):
+            top = rankings.get(dimension, {}).get('top')
+            has_top = top is not None and len(top)
+            values[prefix] = top.index[0] if has_top else None
+            values[f'{prefix}_revenue'] = top.iloc[0] if has_top else None
+        values['sales_pattern'] = _sales_pattern(daily_revenue.std(), daily_revenue.mean())
+        return self._records('overall', pd.DataFrame([values], index=['all']))
+
+    def _top_within(self, breakdowns, group, other, prefix):
+        """Best `other` value by revenue within each `group` value, with its revenue."""
+        combo = tuple(d for d in _cube_dimensions(breakdowns) if d in (group, other))
+        if len(combo) != 2 or combo not in breakdowns:
+            return None
+        revenue = breakdowns[combo]['Revenue']
+        revenue = revenue[_labelled(revenue.index)]
+        best = revenue.groupby(level=group, observed=True).idxmax()
+        position = combo.index(other)
+        return pd.DataFrame({
+            prefix: [key[position] for key in best],
+            f'{prefix}_revenue': revenue.loc[list(best)].to_numpy(),
+        }, index=best.index)
+
+    def _dimension_metrics(self, breakdowns, dimension):
+        frame = breakdowns[(dimension,)]
+        frame = frame[_labelled(frame.index)]
+        table = self._totals(frame)
+        table['revenue_share'] = table['revenue'] / self.total_revenue if self.total_revenue else None
+        table['rank'] = table['revenue'].rank(ascending=False, method='min').astype('int64')
+        table['ranked'] = len(table)
+        others = {'Region': [('Sales Rep', 'top_rep'), ('Product', 'top_product')],
+                  'Sales Rep': [('Region', 'top_region'), ('Product', 'top_product')]}
+        for other, prefix in others[dimension]:
+            best = self._top_within(breakdowns, dimension, other, prefix)
+            if best is None:
+                table[prefix] = None
+                table[f'{prefix}_revenue'] = None
+            else:
+                table = table.join(best)
+        scope = next(s for s, d in _SCOPE_DIMENSIONS.items() if d == dimension)
+        return self._records(scope, table)
+
+    def _month_metrics(self, results):
+        monthly = results['time_series']['monthly']
+        table = self._totals(monthly)
+        table['revenue_share'] = table['revenue'] / self.total_revenue if self.total_revenue else None
+
+        daily_revenue = results['daily_revenue']
+        by_month = daily_revenue.groupby(daily_revenue.index.to_period('M'))
+        table['best_day'] = by_month.idxmax()
+        table['best_day_revenue'] = by_month.max()
+        table['active_days'] = by_month.size()
+        spread = pd.DataFrame({'std': by_month.std(), 'mean': by_month.mean()})
+        table['sales_pattern'] = [_sales_pattern(std, mean)
+                                  for std, mean in spread.reindex(table.index).itertuples(index=False)]
+        table = table[table['transactions'] > 0]
+        table['active_days'] = table['active_days'].fillna(0).astype('int64')
+        return self._records('month', table)
+
+
+def render_report(metrics, report_format):
+    """Render one report's `metrics` as text, JSON or HTML."""
+    if report_format == 'json':
+        return json.dumps(metrics, indent=2)
+    templates = REPORT_TEMPLATES[metrics['scope']]
+    if report_format == 'html':
+        return templates['html'].render(
+            {name: html.escape(value) if isinstance(value, str) else value
+             for name, value in metrics.items()})
+    return templates['text'].render(metrics)
+
+
+def write_reports(store, output_dir=DEFAULT_REPORT_DIR, scopes=None, formats=('text',),
+                  max_workers=None):
+    """
+    Render and write the reports of `scopes` in every one of `formats`.
+
+    Parameters
+    ----------
+    store : MetricsStore
+        Precomputed metrics.
+    output_dir : str
+        Directory the report files are written to; created if missing.
+    scopes : list of str, optional
+        Any of `REPORT_SCOPES`; every scope with data when omitted.
+    formats : sequence of str
+        Any of `REPORT_FORMATS`.
+    max_workers : int, optional
+        Threads rendering and writing reports; the `ThreadPoolExecutor`
+        default when omitted.
+
+    Returns
+    -------
+    dict
+        Scope -> list of written paths.
+    """
+    unknown = [scope for scope in (scopes or []) if scope not in REPORT_SCOPES]
+    unknown += [f for f in formats if f not in REPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown report scope or format(s) {', '.join(unknown)}. "
+                         f"Options: {', '.join(REPORT_SCOPES + REPORT_FORMATS)}")
+    scopes = [scope for scope in (scopes or REPORT_SCOPES) if scope in store.scopes()]
+    os.makedirs(output_dir, exist_ok=True)
+
+    # File names are fixed up front so scope values slugging alike never collide
+    tasks, names = [], set()
+    for scope in scopes:
+        for key in store.keys(scope):
+            name = f'{scope}-{_slug(key)}'
+            suffix = 1
+            while name in names:
+                suffix += 1
+                name = f'{scope}-{_slug(key)}-{suffix}'
+            names.add(name)
+            tasks.append((scope, key, os.path.join(output_dir, name)))
+
+    def write(task):
+        scope, key, stem = task
+        metrics = store.metrics(scope, key)
+        paths = []
+        for report_format in formats:
+            path = f'{stem}.{REPORT_EXTENSIONS[report_format]}'
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(render_report(metrics, report_format))
+            paths.append(path)
+        return scope, paths
+
+    written = {scope: [] for scope in scopes}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for scope, paths in pool.map(write, tasks):
+            written[scope].extend(paths)
+    return written
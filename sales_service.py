@@ -0,0 +1,477 @@
+"""
+Analysis Service
+================
+
+A long-running local HTTP service that keeps cleaned sales datasets warm in
+memory, for dashboards that refresh far more often than new data arrives.
+
+Each named dataset holds the `SalesAggregator` and `SalesQueryCube` states
+of every input ingested into it. Inputs are cleaned in a process pool, one
+task per input, by the `ingest` callable the service is started with; only
+their mergeable states come back, so a new delivery is folded in without
+re-reading earlier ones. Ingestion into one dataset is serialized, and the
+merged state replaces the old one only once complete, so queries always see
+a consistent snapshot. Rows replayed by a later input are only dropped with a
+persisted fingerprint index (`performance_config.dedup_index_path`).
+
+Queries are rolled up from the warm query cube in a thread pool, keeping the
+asyncio event loop free to accept connections, and repeated queries are
+answered from an LRU cache of serialized responses. Ingesting into a dataset
+invalidates its cached responses.
+
+Endpoints (JSON):
+
+- ``GET /health``
+- ``GET /datasets``
+- ``POST /datasets/<name>/ingest`` with body ``{"input": "<path or URL>"}``
+- ``GET /datasets/<name>/summary``
+- ``GET /datasets/<name>/query?group_by=Region&start=2025-01-01&end=2025-01-31&product=Enterprise``
+
+Query parameters are ``group_by`` (comma-separated `QUERY_KEYS`),
+``start`` and ``end`` (first and last day included), ``period`` (one of
+`QUERY_PERIODS`, bucketing Date when grouped by it) and any breakdown
+dimension as a filter with comma-separated values. Dimensions may be written
+as in the data ('Sales Rep') or in snake case ('sales_rep').
+
+Serves on TCP ``host:port`` from `service_config` in analysis_config.yaml,
+or on a Unix socket when ``unix_socket`` is set.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, unquote
+
+import pandas as pd
+
+from sales_aggregation import QUERY_KEYS, QUERY_PERIODS, SalesAggregator, SalesQueryCube
+from sales_cleaning import merge_cleaning_stats, new_cleaning_stats
+from sales_rankings import format_entries
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_DATASET = 'default'
+DEFAULT_RESULT_CACHE_SIZE = 256
+
+# Tries of one ingest when a worker process dies, each on a fresh pool
+INGEST_ATTEMPTS = 2
+
+QUERY_PARAMETERS = ('group_by', 'start', 'end', 'period')
+
+# Dimension names as written in the data or in snake case -> canonical name
+_DIMENSION_NAMES = {name.lower().replace(' ', '_'): name for name in QUERY_KEYS}
+
+_STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                   405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class QueryResultCache:
+    """
+    LRU cache of serialized query responses.
+
+    Keys start with the dataset name, so all of a dataset's entries can be
+    dropped when data is ingested into it.
+    """
+
+    def __init__(self, max_entries=DEFAULT_RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the cached response for `key` and mark it recently used, or None."""
+        response = self.entries.get(key)
+        if response is not None:
+            self.entries.move_to_end(key)
+        return response
+
+    def put(self, key, response):
+        self.entries[key] = response
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, dataset):
+        """Drop every cached response of `dataset`."""
+        for key in [key for key in self.entries if key[0] == dataset]:
+            del self.entries[key]
+
+
+class WarmDataset:
+    """The merged state of every input ingested into one named dataset."""
+
+    def __init__(self, name):
+        self.name = name
+        self.aggregator = SalesAggregator()
+        self.query_cube = SalesQueryCube()
+        self.cleaning_stats = new_cleaning_stats()
+        self.inputs = []
+        self.generation = 0
+        self.ingested_at = None
+
+    def merged(self, input_path, state):
+        """
+        Return a new dataset with an ingested input's `state` folded in.
+
+        This dataset is left unchanged, so queries running against it are
+        unaffected.
+        """
+        dataset = WarmDataset(self.name)
+        dataset.aggregator.merge(self.aggregator).merge(state['aggregator'])
+        dataset.query_cube.merge(self.query_cube).merge(state['query_cube'])
+        merge_cleaning_stats(dataset.cleaning_stats, self.cleaning_stats)
+        merge_cleaning_stats(dataset.cleaning_stats, state['cleaning_stats'])
+        dataset.inputs = self.inputs + [input_path]
+        dataset.generation = self.generation + 1
+        dataset.ingested_at = time.time()
+        return dataset
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'inputs': self.inputs,
+            'generation': self.generation,
+            'rows_clean': self.cleaning_stats['rows_clean'],
+            'ingested_at': self.ingested_at,
+        }
+
+
+def _dimension(name):
+    canonical = _DIMENSION_NAMES.get(name.strip().lower().replace(' ', '_'))
+    if canonical is None:
+        raise ValueError(f"Unknown dimension '{name}'. Options: {', '.join(QUERY_KEYS)}")
+    return canonical
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_query(query_string):
+    """
+    Turn a query string into `SalesQueryCube.query` arguments.
+
+    Returns
+    -------
+    dict
+        ``group_by``, ``start``, ``end``, ``period`` and ``filters``, with
+        dates normalized to ISO days and filter values sorted, so equal
+        queries have equal cache keys.
+    """
+    arguments = {'group_by': (), 'start': None, 'end': None, 'period': None, 'filters': {}}
+    for name, values in parse_qs(query_string, keep_blank_values=True).items():
+        value = ','.join(values)
+        if name == 'group_by':
+            arguments['group_by'] = tuple(_dimension(key) for key in _split(value))
+        elif name in ('start', 'end'):
+            arguments[name] = pd.Timestamp(value).strftime('%Y-%m-%d') if value else None
+        elif name == 'period':
+            if value not in QUERY_PERIODS:
+                raise ValueError(f"Unknown query period '{value}'. "
+                                 f"Options: {', '.join(QUERY_PERIODS)}")
+            arguments['period'] = value
+        else:
+            try:
+                dimension = _dimension(name)
+            except ValueError:
+                raise ValueError(f"Unknown query parameter '{name}'. Options: "
+                                 f"{', '.join(QUERY_PARAMETERS + tuple(QUERY_KEYS[1:]))}"
+                                 ) from None
+            if dimension == QUERY_KEYS[0]:
+                raise ValueError("Filter dates with 'start' and 'end'")
+            arguments['filters'][dimension] = tuple(sorted(_split(value)))
+    return arguments
+
+
+def _query_payload(dataset, arguments):
+    """Run one query against `dataset` and serialize the result."""
+    frame = dataset.query_cube.query(arguments['group_by'], arguments['start'],
+                                     arguments['end'], arguments['filters'],
+                                     arguments['period'])
+    frame = frame.reset_index(drop=not arguments['group_by'])
+    for key in arguments['group_by']:
+        column = frame[key]
+        frame[key] = (column.dt.strftime('%Y-%m-%d')
+                      if pd.api.types.is_datetime64_any_dtype(column) else column.astype(str))
+    result = json.loads(frame.to_json(orient='split', index=False))
+    return _encode({'dataset': dataset.name, 'generation': dataset.generation,
+                    'columns': result['columns'], 'rows': result['data']})
+
+
+def _summary_payload(dataset):
+    results = dataset.aggregator.finalize()
+    rankings = results['rankings']
+    return _encode({
+        'dataset': dataset.name,
+        'generation': dataset.generation,
+        'total_revenue': float(results['total_revenue']),
+        'total_deals': int(results['total_deals']),
+        'regional_revenue': {str(region): float(revenue)
+                             for region, revenue in results['regional_revenue'].items()},
+        'top_sales_reps': (format_entries(rankings['Sales Rep']['top'])
+                           if 'Sales Rep' in rankings else None),
+        'cleaning_stats': {key: int(value) for key, value in dataset.cleaning_stats.items()},
+    })
+
+
+def _encode(payload):
+    return json.dumps(payload).encode('utf-8')
+
+
+class _HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SalesService:
+    """
+    Warm sales datasets behind a local HTTP API.
+
+    Parameters
+    ----------
+    config : dict
+        Parsed analysis_config.yaml; `service_config` sets the listening
+        address, pool sizes and result cache size, and the rest is passed
+        to `ingest`.
+    ingest : callable
+        ``ingest(input_path, config)`` run in a worker process, returning a
+        dict with the input's ``aggregator``, ``query_cube`` and
+        ``cleaning_stats``. Must be picklable, i.e. a module-level function.
+    """
+
+    def __init__(self, config, ingest):
+        self.config = config
+        self.ingest_function = ingest
+        self.options = config.get('service_config', {})
+        self.datasets = {}
+        self.cache = QueryResultCache(
+            self.options.get('result_cache_size') or DEFAULT_RESULT_CACHE_SIZE)
+        self.query_pool = ThreadPoolExecutor(self.options.get('query_workers'))
+        self.ingest_pool = self._new_ingest_pool()
+        self._ingest_locks = {}
+        # Cache key -> future of a response being built, shared by identical requests
+        self._building = {}
+
+    def _new_ingest_pool(self):
+        # Spawned workers: forking after query threads start is unsafe
+        return ProcessPoolExecutor(self.options.get('ingest_workers'),
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    async def _run_ingest(self, input_path):
+        """
+        Run the ingest function in a worker process.
+
+        A worker that dies (e.g. killed for running out of memory) breaks the
+        whole pool, so the pool is replaced and the input retried once on the
+        fresh pool; an input that kills its worker again fails this ingest
+        only, leaving a working pool for the next one.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(INGEST_ATTEMPTS):
+            pool = self.ingest_pool
+            try:
+                return await loop.run_in_executor(pool, self.ingest_function,
+                                                  input_path, self.config)
+            except BrokenProcessPool:
+                # Concurrent ingests share the broken pool; replace it once
+                if self.ingest_pool is pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.ingest_pool = self._new_ingest_pool()
+                if attempt == INGEST_ATTEMPTS - 1:
+                    raise
+
+    def _dataset(self, name):
+        dataset = self.datasets.get(name)
+        if dataset is None:
+            raise _HttpError(404, f"Unknown dataset '{name}'. "
+                                  f"Options: {', '.join(self.datasets) or 'none loaded'}")
+        return dataset
+
+    async def ingest(self, name, input_path):
+        """Clean `input_path` in a worker process and fold it into dataset `name`."""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        lock = self._ingest_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            state = await self._run_ingest(input_path)
+            current = self.datasets.get(name) or WarmDataset(name)
+            dataset = await loop.run_in_executor(self.query_pool, current.merged,
+                                                 input_path, state)
+            self.datasets[name] = dataset
+            self.cache.invalidate(name)
+        seconds = time.perf_counter() - started
+        print(f"Ingested '{input_path}' into dataset '{name}': "
+              f"{state['cleaning_stats']['rows_clean']:,} clean row(s) in {seconds:.2f} s")
+        return dict(dataset.describe(), seconds=seconds)
+
+    async def _cached(self, key, dataset, build, *args):
+        """
+        Serve `key` from the result cache, or build it in the query pool.
+
+        Identical requests arriving while a response is built wait for that
+        build rather than starting their own.
+        """
+        response = self.cache.get(key)
+        if response is not None:
+            return response, True
+        building = self._building.get(key)
+        if building is not None:
+            return await asyncio.shield(building), True
+
+        building = asyncio.get_running_loop().run_in_executor(
+            self.query_pool, build, dataset, *args)
+        self._building[key] = building
+        try:
+            response = await asyncio.shield(building)
+        finally:
+            self._building.pop(key, None)
+        # Results of a dataset replaced meanwhile are served but not cached
+        if self.datasets.get(dataset.name) is dataset:
+            self.cache.put(key, response)
+        return response, False
+
+    async def query(self, name, query_string):
+        """Return ``(json bytes, cache hit)`` for a query of dataset `name`."""
+        dataset = self._dataset(name)
+        arguments = parse_query(query_string)
+        key = (name, dataset.generation, 'query', arguments['group_by'], arguments['start'],
+               arguments['end'], arguments['period'], tuple(sorted(arguments['filters'].items())))
+        return await self._cached(key, dataset, _query_payload, arguments)
+
+    async def summary(self, name):
+        """Return ``(json bytes, cache hit)`` for the headline totals of dataset `name`."""
+        dataset = self._dataset(name)
+        return await self._cached((name, dataset.generation, 'summary'), dataset,
+                                  _summary_payload)
+
+    async def _route(self, method, target, body):
+        """Return ``(status, json bytes, cache hit)`` for one request."""
+        path, _, query_string = target.partition('?')
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['health']:
+            self._require_method(method, 'GET')
+            return 200, _encode({'status': 'ok', 'datasets': len(self.datasets)}), False
+        if parts == ['datasets']:
+            self._require_method(method, 'GET')
+            return 200, _encode([dataset.describe() for dataset in self.datasets.values()]), False
+        if len(parts) == 3 and parts[0] == 'datasets':
+            name, action = parts[1], parts[2]
+            if action == 'ingest':
+                self._require_method(method, 'POST')
+                try:
+                    input_path = json.loads(body or b'{}')['input']
+                except (ValueError, KeyError, TypeError):
+                    raise _HttpError(400, 'Ingest requests need a JSON body {"input": "<path>"}')
+                return 200, _encode(await self.ingest(name, input_path)), False
+            if action == 'query':
+                self._require_method(method, 'GET')
+                return (200, *await self.query(name, query_string))
+            if action == 'summary':
+                self._require_method(method, 'GET')
+                return (200, *await self.summary(name))
+        raise _HttpError(404, f"No endpoint at '{path}'")
+
+    @staticmethod
+    def _require_method(method, allowed):
+        if method != allowed:
+            raise _HttpError(405, f"Use {allowed} for this endpoint")
+
+    async def _respond(self, method, target, body):
+        try:
+            return await self._route(method, target, body)
+        except _HttpError as exc:
+            status, message = exc.status, str(exc)
+        except FileNotFoundError as exc:
+            status, message = 404, str(exc)
+        except ValueError as exc:
+            status, message = 400, str(exc)
+        except Exception as exc:
+            status, message = 500, f"{type(exc).__name__}: {exc}"
+        return status, _encode({'error': message}), False
+
+    async def _handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    writer.write(_response(400, _encode({'error': 'Malformed request line'}),
+                                           False, False))
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    header, _, value = line.decode('latin-1').partition(':')
+                    headers[header.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+
+                status, payload, cache_hit = await self._respond(method, target, body)
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                writer.write(_response(status, payload, cache_hit, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, preload=None):
+        """
+        Ingest the `preload` inputs ({dataset: [inputs]}), then serve until
+        cancelled.
+        """
+        for name, inputs in (preload or {}).items():
+            for input_path in inputs:
+                await self.ingest(name, input_path)
+
+        unix_socket = self.options.get('unix_socket')
+        if unix_socket:
+            server = await asyncio.start_unix_server(self._handle_connection, unix_socket)
+            address = f"unix:{unix_socket}"
+        else:
+            host = self.options.get('host') or DEFAULT_HOST
+            port = self.options.get('port') or DEFAULT_PORT
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            address = f"http://{host}:{server.sockets[0].getsockname()[1]}"
+        print(f"Analysis service listening on {address}")
+        async with server:
+            await server.serve_forever()
+
+    def serve(self, preload=None):
+        """Run the service in this thread until interrupted (Ctrl+C)."""
+        try:
+            asyncio.run(self.run(preload))
+        except KeyboardInterrupt:
+            print("Analysis service stopped")
+        finally:
+            self.close()
+
+    def close(self):
+        self.query_pool.shutdown(wait=False, cancel_futures=True)
+        self.ingest_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _response(status, payload, cache_hit, keep_alive):
+    headers = [
+        f"HTTP/1.1 {status} {_STATUS_REASONS[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+        f"X-Cache: {'hit' if cache_hit else 'miss'}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + payload
@@ -0,0 +1,326 @@
+"""
+Database Ingestion
+==================
+
+Sales rows from a SQL database - PostgreSQL, MySQL, SQLite or anything
+else SQLAlchemy connects to - driven by `file_format_config.database` in
+analysis_config.yaml:
+
+- ``table``: table or view holding the sales rows (``schema.table`` for a
+  non-default schema). Its columns are mapped onto the sales schema like
+  a CSV header.
+- ``fetch_rows``: rows per batch fetched from a server-side cursor.
+- ``pool_size`` / ``max_overflow``: the engine's connection pool, shared by
+  every read of the same URL within the process.
+- ``pushdown``: let the database do the work where the cleaning rules allow.
+
+With pushdown, missing Dates, the ``drop`` / ``fill_zero`` missing-value
+rules, the negative-revenue filter and deduplication (SELECT DISTINCT over
+the mapped columns) run in SQL, as do the Region/Sales Rep/Product/Customer
+Type sums, the per-Date sums and the Revenue / Deals Closed co-moments
+behind Steps 3-5. Only those aggregates and a few counts for the cleaning
+summary cross the wire. Rules that need row-level data - outlier
+detection, a persisted fingerprint index, ``interpolate`` / ``fill_mean``
+when values are actually missing - fall back to streaming the rows, still
+filtered and deduplicated in SQL when the missing-value rule does not
+depend on the rows removed.
+
+Requires `sqlalchemy` plus the database's driver (psycopg2, pymysql; SQLite
+needs none), so a local SQLite file stands in for production databases.
+"""
+
+import re
+
+import pandas as pd
+
+from sales_aggregation import SUMMARY_VALUES, SalesAggregator, SalesQueryCube
+from sales_breakdown import BREAKDOWN_DIMENSIONS, CORRELATION_VALUES, moments_from_sums
+from sales_cleaning import merge_cleaning_stats, new_cleaning_stats
+from sales_ingestion import SALES_COLUMNS, coerce_sales_dtypes
+from sales_missing import MISSING_VALUE_COLUMNS
+
+DATABASE_SCHEMES = ('postgresql', 'postgres', 'mysql', 'mariadb', 'sqlite', 'mssql', 'oracle')
+
+DEFAULT_DATABASE_TABLE = 'sales'
+DEFAULT_FETCH_ROWS = 50_000
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+
+# Missing-value rules that repair each row on its own, so rows removed
+# before them (negative revenue, duplicates) cannot change their result
+ROW_LOCAL_STRATEGIES = (None, 'drop', 'fill_zero')
+
+_URL = re.compile(r'^([a-z][a-z0-9]*)(\+[a-z0-9_]+)?://', re.IGNORECASE)
+
+# Engines by URL, so repeated reads in one process share a connection pool
+_ENGINES = {}
+
+
+def _require_sqlalchemy():
+    try:
+        import sqlalchemy
+    except ImportError as exc:
+        raise ImportError(
+            "Reading from a database requires SQLAlchemy. Install it with "
+            "'pip install sqlalchemy' (plus psycopg2-binary or pymysql for "
+            "PostgreSQL or MySQL)."
+        ) from exc
+    return sqlalchemy
+
+
+def is_database_url(value):
+    """Return True if `value` is a database URL such as 'postgresql://...'."""
+    match = _URL.match(str(value))
+    return bool(match) and match.group(1).lower() in DATABASE_SCHEMES
+
+
+def _database_options(config):
+    return (config or {}).get('file_format_config', {}).get('database', {})
+
+
+def get_engine(url, options=None):
+    """Return the pooled engine for `url`, creating it on first use."""
+    if url not in _ENGINES:
+        sa = _require_sqlalchemy()
+        options = options or {}
+        pool_options = {}
+        # SQLite's default pools take no size
+        if not url.lower().startswith('sqlite'):
+            pool_options = {
+                'pool_size': options.get('pool_size') or DEFAULT_POOL_SIZE,
+                'max_overflow': options.get('max_overflow', DEFAULT_MAX_OVERFLOW),
+            }
+        _ENGINES[url] = sa.create_engine(url, pool_pre_ping=True, **pool_options)
+    return _ENGINES[url]
+
+
+def dispose_engines():
+    """Close every pooled connection, e.g. before forking worker processes."""
+    while _ENGINES:
+        _ENGINES.popitem()[1].dispose()
+
+
+class SqlSalesSource:
+    """
+    One sales table in a database, mapped onto the sales schema.
+
+    Parameters
+    ----------
+    url : str
+        SQLAlchemy database URL, e.g. ``postgresql://user@host/db`` or
+        ``sqlite:///sales.db``.
+    table : str, optional
+        Table or view name; defaults to ``file_format_config.database.table``.
+    mapper : schema_mapper.SchemaMapper, optional
+        Resolves the table's column names to canonical columns.
+    config : dict, optional
+        Parsed analysis_config.yaml; the bundled file is loaded when omitted.
+    """
+
+    def __init__(self, url, table=None, mapper=None, config=None):
+        sa = _require_sqlalchemy()
+        if config is None:
+            from sales_config import load_config
+            config = load_config()
+        if mapper is None:
+            from schema_mapper import SchemaMapper
+            mapper = SchemaMapper(config)
+        self.options = _database_options(config)
+        self.engine = get_engine(url, self.options)
+        self.table_name = table or self.options.get('table') or DEFAULT_DATABASE_TABLE
+        schema, _, name = self.table_name.rpartition('.')
+        self.table = sa.Table(name, sa.MetaData(), schema=schema or None,
+                              autoload_with=self.engine)
+
+        self.mapping = mapper.map_columns([column.name for column in self.table.columns])
+        if self.mapping['missing_required']:
+            raise ValueError(f"No column of table '{self.table_name}' matches required "
+                             f"column(s): {', '.join(self.mapping['missing_required'])}")
+        columns = {canonical: self.table.c[name] for name, canonical in self.mapping['rename'].items()}
+        self.columns = {column: columns[column] for column in SALES_COLUMNS if column in columns}
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def _scalar(self, query):
+        with self.engine.connect() as connection:
+            return connection.execute(query).scalar() or 0
+
+    def _count(self, selectable):
+        sa = _require_sqlalchemy()
+        return self._scalar(sa.select(sa.func.count()).select_from(selectable.subquery()))
+
+    def _has_missing_values(self):
+        """True if a dated row lacks a value the missing-value rule repairs."""
+        sa = _require_sqlalchemy()
+        missing = [self.columns[c].is_(None) for c in MISSING_VALUE_COLUMNS if c in self.columns]
+        return bool(self._count(sa.select(self.table).where(
+            self.columns['Date'].is_not(None), sa.or_(*missing))))
+
+    def filters_pushable(self, strategy):
+        """Whether the negative-revenue filter and dedup can run in SQL under `strategy`."""
+        return strategy in ROW_LOCAL_STRATEGIES or not self._has_missing_values()
+
+    def aggregation_blocker(self, cleaning_rules, dedup_index_path=None):
+        """
+        Return why Steps 2-5 cannot be pushed down to the database, or None
+        if they can.
+        """
+        if not self.options.get('pushdown', True):
+            return "pushdown disabled in file_format_config.database"
+        if cleaning_rules.get('outlier_detection', 'none') not in (None, 'none'):
+            return "outlier detection needs row-level data"
+        if dedup_index_path:
+            return "the persisted fingerprint index needs row-level data"
+        if not all(value in self.columns for value in SUMMARY_VALUES):
+            return f"the table has no {' / '.join(SUMMARY_VALUES)} column"
+        if not self.filters_pushable(cleaning_rules.get('handle_missing_values')):
+            return "missing values need row-level repair"
+        return None
+
+    def _repaired(self, strategy):
+        """The mapped columns under canonical names, after the SQL-side missing-value rule."""
+        sa = _require_sqlalchemy()
+        selected = []
+        for name, column in self.columns.items():
+            if strategy == 'fill_zero' and name in MISSING_VALUE_COLUMNS:
+                column = sa.func.coalesce(column, 0)
+            selected.append(column.label(name))
+        query = sa.select(*selected)
+        if strategy:
+            # Rows without a Date are dropped by every missing-value rule
+            query = query.where(self.columns['Date'].is_not(None))
+        else:
+            # Without a missing-value rule, rows without revenue are dropped as missing
+            query = query.where(self.columns['Revenue'].is_not(None))
+        if strategy == 'drop':
+            query = query.where(*[self.columns[c].is_not(None)
+                                  for c in MISSING_VALUE_COLUMNS if c in self.columns])
+        return query
+
+    def _cleaned(self, strategy):
+        """Non-negative revenue, distinct rows of `_repaired`."""
+        repaired = self._repaired(strategy).subquery('repaired')
+        return (_require_sqlalchemy().select(*repaired.c)
+                .where(repaired.c['Revenue'] >= 0).distinct())
+
+    def pushed_stats(self, strategy, clean=None):
+        """
+        Cleaning counters for the rules run in SQL by `_cleaned`.
+
+        ``rows_read`` counts the rows removed in SQL, so adding these to the
+        counters of the pipeline that cleans the remaining rows gives the
+        totals of the whole table. Pass the number of `clean` rows when it
+        is known, to save counting them again.
+        """
+        sa = _require_sqlalchemy()
+        rows = self._count(sa.select(self.table))
+        repaired = self._count(self._repaired(strategy))
+        repaired_query = self._repaired(strategy).subquery('repaired')
+        non_negative = self._count(sa.select(repaired_query).where(repaired_query.c['Revenue'] >= 0))
+        if clean is None:
+            clean = self._count(self._cleaned(strategy))
+        filled = 0
+        if strategy == 'fill_zero':
+            dated = self.columns['Date'].is_not(None)
+            filled = sum(self._count(sa.select(self.table).where(dated, self.columns[c].is_(None)))
+                         for c in MISSING_VALUE_COLUMNS if c in self.columns)
+        return {
+            'rows_read': rows - clean,
+            'missing_values_filled': filled,
+            'missing_rows_dropped': rows - repaired,
+            'negative_revenue_removed': repaired - non_negative,
+            'duplicates_removed': non_negative - clean,
+        }
+
+    def read_chunks(self, chunksize=None, strategy=None, push_filters=False):
+        """
+        Stream the table as typed DataFrame chunks from a server-side cursor.
+
+        With `push_filters`, rows are missing-value repaired (where the rule
+        allows), filtered and deduplicated in SQL first; see `pushed_stats`
+        for the counters of what was removed. Rows come in Date order for
+        ``interpolate``, which needs each rep's series in time order.
+        """
+        chunksize = chunksize or self.options.get('fetch_rows') or DEFAULT_FETCH_ROWS
+        if push_filters:
+            query = self._cleaned(strategy)
+        else:
+            query = _require_sqlalchemy().select(
+                *[column.label(name) for name, column in self.columns.items()])
+        if strategy == 'interpolate':
+            query = query.order_by('Date')
+        with self.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(query)
+            names = list(result.keys())
+            for rows in result.partitions(chunksize):
+                yield coerce_sales_dtypes(pd.DataFrame.from_records(rows, columns=names))
+
+    def _group_sums(self, connection, cleaned, keys):
+        """Count, sum, min and max of `SUMMARY_VALUES` per `keys`, as a state frame."""
+        sa = _require_sqlalchemy()
+        aggregates = [sa.func.count().label('count')]
+        for value in SUMMARY_VALUES:
+            column = cleaned.c[value]
+            aggregates += [sa.func.sum(column).label(f'{value} sum'),
+                           sa.func.min(column).label(f'{value} min'),
+                           sa.func.max(column).label(f'{value} max')]
+        key_columns = [cleaned.c[key] for key in keys]
+        result = connection.execute(sa.select(*key_columns, *aggregates).group_by(*key_columns))
+        state = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+        # Drivers return NUMERIC sums as Decimal
+        values = {column: pd.to_numeric(state[column]) for column in state.columns
+                  if column not in keys}
+        return state.assign(**values).set_index(keys)
+
+    def _moments(self, connection, cleaned):
+        sa = _require_sqlalchemy()
+        values = [sa.cast(cleaned.c[value], sa.Float) for value in CORRELATION_VALUES]
+        sums = [sa.func.sum(value) for value in values]
+        products = [sa.func.sum(left * right) for left in values for right in values]
+        row = connection.execute(
+            sa.select(sa.func.count(), *sums, *products)
+            .where(*[cleaned.c[value].is_not(None) for value in CORRELATION_VALUES])).one()
+        size = len(values)
+        products = [[float(row[1 + size + i * size + j] or 0) for j in range(size)]
+                    for i in range(size)]
+        return moments_from_sums(row[0], [float(total or 0) for total in row[1:1 + size]],
+                                 products)
+
+    def aggregate(self, strategy=None, query_cube=None):
+        """
+        Run cleaning and the Step 3-5 aggregation in the database.
+
+        A `query_cube` (`sales_aggregation.SalesQueryCube`) is filled from
+        one more grouping, by Date and the breakdown dimensions.
+
+        Returns
+        -------
+        tuple
+            ``(aggregator, cleaning_stats)``: a `SalesAggregator` holding the
+            database's aggregates, and the cleaning counters of the table.
+        """
+        cleaned = self._cleaned(strategy).subquery('cleaned')
+        keys = [key for key in BREAKDOWN_DIMENSIONS if key in self.columns]
+        with self.engine.connect() as connection:
+            cube_state = self._group_sums(connection, cleaned, keys)
+            daily_state = self._group_sums(connection, cleaned, ['Date'])
+            moments = self._moments(connection, cleaned)
+            query_state = (self._group_sums(connection, cleaned, ['Date'] + keys)
+                           if query_cube is not None else None)
+        daily_state.index = pd.to_datetime(daily_state.index, errors='coerce')
+
+        rows_clean = int(cube_state['count'].sum())
+        stats = merge_cleaning_stats(new_cleaning_stats(), self.pushed_stats(strategy, rows_clean))
+        stats['rows_read'] += rows_clean
+        stats['rows_clean'] = rows_clean
+        if not rows_clean:
+            return SalesAggregator(), stats
+        if query_state is not None:
+            query_state.index = pd.MultiIndex.from_arrays(
+                [pd.to_datetime(query_state.index.get_level_values(0), errors='coerce')]
+                + [query_state.index.get_level_values(key) for key in keys],
+                names=['Date'] + keys)
+            query_cube.merge(SalesQueryCube.from_state(query_state))
+        return SalesAggregator.from_states(cube_state, daily_state, moments), stats
@@ -0,0 +1,121 @@
+"""
+Synthetic Sales Data
+====================
+
+Deterministic generator of sales exports shaped like the sample dataset in
+saas_sales_analysis.py, at any scale.
+
+Generated data follows the sample's schema and defect profile: an
+extraneous 'Unnamed: 0' index column, rows with negative revenue and exact
+duplicate rows. Scale (rows) and cardinality (sales reps, regions,
+products) are configurable, and blank revenue cells can be mixed in to
+exercise the missing-value stage. Rows are in date order, like a
+time-ordered export.
+
+Data is produced in fixed-size blocks, each from its own seeded random
+stream, so the same arguments always give the same rows and 100M-row files
+can be written without holding them in memory.
+"""
+
+import numpy as np
+import pandas as pd
+
+from sales_ingestion import SALES_COLUMNS
+
+SAMPLE_REPS = ['Sarah', 'Mike', 'Anil', 'Lisa', 'Raj', 'Priya']
+SAMPLE_REGIONS = ['North', 'South', 'East', 'West']
+SAMPLE_PRODUCTS = ['Basic', 'Premium', 'Enterprise']
+CUSTOMER_TYPES = ['New', 'Returning']
+
+# Defect rates of the 32-row sample: 1 negative revenue row, 1 duplicate
+DEFAULT_NEGATIVE_RATE = 1 / 32
+DEFAULT_DUPLICATE_RATE = 1 / 32
+
+GENERATOR_BLOCK_ROWS = 1_000_000
+
+
+def _labels(base, count, prefix):
+    """`count` labels: the sample's own names first, then numbered ones."""
+    width = len(str(count))
+    return (base + [f'{prefix} {i:0{width}d}' for i in range(len(base) + 1, count + 1)])[:count]
+
+
+def iter_sales_data(rows, seed=0, reps=6, regions=4, products=3, days=31,
+                    start_date='2025-01-01', negative_rate=DEFAULT_NEGATIVE_RATE,
+                    duplicate_rate=DEFAULT_DUPLICATE_RATE, missing_rate=0.0,
+                    block_rows=GENERATOR_BLOCK_ROWS):
+    """
+    Yield a synthetic raw export of `rows` rows in blocks of `block_rows`.
+
+    Parameters
+    ----------
+    rows : int
+        Total rows, including the injected duplicates.
+    seed : int
+        Base seed; block ``i`` draws from ``default_rng([seed, i])``.
+    reps, regions, products : int
+        Number of distinct sales reps, regions and products.
+    days : int
+        Dates span `days` consecutive days from `start_date`.
+    negative_rate, duplicate_rate, missing_rate : float
+        Share of rows with negative revenue, that repeat an earlier row of
+        the same block exactly, and with a blank Revenue cell.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Raw blocks with an 'Unnamed: 0' column and the `SALES_COLUMNS`.
+    """
+    rep_names = np.array(_labels(SAMPLE_REPS, reps, 'Rep'))
+    region_names = np.array(_labels(SAMPLE_REGIONS, regions, 'Region'))
+    product_names = np.array(_labels(SAMPLE_PRODUCTS, products, 'Product'))
+    start = np.datetime64(start_date, 'D')
+
+    for block, offset in enumerate(range(0, rows, block_rows)):
+        rng = np.random.default_rng([seed, block])
+        size = min(block_rows, rows - offset)
+        position = np.arange(offset, offset + size)
+
+        revenue = rng.integers(1300, 4600, size).astype('float64')
+        revenue[rng.random(size) < negative_rate] *= -1
+        revenue[rng.random(size) < missing_rate] = np.nan
+        frame = pd.DataFrame({
+            'Unnamed: 0': position,
+            'Date': (start + (position * days // rows).astype('timedelta64[D]')).astype(str),
+            'Sales Rep': rep_names[rng.integers(0, reps, size)],
+            'Region': region_names[rng.integers(0, regions, size)],
+            'Deals Closed': rng.integers(3, 10, size),
+            'Revenue': revenue,
+            'Customer Type': np.array(CUSTOMER_TYPES)[rng.integers(0, 2, size)],
+            'Product': product_names[rng.integers(0, products, size)],
+        })
+
+        # Exact duplicates repeat an earlier original row of the block with a
+        # new index
+        is_duplicate = rng.random(size) < duplicate_rate
+        originals = np.flatnonzero(~is_duplicate)
+        duplicates = np.flatnonzero(is_duplicate)
+        earlier = np.searchsorted(originals, duplicates)
+        duplicates, earlier = duplicates[earlier > 0], earlier[earlier > 0]
+        if len(duplicates):
+            take = np.arange(size)
+            take[duplicates] = originals[(rng.random(len(duplicates)) * earlier).astype(np.int64)]
+            frame = pd.concat([frame[['Unnamed: 0']],
+                               frame[SALES_COLUMNS].iloc[take].reset_index(drop=True)], axis=1)
+        yield frame
+
+
+def generate_sales_data(rows, **kwargs):
+    """Return a synthetic raw export as one DataFrame; see `iter_sales_data`."""
+    return pd.concat(iter_sales_data(rows, **kwargs), ignore_index=True)
+
+
+def write_sales_csv(path, rows, **kwargs):
+    """
+    Stream a synthetic raw export of `rows` rows to `path` as CSV.
+
+    Takes the keyword arguments of `iter_sales_data`. Returns `path`.
+    """
+    for block, frame in enumerate(iter_sales_data(rows, **kwargs)):
+        frame.to_csv(path, mode='w' if block == 0 else 'a', header=block == 0, index=False)
+    return path
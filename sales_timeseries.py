@@ -0,0 +1,127 @@
+"""
+Time-Series Rollups
+===================
+
+Calendar rollups and seasonality of cleaned sales, for the
+`trend_analysis` and `seasonal_analysis` switches of the analysis
+template.
+
+Everything is derived from the per-date state of a `SalesAggregator`,
+which is sorted once. Per-day totals are laid out on a gap-free calendar
+and accumulated into one cumulative sum. From that sum, every
+weekly/monthly/quarterly bucket and every trailing 7/30-day window is a
+difference of two entries. No row-level data is grouped again, so a
+multi-year history costs a few thousand array operations, however many
+rows it came from.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Result key -> pandas period frequency of each calendar rollup
+ROLLUP_FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q'}
+
+ROLLING_WINDOWS = (7, 30)
+
+TIME_SERIES_VALUES = ['Revenue', 'Deals Closed', 'Transactions']
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Aggregator state column behind each time-series value
+_STATE_COLUMNS = {'Revenue': 'Revenue sum', 'Deals Closed': 'Deals Closed sum',
+                  'Transactions': 'count'}
+
+_INTEGER_VALUES = ['Deals Closed', 'Transactions']
+
+
+def _calendar_totals(daily_state):
+    """
+    Per-day totals on a gap-free calendar, with intraday timestamps folded in.
+
+    Rows without a date (kept when no missing-value rule drops them) have
+    no place on the calendar; they are left out here and still count in
+    the overall totals.
+    """
+    state = daily_state[daily_state.index.notna()].sort_index()
+    if state.empty:
+        return pd.DatetimeIndex([], name='Date'), np.zeros((0, len(TIME_SERIES_VALUES)))
+    days = state.index.normalize()
+    calendar = pd.date_range(days[0], days[-1], freq='D', name='Date')
+    offsets = (days - days[0]).days.to_numpy()
+    totals = np.column_stack([
+        np.bincount(offsets, weights=state[_STATE_COLUMNS[value]].to_numpy(dtype='float64'),
+                    minlength=len(calendar))
+        for value in TIME_SERIES_VALUES])
+    return calendar, totals
+
+
+def _frame(totals, index):
+    # Integer-valued sums below 2**53 stay exact through the cumulative sum
+    frame = pd.DataFrame(totals, index=index, columns=TIME_SERIES_VALUES)
+    return frame.astype({value: 'int64' for value in _INTEGER_VALUES})
+
+
+def _period_rollup(calendar, cumulative, freq):
+    """Totals per calendar period, taken as differences of the cumulative sum."""
+    periods = calendar.to_period(freq)
+    codes = periods.asi8
+    # A period starts wherever the code changes (and at the first day, if any)
+    starts = np.flatnonzero(np.diff(codes, prepend=codes[:1] - 1))
+    ends = np.r_[starts[1:], len(calendar)]
+    return _frame(cumulative[ends] - cumulative[starts], periods[starts])
+
+
+def _trailing_revenue(cumulative, window):
+    """Revenue over the `window` days ending on each day; NaN until a full window."""
+    days = len(cumulative) - 1
+    trailing = np.full(days, np.nan)
+    if days >= window:
+        trailing[window - 1:] = cumulative[window:, 0] - cumulative[:days + 1 - window, 0]
+    return trailing
+
+
+def time_series_rollups(daily_state, windows=ROLLING_WINDOWS):
+    """
+    Compute calendar rollups, trailing windows and weekday seasonality.
+
+    Parameters
+    ----------
+    daily_state : pandas.DataFrame
+        `SalesAggregator.daily_state`: per-date ``Revenue sum``,
+        ``Deals Closed sum`` and ``count``.
+    windows : sequence of int
+        Trailing window lengths in days.
+
+    Returns
+    -------
+    dict
+        ``daily``, ``weekly``, ``monthly`` and ``quarterly`` frames of
+        Revenue, Deals Closed and Transactions (days without sales count
+        as zero; periods are indexed by `pandas.Period`); ``rolling``, the
+        trailing ``Revenue <n>d`` totals per day; and ``day_of_week``, the
+        average daily revenue per weekday with its ``Seasonal Index``
+        (ratio to the average day).
+    """
+    calendar, totals = _calendar_totals(daily_state)
+    # Row i holds the totals of the days before calendar[i]
+    cumulative = np.vstack([np.zeros((1, totals.shape[1])), np.cumsum(totals, axis=0)])
+
+    rollups = {'daily': _frame(totals, calendar)}
+    for name, freq in ROLLUP_FREQUENCIES.items():
+        rollups[name] = _period_rollup(calendar, cumulative, freq)
+
+    rollups['rolling'] = pd.DataFrame(
+        {f'Revenue {window}d': _trailing_revenue(cumulative, window) for window in windows},
+        index=calendar)
+
+    weekday = calendar.dayofweek.to_numpy()
+    days_per_weekday = np.bincount(weekday, minlength=7)
+    revenue_per_weekday = np.bincount(weekday, weights=totals[:, 0], minlength=7)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = revenue_per_weekday / days_per_weekday
+    average_day = totals[:, 0].mean() if len(totals) else 0
+    rollups['day_of_week'] = pd.DataFrame({
+        'Average Revenue': average,
+        'Seasonal Index': average / average_day if average_day else np.nan,
+    }, index=pd.Index(WEEKDAYS, name='Weekday'))
+    return rollups
@@ -0,0 +1,165 @@
+"""
+Schema Mapper
+=============
+
+Resolves incoming column headers against the `possible_names` lists of an
+analysis template in analysis_config.yaml and maps them onto the canonical
+sales schema ('Date', 'Revenue', 'Sales Rep', ...).
+
+Headers are normalized ("Sales_Rep", "sales rep" and "SALES-REP" all become
+"sales_rep") and looked up in a precomputed index of normalized candidate
+names. Fuzzy scoring of the header and its individual words only runs for
+headers with no exact hit. Resolved mappings are memoized per header
+signature, so any number of files sharing a layout pay the matching cost
+once per process.
+
+The columns the analysis steps group and sum by (`ANALYSIS_REQUIRED_COLUMNS`)
+are always required, even under templates that mark them optional, so an
+export lacking one fails at mapping time rather than mid-analysis.
+"""
+
+import re
+import time
+from difflib import SequenceMatcher
+
+try:
+    from fuzzywuzzy import fuzz
+except ImportError:  # Optional dependency; difflib is a slower fallback
+    fuzz = None
+
+from sales_config import get_template, load_config
+
+# Template column keys and the canonical pipeline column each one maps to
+SCHEMA_COLUMNS = {
+    'date_column': 'Date',
+    'revenue_column': 'Revenue',
+    'sales_rep_column': 'Sales Rep',
+    'region_column': 'Region',
+    'deals_column': 'Deals Closed',
+    'customer_type_column': 'Customer Type',
+    'product_column': 'Product',
+}
+
+# Canonical columns Steps 3-5 cannot run without
+ANALYSIS_REQUIRED_COLUMNS = ['Date', 'Revenue', 'Sales Rep', 'Region', 'Deals Closed']
+
+DEFAULT_FUZZY_THRESHOLD = 80
+
+# Discount applied to matches on a single word of a multi-word header
+WORD_MATCH_WEIGHT = 0.9
+
+
+def normalize_name(name):
+    """Lower-case `name` and collapse runs of non-alphanumerics to '_'."""
+    return re.sub(r'[^0-9a-z]+', '_', str(name).lower()).strip('_')
+
+
+def _similarity(left, right):
+    if fuzz is not None:
+        return fuzz.token_set_ratio(left.replace('_', ' '), right.replace('_', ' '))
+    return 100 * SequenceMatcher(None, left, right).ratio()
+
+
+class SchemaMapper:
+    """
+    Map arbitrary headers onto the canonical sales schema.
+
+    Parameters
+    ----------
+    config : dict, optional
+        Parsed analysis_config.yaml; the bundled file is loaded when omitted.
+    template : str
+        Name of the analysis template whose column lists are used.
+    fuzzy_threshold : int
+        Minimum 0-100 similarity score for a fuzzy match.
+    """
+
+    def __init__(self, config=None, template='sales_analysis',
+                 fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+        template_config = get_template(config if config is not None else load_config(), template)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.required = []
+        self._index = {}
+        self._candidates = []
+        self._cache = {}
+        self.stats = {'files_mapped': 0, 'cache_hits': 0, 'mapping_seconds': 0.0}
+
+        for section in ('required_columns', 'optional_columns'):
+            for key, spec in template_config.get(section, {}).items():
+                column = SCHEMA_COLUMNS.get(key)
+                if column is None:
+                    continue
+                if spec.get('required'):
+                    self.required.append(column)
+                # The canonical name always matches; earlier template entries
+                # win when two columns list the same candidate
+                for candidate in [column] + list(spec.get('possible_names', [])):
+                    normalized = normalize_name(candidate)
+                    self._index.setdefault(normalized, column)
+                    self._candidates.append((normalized, column))
+        self.required += [column for column in ANALYSIS_REQUIRED_COLUMNS
+                          if column not in self.required]
+
+    def _resolve(self, headers):
+        mapping = {}
+        unresolved = []
+        for header in headers:
+            if str(header).startswith('Unnamed:'):
+                continue
+            column = self._index.get(normalize_name(header))
+            if column is not None and column not in mapping.values():
+                mapping[header] = column
+            else:
+                unresolved.append(header)
+
+        # Fallback: fuzzy-score the whole header against every candidate,
+        # and its individual words at a discount ("Total_Sales" hits "sales"
+        # exactly, but "Sales Person" should still prefer "salesperson").
+        # Assign best-first so each column is used at most once.
+        scored = []
+        for header in unresolved:
+            normalized = normalize_name(header)
+            words = normalized.split('_')
+            for candidate, column in self._candidates:
+                score = max([_similarity(normalized, candidate)]
+                            + [WORD_MATCH_WEIGHT * _similarity(word, candidate)
+                               for word in words])
+                if score >= self.fuzzy_threshold:
+                    scored.append((score, header, column))
+        for score, header, column in sorted(scored, key=lambda item: -item[0]):
+            if header not in mapping and column not in mapping.values():
+                mapping[header] = column
+
+        return mapping
+
+    def map_columns(self, headers):
+        """
+        Resolve `headers` to canonical column names.
+
+        Returns
+        -------
+        dict
+            ``rename`` (source header -> canonical column), ``unmapped``
+            headers, ``missing_required`` canonical columns, whether the
+            mapping came from the memo ``cached``, and ``elapsed_seconds``.
+        """
+        start = time.perf_counter()
+        signature = tuple(str(header) for header in headers)
+        cached = signature in self._cache
+        if cached:
+            rename = self._cache[signature]
+            self.stats['cache_hits'] += 1
+        else:
+            rename = self._resolve(signature)
+            self._cache[signature] = rename
+        elapsed = time.perf_counter() - start
+
+        self.stats['files_mapped'] += 1
+        self.stats['mapping_seconds'] += elapsed
+        return {
+            'rename': dict(rename),
+            'unmapped': [h for h in signature if h not in rename],
+            'missing_required': [c for c in self.required if c not in rename.values()],
+            'cached': cached,
+            'elapsed_seconds': elapsed,
+        }
@@ -0,0 +1,40 @@
+"""Shared fixtures for the sales analysis test suite."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The analysis modules are flat top-level modules of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_HEADER = 'Date,Sales Rep,Region,Deals Closed,Revenue,Customer Type,Product'
+
+SAMPLE_ROWS = [
+    '2025-01-01,Sarah,North,3,1200,New,Basic',
+    '2025-01-01,Mike,East,2,900,Returning,Premium',
+    '2025-01-02,Sarah,North,4,1600,New,Enterprise',
+    '2025-01-02,Raj,West,1,500,Returning,Basic',
+    '2025-01-03,Mike,East,2,800,New,Premium',
+    '2025-01-03,Raj,West,5,2500,Returning,Enterprise',
+]
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Write a CSV from a header line and row lines; returns its path."""
+    def write(rows=SAMPLE_ROWS, header=SAMPLE_HEADER, name='sales.csv'):
+        path = tmp_path / name
+        path.write_text('\n'.join([header, *rows]) + '\n', encoding='utf-8')
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def sales_frame():
+    """Cleaned-shaped sample rows with the production dtypes."""
+    from sales_ingestion import coerce_sales_dtypes
+
+    records = [dict(zip(SAMPLE_HEADER.split(','), row.split(','))) for row in SAMPLE_ROWS]
+    return coerce_sales_dtypes(pd.DataFrame.from_records(records))
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from sales_aggregation import SalesAggregator, SalesQueryCube
+
+
+def test_merged_partial_states_match_a_single_pass(sales_frame):
+    single = SalesAggregator().update(sales_frame).finalize()
+    merged = (SalesAggregator().update(sales_frame.iloc[:2])
+              .merge(SalesAggregator().update(sales_frame.iloc[2:])).finalize())
+
+    pd.testing.assert_frame_equal(merged['sales_summary'], single['sales_summary'])
+    pd.testing.assert_series_equal(merged['daily_revenue'], single['daily_revenue'])
+    assert merged['total_revenue'] == single['total_revenue'] == 7500
+    assert merged['total_deals'] == single['total_deals'] == 17
+
+
+def test_update_folds_chunks_like_merge(sales_frame):
+    chunked = SalesAggregator()
+    for start in range(0, len(sales_frame), 2):
+        chunked.update(sales_frame.iloc[start:start + 2])
+
+    assert chunked.finalize()['regional_revenue'].to_dict() == {
+        'West': 3000, 'North': 2800, 'East': 1700}
+
+
+def test_empty_chunks_leave_state_untouched(sales_frame):
+    aggregator = SalesAggregator().update(sales_frame.iloc[:0])
+
+    assert aggregator.is_empty
+    with pytest.raises(ValueError, match='aggregator is empty'):
+        aggregator.finalize()
+
+
+def test_saved_state_round_trips(tmp_path, sales_frame):
+    path = tmp_path / 'state.pkl'
+    SalesAggregator().update(sales_frame.iloc[:3]).save(path)
+
+    restored = SalesAggregator.load(path).update(sales_frame.iloc[3:])
+
+    assert restored.finalize()['total_revenue'] == 7500
+
+
+def test_downcast_integers_do_not_overflow_sums(sales_frame):
+    frame = sales_frame.assign(**{'Deals Closed': [100] * len(sales_frame)}).astype(
+        {'Deals Closed': 'int8'})
+
+    assert SalesAggregator().update(frame).finalize()['total_deals'] == 600
+
+
+def test_blank_dimensions_still_count_towards_the_totals(sales_frame):
+    frame = sales_frame.copy()
+    frame.loc[0, 'Region'] = None
+    frame.loc[1, 'Sales Rep'] = None
+
+    results = SalesAggregator().update(frame).finalize()
+
+    assert results['total_revenue'] == 7500
+    assert results['total_deals'] == 17
+    assert results['sales_summary']['Revenue'].sum() == 7500
+    assert results['regional_revenue'].to_dict() == {'West': 3000, 'North': 1600, 'East': 1700}
+
+
+def test_summary_uses_only_dimensions_present(sales_frame):
+    results = SalesAggregator().update(sales_frame.drop(columns=['Region'])).finalize()
+
+    assert results['sales_summary'].index.names == ['Sales Rep']
+    assert results['regional_revenue'].empty
+    assert results['rep_performance'].to_dict() == {'Mike': 1700, 'Raj': 3000, 'Sarah': 2800}
+    assert results['total_revenue'] == 7500
+
+
+def test_merge_aligns_inputs_with_different_columns(sales_frame):
+    with_type = SalesAggregator().update(sales_frame.iloc[:3])
+    without_type = SalesAggregator().update(sales_frame.iloc[3:].drop(columns=['Customer Type']))
+
+    results = with_type.merge(without_type).finalize()
+
+    assert results['total_revenue'] == 7500
+    assert results['regional_revenue'].to_dict() == {'West': 3000, 'North': 2800, 'East': 1700}
+    by_type = results['breakdowns'][('Customer Type',)]['Revenue']
+    assert by_type.dropna().sum() == 7500
+    assert by_type[by_type.index.isna()].sum() == 3800
+
+
+def test_query_cubes_merge_across_schemas(sales_frame):
+    cube = (SalesQueryCube().update(sales_frame.drop(columns=['Product']).iloc[:2])
+            .merge(SalesQueryCube().update(sales_frame.iloc[2:])))
+
+    assert cube.query(['Region'])['Revenue'].sum() == 7500
+    assert cube.query(['Product'], filters={'Product': 'Enterprise'})['Revenue'].tolist() == [4100]
@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import SAMPLE_ROWS
+from sales_aggregation import SalesAggregator
+from sales_batch import resolve_inputs, run_batch
+
+
+@pytest.fixture
+def exports(write_csv):
+    """Two CSV exports with the sample rows split between them, and a README."""
+    first = write_csv(rows=SAMPLE_ROWS[:3], name='day1.csv')
+    write_csv(rows=SAMPLE_ROWS[3:], name='day2.csv')
+    write_csv(rows=['Figures exclude refunds'], header='Notes', name='README.md')
+    return first.rsplit('/', 1)[0]
+
+
+def test_resolve_inputs_picks_supported_files_from_a_directory(exports):
+    files = resolve_inputs(exports)
+
+    assert [path.rsplit('/', 1)[1] for path in files] == ['day1.csv', 'day2.csv']
+
+
+def test_resolve_inputs_rejects_unsupported_glob_matches(exports):
+    with pytest.raises(ValueError, match=r"README\.md'\. Options: \.csv, \.tsv"):
+        resolve_inputs(f'{exports}/*')
+    with pytest.raises(FileNotFoundError, match='No input files'):
+        resolve_inputs(f'{exports}/*.xlsx')
+
+
+def test_batch_matches_a_single_pass(exports, sales_frame):
+    results = run_batch(exports, max_workers=2)
+    single = SalesAggregator().update(sales_frame).finalize()
+
+    assert results['files_processed'] == 2
+    assert results['total_revenue'] == 7500
+    assert results['total_deals'] == 17
+    assert results['cleaning_stats']['rows_clean'] == 6
+    # Files hold different category sets, so compare values, not index dtypes
+    assert results['sales_summary'].to_dict() == single['sales_summary'].to_dict()
+    assert results['rep_performance'].to_dict() == {'Mike': 1700, 'Raj': 3000, 'Sarah': 2800}
+
+
+def test_batch_merges_files_with_different_columns(write_csv):
+    full = write_csv(name='full.csv')
+    narrow = write_csv(rows=['2025-01-04,Sarah,North,2,1000'], name='narrow.csv',
+                       header='Date,Sales Rep,Region,Deals Closed,Revenue')
+
+    results = run_batch([full, narrow], max_workers=2)
+
+    assert results['total_revenue'] == 8500
+    assert results['regional_revenue']['North'] == 3800
+
+
+def test_batch_reads_excel_workbooks(write_csv, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    from conftest import SAMPLE_HEADER
+
+    book = openpyxl.Workbook()
+    book.active.append(SAMPLE_HEADER.split(','))
+    for row in SAMPLE_ROWS[3:]:
+        values = row.split(',')
+        book.active.append(values[:3] + [int(values[3]), float(values[4])] + values[5:])
+    book.save(tmp_path / 'day2.xlsx')
+    write_csv(rows=SAMPLE_ROWS[:3], name='day1.csv')
+
+    results = run_batch(str(tmp_path), max_workers=2)
+
+    assert results['files_processed'] == 2
+    assert results['total_revenue'] == 7500
+
+
+def test_rows_repeated_across_files_are_counted_once_per_file(write_csv):
+    first = write_csv(rows=SAMPLE_ROWS[:1], name='first.csv')
+    replay = write_csv(rows=SAMPLE_ROWS[:1] * 2, name='replay.csv')
+
+    results = run_batch([first, replay], max_workers=1)
+
+    # Duplicates within a file are removed; across files they are not
+    assert results['cleaning_stats']['duplicates_removed'] == 1
+    assert results['total_revenue'] == 2400
@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+
+from sales_benchmark import compare_to_baseline, main
+from sales_ingestion import SALES_COLUMNS
+from sales_synthetic import generate_sales_data, iter_sales_data, write_sales_csv
+
+
+def test_generation_is_deterministic_per_seed():
+    first = generate_sales_data(5000, seed=7, block_rows=2000)
+    again = generate_sales_data(5000, seed=7, block_rows=2000)
+    other = generate_sales_data(5000, seed=8, block_rows=2000)
+
+    pd.testing.assert_frame_equal(first, again)
+    assert not first['Revenue'].equals(other['Revenue'])
+    assert [len(block) for block in iter_sales_data(5000, block_rows=2000)] == [2000, 2000, 1000]
+
+
+def test_generated_exports_carry_the_sample_defects():
+    frame = generate_sales_data(20_000, reps=8, regions=2, days=10, missing_rate=0.01)
+
+    assert list(frame.columns) == ['Unnamed: 0'] + SALES_COLUMNS
+    assert frame['Unnamed: 0'].tolist() == list(range(20_000))
+    assert frame['Date'].nunique() == 10
+    assert set(frame['Region']) == {'North', 'South'}
+    assert {'Sarah', 'Rep 7', 'Rep 8'} <= set(frame['Sales Rep'])
+    assert 0.02 < (frame['Revenue'] < 0).mean() < 0.045
+    assert 0.02 < frame.duplicated(SALES_COLUMNS).mean() < 0.045
+    assert 0.005 < frame['Revenue'].isna().mean() < 0.015
+
+
+def test_csv_streams_every_block(tmp_path):
+    path = write_sales_csv(str(tmp_path / 'synthetic.csv'), 2500, block_rows=1000)
+
+    written = pd.read_csv(path)
+
+    assert len(written) == 2500
+    assert written['Revenue'].sum() == generate_sales_data(2500, block_rows=1000)['Revenue'].sum()
+
+
+def _report(seconds, peak, dedup_seconds):
+    return {'scales': {'1000': {'seconds': seconds, 'peak_rss_bytes': peak,
+                                'stages': {'clean.dedup': {'wall_seconds': dedup_seconds}}}}}
+
+
+def test_compare_flags_slowdowns_beyond_the_tolerance():
+    baseline = _report(1.0, 100, 0.5)
+
+    regressions = compare_to_baseline(_report(1.2, 130, 0.9), baseline, tolerance=0.25)
+
+    assert [(r['metric'], round(r['change'], 2)) for r in regressions] == [
+        ('peak_rss_bytes', 0.3), ('stages.clean.dedup', 0.8)]
+    assert compare_to_baseline(_report(1.2, 110, 0.6), baseline, tolerance=0.25) == []
+
+
+def test_compare_ignores_tiny_timings_and_unknown_scales():
+    baseline = _report(0.001, 100, 0.001)
+
+    assert compare_to_baseline(_report(0.005, 100, 0.005), baseline) == []
+    assert compare_to_baseline({'scales': {'5000': _report(9, 900, 9)['scales']['1000']}},
+                               baseline) == []
+
+
+def test_benchmark_saves_and_checks_a_baseline(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    arguments = ['--rows', '2000', '--repeat', '1', '--data-dir', str(tmp_path / 'data'),
+                 '--baseline', str(baseline)]
+
+    assert main(arguments + ['--save-baseline']) == 0
+    report = json.loads(baseline.read_text())
+    result = report['scales']['2000']
+
+    assert result['cleaning_stats']['rows_read'] == 2000
+    assert result['rows_per_second'] > 0
+    assert {'read', 'pipeline'} <= set(result['stages'])
+    assert "Baseline saved" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from sales_cache import (CleanedDataCacheWriter, cache_key, file_digest, is_cached,
+                         read_cleaned_cache)
+from sales_cleaning import new_cleaning_stats
+
+
+def test_cache_key_tracks_file_content_and_rules(write_csv):
+    path = write_csv()
+    key = cache_key(path, {'handle_missing_values': 'drop'})
+
+    assert cache_key(path, {'handle_missing_values': 'drop'}) == key
+    assert cache_key(path, {'handle_missing_values': 'fill_zero'}) != key
+    assert cache_key(write_csv(name='same.csv'), {'handle_missing_values': 'drop'}) == key
+    assert cache_key(write_csv(rows=['2025-01-01,Sarah,North,3,1200,New,Basic']),
+                     {'handle_missing_values': 'drop'}) != key
+
+
+def test_file_digest_depends_on_bytes_only(write_csv):
+    assert file_digest(write_csv()) == file_digest(write_csv(name='copy.csv'))
+    assert file_digest(write_csv()) != file_digest(write_csv(rows=[], name='empty.csv'))
+
+
+def test_cached_chunks_round_trip(sales_frame, tmp_path):
+    stats = dict(new_cleaning_stats(), rows_clean=len(sales_frame))
+    writer = CleanedDataCacheWriter(tmp_path, 'key')
+    writer.write(sales_frame.iloc[:3])
+    writer.write(sales_frame.iloc[3:])
+    writer.close(stats)
+
+    chunks, cached_stats = read_cleaned_cache(tmp_path, 'key')
+    chunks = list(chunks)
+    restored = pd.concat(chunks, ignore_index=True)
+
+    assert is_cached(tmp_path, 'key')
+    assert cached_stats == stats
+    assert restored['Revenue'].sum() == 7500
+    assert all(isinstance(chunk['Region'].dtype, pd.CategoricalDtype) for chunk in chunks)
+
+
+def test_aborted_entry_is_not_cached(sales_frame, tmp_path):
+    writer = CleanedDataCacheWriter(tmp_path, 'key')
+    writer.write(sales_frame)
+    writer.abort()
+
+    assert not is_cached(tmp_path, 'key')
+    assert not list(tmp_path.iterdir())
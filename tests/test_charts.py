@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+
+import sales_charts
+from sales_aggregation import SalesAggregator
+from sales_charts import CHARTS, ChartRenderer, render_chart
+from sales_profiling import StageProfiler
+
+
+@pytest.fixture
+def results(sales_frame):
+    return SalesAggregator().update(sales_frame).finalize()
+
+
+def test_render_chart_writes_every_format(results, tmp_path):
+    paths = render_chart('regional_revenue', {'regional_revenue': results['regional_revenue']},
+                         output_dir=str(tmp_path), formats=['png', 'svg'],
+                         style='no-such-style')
+
+    assert [os.path.basename(path) for path in paths] == ['regional_revenue.png',
+                                                          'regional_revenue.svg']
+    assert all(os.path.getsize(path) for path in paths)
+
+
+def test_renderer_writes_every_chart_and_records_worker_timings(results, tmp_path):
+    profiler = StageProfiler().activate()
+    try:
+        renderer = ChartRenderer({'chart_formats': ['png']}, output_dir=str(tmp_path / 'charts'),
+                                 max_workers=2).submit(results)
+        chart_files = renderer.wait()
+    finally:
+        profiler.deactivate()
+
+    assert set(chart_files) == set(CHARTS)
+    assert all(os.path.isfile(paths[0]) for paths in chart_files.values())
+    assert {f'charts.render.{name}' for name in CHARTS} <= set(profiler.records)
+    assert renderer._pool is None
+
+
+def test_pool_is_shut_down_when_a_later_step_fails(write_csv, tmp_path, monkeypatch):
+    import saas_sales_analysis
+
+    shutdowns = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def shutdown(self, wait=True, *, cancel_futures=False):
+            shutdowns.append(cancel_futures)
+            super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def failing_insights(results):
+        raise RuntimeError('insights failed')
+
+    monkeypatch.setattr(sales_charts, 'ProcessPoolExecutor', RecordingPool)
+    monkeypatch.setattr(saas_sales_analysis, 'print_business_insights', failing_insights)
+
+    with pytest.raises(RuntimeError, match='insights failed'):
+        saas_sales_analysis.main([write_csv(), '--output-dir', str(tmp_path)])
+
+    assert shutdowns == [True]
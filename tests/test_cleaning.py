@@ -0,0 +1,38 @@
+import pandas as pd
+
+from sales_cleaning import clean_sales_chunk, new_cleaning_stats
+from sales_dedup import FingerprintIndex
+
+
+def test_unparseable_revenue_is_dropped_as_missing_not_negative(sales_frame):
+    chunk = sales_frame.astype({'Revenue': object})
+    chunk.loc[0, 'Revenue'] = 'n/a'
+    chunk.loc[1, 'Revenue'] = -50
+    stats = new_cleaning_stats()
+
+    cleaned = clean_sales_chunk(chunk, stats)
+
+    assert stats['missing_rows_dropped'] == 1
+    assert stats['negative_revenue_removed'] == 1
+    assert stats['rows_clean'] == len(cleaned) == 4
+
+
+def test_duplicates_across_chunks_need_a_dedup_index(sales_frame):
+    stats = new_cleaning_stats()
+    index = FingerprintIndex()
+
+    clean_sales_chunk(sales_frame, stats, dedup_index=index)
+    replayed = clean_sales_chunk(sales_frame.iloc[:2], stats, dedup_index=index)
+
+    assert replayed.empty
+    assert stats['duplicates_removed'] == 2
+    assert stats['rows_clean'] == len(sales_frame)
+
+
+def test_index_columns_are_dropped(sales_frame):
+    chunk = sales_frame.assign(**{'Unnamed: 0': range(len(sales_frame))})
+
+    cleaned = clean_sales_chunk(chunk, new_cleaning_stats())
+
+    assert 'Unnamed: 0' not in cleaned.columns
+    assert pd.api.types.is_numeric_dtype(cleaned['Revenue'])
@@ -0,0 +1,84 @@
+import pytest
+
+from saas_sales_analysis import main
+
+
+@pytest.mark.parametrize('header, row, missing', [
+    ('date,amount,rep', '2025-01-01,100,Sarah', 'Region, Deals Closed'),
+    ('date,amount,rep,deals', '2025-01-01,100,Sarah,1', 'Region'),
+])
+def test_exports_without_analysis_columns_fail_clearly(write_csv, header, row, missing):
+    path = write_csv(rows=[row], header=header)
+
+    with pytest.raises(ValueError, match=f'required column\\(s\\): {missing}$'):
+        main([path, '--no-charts'])
+
+
+def test_exports_without_optional_columns_are_analyzed(write_csv, tmp_path, capsys):
+    rows = [row.rsplit(',', 2)[0] for row in
+            ['2025-01-01,Sarah,North,3,1200,New,Basic', '2025-01-02,Raj,West,1,500,New,Basic']]
+    path = write_csv(rows=rows, header='Date,Sales Rep,Region,Deals Closed,Revenue')
+
+    main([path, '--no-charts', '--output-dir', str(tmp_path)])
+
+    assert 'Total Revenue: $1,700' in capsys.readouterr().out
+
+
+def _write_config(tmp_path, **performance_config):
+    import yaml
+
+    from sales_config import load_config
+
+    config = load_config()
+    config['performance_config'].update(performance_config)
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config), encoding='utf-8')
+    return str(path)
+
+
+def test_replayed_delivery_reports_zero_new_rows(write_csv, tmp_path, capsys):
+    config = _write_config(tmp_path, dedup_index_path=str(tmp_path / 'seen.npz'))
+    arguments = [write_csv(), '--no-charts', '--config', config,
+                 '--output-dir', str(tmp_path)]
+
+    first = main(arguments)
+    replayed = main(arguments)
+    out = capsys.readouterr().out
+
+    assert first['total_revenue'] == 7500
+    assert replayed['cleaning_stats']['rows_clean'] == 0
+    assert replayed['cleaning_stats']['duplicates_removed'] == 6
+    assert 'total_revenue' not in replayed
+    assert '0 new rows: all 6 row(s) read' in out
+    assert out.count('Total Revenue') == 1
+
+
+def test_bloom_index_is_sized_from_the_config(write_csv, tmp_path):
+    from saas_sales_analysis import load_sales_data
+    from sales_config import load_config
+    from sales_dedup import FingerprintIndex
+
+    config = load_config(_write_config(tmp_path, dedup_index_mode='bloom',
+                                       dedup_index_capacity=1_000))
+
+    index = load_sales_data(write_csv(), config)['dedup_index']
+
+    assert index.mode == 'bloom'
+    assert index._num_bits == FingerprintIndex(mode='bloom', capacity=1_000)._num_bits
+
+
+def test_cache_key_follows_the_csv_dialect(tmp_path):
+    from saas_sales_analysis import load_sales_data
+    from sales_config import load_config
+
+    path = tmp_path / 'sales.csv'
+    path.write_bytes('Date,Sales Rep,Region,Deals Closed,Revenue\n'
+                     '2025-01-01,José,North,3,1200\n'.encode('cp1252'))
+    config = load_config()
+    config['performance_config']['cache_dir'] = str(tmp_path / 'cache')
+
+    detected = load_sales_data(str(path), config)['cache_key']
+    config['file_format_config']['csv']['encoding_detection'] = False
+    assumed_utf8 = load_sales_data(str(path), config)['cache_key']
+
+    assert detected != assumed_utf8
@@ -0,0 +1,47 @@
+import pytest
+
+from sales_dedup import FingerprintIndex, row_fingerprints
+
+
+@pytest.mark.parametrize('mode', ['exact', 'bloom'])
+def test_drop_seen_keeps_first_occurrences_across_chunks(sales_frame, mode):
+    index = FingerprintIndex(mode=mode, capacity=1_000)
+    doubled = sales_frame.iloc[[0, 0, 1]]
+
+    first = index.drop_seen(doubled)
+    second = index.drop_seen(sales_frame)
+
+    assert list(first.index) == [0, 1]
+    assert list(second.index) == [2, 3, 4, 5]
+    assert len(index) == len(sales_frame)
+
+
+@pytest.mark.parametrize('mode', ['exact', 'bloom'])
+def test_saved_index_still_recognizes_rows(sales_frame, tmp_path, mode):
+    index = FingerprintIndex(mode=mode, capacity=1_000)
+    index.drop_seen(sales_frame)
+    index.save(tmp_path / 'seen.npz')
+
+    restored = FingerprintIndex.load(tmp_path / 'seen.npz')
+
+    assert restored.mode == mode
+    assert restored.drop_seen(sales_frame).empty
+
+
+def test_fingerprints_ignore_storage_dtypes(sales_frame):
+    as_strings = sales_frame.astype({'Region': object, 'Deals Closed': 'float64'})
+
+    assert (row_fingerprints(sales_frame) == row_fingerprints(as_strings)).all()
+
+
+def test_unknown_mode_lists_the_options():
+    with pytest.raises(ValueError, match='Options: exact, bloom'):
+        FingerprintIndex(mode='hash')
+
+
+def test_bloom_filter_grows_with_capacity():
+    small = FingerprintIndex(mode='bloom', capacity=1_000)
+    large = FingerprintIndex(mode='bloom', capacity=100_000)
+
+    assert len(large._bits) == pytest.approx(100 * len(small._bits), rel=0.01)
+    assert small._num_hashes == large._num_hashes == 20
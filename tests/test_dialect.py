@@ -0,0 +1,79 @@
+import pytest
+
+from sales_dialect import (DEFAULT_DIALECT, describe_dialect, detect_decimal, detect_delimiter,
+                           detect_encoding, detect_header_row, detect_quote_char, sniff_csv)
+
+
+def _write(tmp_path, text, encoding='utf-8', name='export.csv'):
+    path = tmp_path / name
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+@pytest.mark.parametrize('sample, encoding', [
+    (b'\xef\xbb\xbfDate,Revenue\n', 'utf-8-sig'),
+    ('Région,Revenue\n'.encode('utf-8'), 'utf-8'),
+    ('Région,Revenue\n'.encode('cp1252'), 'cp1252'),
+    (b'Date,Revenue\x81\x8d\n', 'latin-1'),
+])
+def test_detect_encoding(sample, encoding):
+    assert detect_encoding(sample) == encoding
+
+
+@pytest.mark.parametrize('delimiter', [',', ';', '\t', '|'])
+def test_detect_delimiter(delimiter):
+    text = '\n'.join(delimiter.join(row) for row in
+                     [['Date', 'Region', 'Revenue'], ['2025-01-01', 'West', '100'],
+                      ['2025-01-02', 'East', '200']])
+
+    assert detect_delimiter(text) == delimiter
+
+
+def test_detect_delimiter_defaults_to_comma_for_one_column():
+    assert detect_delimiter('Revenue\n100\n200\n') == ','
+
+
+def test_detect_quote_char():
+    assert detect_quote_char("Date,Rep\n2025-01-01,'Smith, J'\n2025-01-02,'Lee, K'\n") == "'"
+    assert detect_quote_char('Date,Rep\n2025-01-01,Smith\n') == '"'
+
+
+def test_detect_header_row_skips_title_lines():
+    rows = [['Quarterly sales export'], [], ['Date', 'Region', 'Revenue'],
+            ['2025-01-01', 'West', '100']]
+
+    assert detect_header_row(rows) == 2
+
+
+def test_detect_decimal():
+    assert detect_decimal([['2025-01-01', '1234,50'], ['2025-01-02', '99,5']], ';') == ','
+    assert detect_decimal([['2025-01-01', '1234.50']], ';') == '.'
+    assert detect_decimal([['2025-01-01', '1234.50']], ',') == '.'
+
+
+def test_sniff_csv_reads_a_european_export(tmp_path):
+    path = _write(tmp_path, 'Sales export\n\nDatum;Region;Umsatz\n'
+                            '2025-01-01;Süd;1234,50\n2025-01-02;Nord;99,5\n', encoding='cp1252')
+
+    dialect = sniff_csv(path)
+
+    assert dialect == {'encoding': 'cp1252', 'delimiter': ';', 'quotechar': '"',
+                       'decimal': ',', 'header_row': 2}
+    assert describe_dialect(dialect) == ("cp1252, ';'-delimited, '\"' quotes, ',' decimal, "
+                                         "header on row 3")
+
+
+def test_sniff_csv_honours_disabled_detection(tmp_path):
+    path = _write(tmp_path, 'Date;Revenue\n2025-01-01;1,5\n')
+
+    dialect = sniff_csv(path, {'delimiter_detection': False, 'encoding_detection': False,
+                               'quote_char_detection': False})
+
+    assert dialect == DEFAULT_DIALECT
+
+
+def test_sniff_csv_reads_only_a_bounded_sample(tmp_path):
+    rows = ''.join(f'2025-01-01;West;{value}\n' for value in range(5000))
+    path = _write(tmp_path, 'Date;Region;Revenue\n' + rows + 'a,b,c,d,e,f\n' * 5000)
+
+    assert sniff_csv(path, sample_bytes=1024)['delimiter'] == ';'
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from sales_dtypes import (CategoryDictionary, downcast_integers, frame_bytes, optimize_dtypes,
+                          plain_frame_bytes)
+
+
+def test_chunks_share_one_sorted_vocabulary(sales_frame):
+    dictionary = CategoryDictionary()
+    first = dictionary.encode(sales_frame.iloc[:2])
+    second = dictionary.encode(sales_frame.iloc[2:])
+
+    combined = pd.concat([first, second])
+    assert isinstance(combined['Region'].dtype, pd.CategoricalDtype)
+    assert list(dictionary.vocabularies['Region']) == ['East', 'North', 'West']
+    assert combined['Region'].tolist() == sales_frame['Region'].tolist()
+
+
+def test_numeric_dimension_values_are_kept_as_labels():
+    chunk = pd.DataFrame({'Region': [1, 2, 1], 'Product': [101.0, None, 102.0],
+                          'Sales Rep': pd.Categorical([7, 8, 7])})
+
+    encoded = CategoryDictionary().encode(chunk)
+
+    assert encoded['Region'].tolist() == ['1', '2', '1']
+    assert encoded['Product'].isna().tolist() == [False, True, False]
+    assert encoded['Product'].dropna().tolist() == ['101', '102']
+    assert encoded['Sales Rep'].tolist() == ['7', '8', '7']
+
+
+def test_saved_vocabularies_keep_codes_stable(sales_frame, tmp_path):
+    dictionary = CategoryDictionary()
+    codes = dictionary.encode(sales_frame)['Product'].cat.codes.tolist()
+    dictionary.save(tmp_path / 'categories.json')
+
+    restored = CategoryDictionary.load(tmp_path / 'categories.json')
+
+    assert restored.encode(sales_frame)['Product'].cat.codes.tolist() == codes
+
+
+def test_integers_are_downcast(sales_frame):
+    narrow = downcast_integers(sales_frame.astype({'Deals Closed': 'int64'}))
+
+    assert narrow['Deals Closed'].dtype == 'int8'
+    assert narrow['Revenue'].dtype == 'float64'
+
+
+def test_savings_are_measured_against_plain_strings(sales_frame):
+    plain = sales_frame.astype({'Region': 'str', 'Sales Rep': 'str', 'Product': 'str',
+                                'Customer Type': 'str'})
+
+    # Estimated from the categories, without building the string columns
+    assert plain_frame_bytes(sales_frame) == pytest.approx(frame_bytes(plain), rel=0.05)
+    assert frame_bytes(optimize_dtypes(sales_frame)) < plain_frame_bytes(sales_frame)
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+import sales_excel
+from conftest import SAMPLE_HEADER, SAMPLE_ROWS
+from sales_excel import detect_sheet_layouts, read_sales_excel
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Four sheets of sample rows under a title row, plus a notes sheet."""
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    for month in range(4):
+        sheet = book.create_sheet(f'Month {month + 1}')
+        sheet.append(['Monthly sales export'])
+        sheet.append(SAMPLE_HEADER.split(','))
+        for row in SAMPLE_ROWS:
+            values = row.split(',')
+            sheet.append(values[:3] + [int(values[3]), float(values[4])] + values[5:])
+    book.create_sheet('Notes').append(['Figures exclude refunds'])
+    path = tmp_path / 'sales.xlsx'
+    book.save(path)
+    return str(path)
+
+
+def test_layouts_skip_title_rows_and_non_sales_sheets(workbook):
+    from schema_mapper import SchemaMapper
+
+    layouts = detect_sheet_layouts(workbook, SchemaMapper())
+
+    assert [layout['header_row'] for layout in layouts[:4]] == [1, 1, 1, 1]
+    assert layouts[4]['missing_required']
+
+
+def test_parallel_read_matches_sequential_read(workbook):
+    sequential = pd.concat(read_sales_excel(workbook, max_workers=1), ignore_index=True)
+    parallel = pd.concat(read_sales_excel(workbook, max_workers=2), ignore_index=True)
+
+    assert len(sequential) == 4 * len(SAMPLE_ROWS)
+    assert sequential['Revenue'].sum() == 4 * 7500
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+
+def test_sheets_in_flight_are_bounded_by_the_workers(workbook, monkeypatch):
+    submitted = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[1]['sheet'])
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(sales_excel, 'ProcessPoolExecutor', RecordingPool)
+    chunks = read_sales_excel(workbook, max_workers=2)
+
+    next(chunks)
+    assert submitted == ['Month 1', 'Month 2', 'Month 3']
+    assert len(list(chunks)) == 3
+    assert submitted == ['Month 1', 'Month 2', 'Month 3', 'Month 4']
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import sales_image
+from conftest import SAMPLE_HEADER, SAMPLE_ROWS
+from sales_image import _otsu_threshold, read_sales_images, words_to_tables
+
+WORD_HEIGHT = 20
+
+
+def _ocr_data(lines):
+    """tesseract ``image_to_data`` dict of `lines`, each a list of (left, text) words."""
+    data = {key: [] for key in ('text', 'conf', 'block_num', 'par_num', 'line_num',
+                                'left', 'top', 'width', 'height')}
+    for number, words in enumerate(lines):
+        # A layout entry without text opens every line, as tesseract reports it
+        for left, text in [(0, ''), *words]:
+            data['text'].append(text)
+            data['conf'].append(-1 if not text else 90)
+            data['block_num'].append(1)
+            data['par_num'].append(1)
+            data['line_num'].append(number)
+            data['left'].append(left)
+            data['top'].append(number * 2 * WORD_HEIGHT)
+            data['width'].append(10 * len(text))
+            data['height'].append(WORD_HEIGHT)
+    return data
+
+
+def test_words_to_tables_splits_cells_at_wide_gaps():
+    data = _ocr_data([
+        [(0, 'Quarterly'), (100, 'sales')],
+        [(0, 'Date'), (200, 'Sales'), (260, 'Rep'), (400, 'Revenue')],
+        [(0, '2025-01-01'), (200, 'Sarah'), (400, '1,200')],
+        [(0, '2025-01-02'), (400, '900')],
+        [(0, 'Page'), (45, '1')],
+    ])
+
+    tables = words_to_tables(data)
+
+    assert tables == [[['Date', 'Sales Rep', 'Revenue'],
+                       ['2025-01-01', 'Sarah', '1,200'],
+                       ['2025-01-02', '', '900']]]
+
+
+def test_words_to_tables_without_structure_detection_keeps_line_cells():
+    data = _ocr_data([
+        [(0, 'Date'), (200, 'Revenue')],
+        [(0, '2025-01-02'), (400, '900')],
+        [(0, 'Notes')],
+        [(0, 'Region'), (200, 'Deals')],
+    ])
+
+    tables = words_to_tables(data, structure_detection=False)
+
+    assert tables == [[['Date', 'Revenue'], ['2025-01-02', '900']],
+                      [['Region', 'Deals']]]
+    assert words_to_tables(_ocr_data([[(0, '')]])) == []
+
+
+def test_otsu_threshold_separates_ink_from_paper():
+    histogram = [0] * 256
+    for level in range(20, 40):
+        histogram[level] = 50
+    for level in range(200, 240):
+        histogram[level] = 400
+
+    assert 39 <= _otsu_threshold(histogram) < 200
+    assert _otsu_threshold([0] * 128 + [10] + [0] * 127) == 0
+
+
+def test_preprocess_image_binarizes_and_upscales():
+    Image = pytest.importorskip('PIL.Image')
+    from PIL import ImageDraw
+
+    scan = Image.new('RGB', (400, 100), (235, 230, 220))
+    ImageDraw.Draw(scan).rectangle([40, 30, 200, 60], fill=(30, 30, 40))
+
+    page = sales_image.preprocess_image(scan)
+
+    assert page.mode == 'L' and page.width == sales_image.OCR_MIN_WIDTH
+    histogram = page.histogram()
+    assert [level for level, count in enumerate(histogram) if count] == [0, 255]
+
+
+def test_frames_in_flight_are_bounded_by_the_workers(monkeypatch):
+    submitted = []
+
+    def recognize_frame(path, frame, preprocessing, structure_detection):
+        return [[SAMPLE_HEADER.split(','), SAMPLE_ROWS[frame].split(',')]]
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[1])
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(sales_image, 'ProcessPoolExecutor', RecordingPool)
+    monkeypatch.setattr(sales_image, '_recognize_frame', recognize_frame)
+    monkeypatch.setattr(sales_image, 'count_image_frames', lambda path: 5)
+    chunks = read_sales_images('scan.tif', chunksize=1, max_workers=2)
+
+    assert next(chunks)['Revenue'].tolist() == [1200]
+    assert submitted == [0, 1, 2]
+    assert [chunk['Revenue'].iloc[0] for chunk in chunks] == [900, 1600, 500, 800]
+    assert submitted == [0, 1, 2, 3, 4]
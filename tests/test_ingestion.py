@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from sales_ingestion import (CATEGORICAL_COLUMNS, coerce_sales_dtypes, estimate_chunk_rows,
+                             read_sales_csv)
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'c'])
+def test_read_sales_csv_yields_typed_bounded_chunks(write_csv, engine):
+    path = write_csv()
+    chunks = list(read_sales_csv(path, chunksize=4, engine=engine))
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    chunk = chunks[0]
+    assert pd.api.types.is_datetime64_any_dtype(chunk['Date'])
+    assert chunk['Deals Closed'].dtype == 'Int32'
+    assert chunk['Revenue'].dtype == 'float64'
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(chunk[column].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'c'])
+def test_read_sales_csv_skips_index_columns_and_renames(write_csv, engine):
+    path = write_csv(rows=['0,2025-01-01,100', '1,2025-01-02,200'],
+                     header='Unnamed: 0,day,amount')
+    chunks = list(read_sales_csv(path, chunksize=10, engine=engine,
+                                 rename={'day': 'Date', 'amount': 'Revenue'}))
+
+    assert list(chunks[0].columns) == ['Date', 'Revenue']
+    assert chunks[0]['Revenue'].tolist() == [100.0, 200.0]
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'c'])
+def test_read_sales_csv_parses_numbers_leniently(write_csv, engine):
+    path = write_csv(rows=['2025-01-01,Sarah,9.0,"1,234.50"', '2025-01-02,Raj,2,oops',
+                           '2025-01-03,Mike,,300'],
+                     header='Date,Sales Rep,Deals Closed,Revenue')
+    chunk = next(read_sales_csv(path, chunksize=10, engine=engine))
+
+    assert chunk['Deals Closed'].dtype == 'Int32'
+    assert chunk['Deals Closed'].tolist()[:2] == [9, 2]
+    assert chunk['Revenue'].tolist()[0] == 1234.5
+    assert chunk[['Deals Closed', 'Revenue']].isna().sum().tolist() == [1, 1]
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'c'])
+def test_read_sales_csv_strips_decimal_comma_thousands(write_csv, engine):
+    path = write_csv(rows=['2025-01-01;Sarah;3;1.234,50', '2025-01-02;Raj;2,0;99,5'],
+                     header='Date;Sales Rep;Deals Closed;Revenue')
+    chunk = next(read_sales_csv(path, chunksize=10, engine=engine))
+
+    assert chunk['Deals Closed'].tolist() == [3, 2]
+    assert chunk['Revenue'].tolist() == [1234.5, 99.5]
+
+
+def test_read_sales_csv_rejects_unknown_engine(write_csv):
+    with pytest.raises(ValueError, match='Options: pyarrow, c'):
+        list(read_sales_csv(write_csv(), engine='python'))
+
+
+def test_estimate_chunk_rows_scales_with_memory_limit(write_csv):
+    path = write_csv()
+    small = estimate_chunk_rows(path, memory_limit_mb=1)
+    large = estimate_chunk_rows(path, memory_limit_mb=100)
+
+    assert 1 <= small < large
+
+
+def test_coerce_sales_dtypes_nulls_unparseable_values():
+    frame = coerce_sales_dtypes(pd.DataFrame({
+        'Date': ['2025-01-01', 'not a date'],
+        'Revenue': ['100', 'n/a'],
+        'Deals Closed': ['2.0', ''],
+    }))
+
+    assert frame['Date'].isna().tolist() == [False, True]
+    assert frame['Revenue'].isna().tolist() == [False, True]
+    assert frame['Deals Closed'].tolist()[0] == 2
+    assert frame['Deals Closed'].dtype == 'Int32'
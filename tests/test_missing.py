@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_missing import MissingValueHandler
+
+
+@pytest.fixture
+def gappy_frame():
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-03',
+                                '2025-01-01', '2025-01-03', None]),
+        'Sales Rep': ['Sarah', 'Sarah', 'Sarah', 'Mike', 'Mike', 'Mike'],
+        'Revenue': [100.0, np.nan, 300.0, 50.0, np.nan, 70.0],
+        'Deals Closed': pd.array([1, 2, None, 1, 1, 1], dtype='Int32'),
+    })
+
+
+def test_drop_removes_incomplete_and_undated_rows(gappy_frame):
+    stats = {}
+    cleaned = MissingValueHandler('drop').apply(gappy_frame, stats)
+
+    assert list(cleaned.index) == [0, 3]
+    assert stats == {'missing_values_filled': 0, 'missing_rows_dropped': 4}
+    assert cleaned['Deals Closed'].dtype == 'int32'
+
+
+def test_fill_zero_and_fill_mean(gappy_frame):
+    zero = MissingValueHandler('fill_zero').apply(gappy_frame, {})
+    mean = MissingValueHandler('fill_mean').apply(gappy_frame, {})
+
+    assert zero.loc[1, 'Revenue'] == 0
+    assert zero.loc[2, 'Deals Closed'] == 0
+    assert mean.loc[1, 'Revenue'] == pytest.approx((100 + 300 + 50) / 3)
+
+
+def test_interpolate_is_time_weighted_within_each_rep(gappy_frame):
+    stats = {}
+    cleaned = MissingValueHandler('interpolate').apply(gappy_frame, stats)
+
+    assert cleaned.loc[1, 'Revenue'] == 200
+    # Mike's only later value sits on the undated, dropped row
+    assert cleaned.loc[4, 'Revenue'] == 50
+    assert stats == {'missing_values_filled': 3, 'missing_rows_dropped': 1}
+
+
+def test_interpolation_continues_from_the_previous_chunk():
+    handler = MissingValueHandler('interpolate', columns=['Revenue'])
+    first = pd.DataFrame({'Date': pd.to_datetime(['2025-01-01']), 'Sales Rep': ['Sarah'],
+                          'Revenue': [100.0]})
+    second = pd.DataFrame({'Date': pd.to_datetime(['2025-01-02', '2025-01-03']),
+                           'Sales Rep': ['Sarah', 'Sarah'], 'Revenue': [np.nan, 300.0]})
+
+    handler.apply(first, {})
+    cleaned = handler.apply(second, {})
+
+    assert cleaned['Revenue'].tolist() == [200, 300]
+
+
+def test_unknown_strategy_lists_the_options():
+    assert MissingValueHandler.from_config({}) is None
+    with pytest.raises(ValueError, match='Options: drop, fill_zero'):
+        MissingValueHandler('median')
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from sales_outliers import FLAG_COLUMN, OutlierDetector
+
+
+@pytest.fixture
+def revenue_frame():
+    revenue = [100.0, 105.0, 98.0, 102.0, 99.0, 101.0, 103.0, 97.0, 5000.0]
+    return pd.DataFrame({'Region': ['North'] * len(revenue), 'Revenue': revenue,
+                         'Deals Closed': [1] * len(revenue)})
+
+
+@pytest.mark.parametrize('method', ['iqr', 'zscore'])
+def test_flag_marks_the_extreme_row(revenue_frame, method):
+    detector = OutlierDetector(method=method, zscore_threshold=2.5)
+    stats = {}
+
+    flagged = detector.update(revenue_frame).apply(revenue_frame, stats)
+
+    assert flagged[FLAG_COLUMN].tolist() == [False] * 8 + [True]
+    assert stats['outliers_detected'] == 1
+
+
+def test_remove_and_cap_actions(revenue_frame):
+    removed = OutlierDetector(action='remove').update(revenue_frame).apply(revenue_frame, {})
+    capped = OutlierDetector(action='cap').update(revenue_frame).apply(revenue_frame, {})
+
+    assert len(removed) == 8
+    assert len(capped) == 9
+    assert capped['Revenue'].max() < 200
+
+
+def test_cap_keeps_nullable_integer_columns(revenue_frame):
+    frame = revenue_frame.assign(**{'Deals Closed': pd.array(
+        [2, 3, None, 2, 3, 2, 3, 2, 90], dtype='Int32')})
+
+    capped = OutlierDetector(action='cap').update(frame).apply(frame, {})
+
+    assert capped['Deals Closed'].dtype == 'Int32'
+    assert capped['Deals Closed'].isna().tolist() == [False, False, True] + [False] * 6
+    assert capped['Deals Closed'].max() < 90
+
+
+def test_merged_state_matches_a_single_pass(revenue_frame):
+    single = OutlierDetector().update(revenue_frame)
+    merged = (OutlierDetector().update(revenue_frame.iloc[:4])
+              .merge(OutlierDetector().update(revenue_frame.iloc[4:])))
+
+    pd.testing.assert_frame_equal(merged.bounds(), single.bounds())
+
+
+def test_small_groups_are_never_flagged(revenue_frame):
+    detector = OutlierDetector(group_by=['Region'], min_group_size=20)
+    flagged = detector.update(revenue_frame).apply(revenue_frame, {})
+
+    assert not flagged[FLAG_COLUMN].any()
+
+
+def test_from_config_and_validation():
+    assert OutlierDetector.from_config({'outlier_detection': 'none'}) is None
+    with pytest.raises(ValueError, match='Options: flag, remove, cap'):
+        OutlierDetector(action='drop')
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import sales_pdf
+from conftest import SAMPLE_HEADER, SAMPLE_ROWS
+from sales_pdf import decimal_option, detect_decimal, read_sales_pdf, table_rows_to_frame
+
+
+def _rows(revenues):
+    return [{'Date': '2025-01-01', 'Sales Rep': 'Sarah', 'Region': 'North',
+             'Deals Closed': '1', 'Revenue': revenue} for revenue in revenues]
+
+
+def test_report_formatting_is_parsed():
+    frame = table_rows_to_frame(_rows(['$1,234.50', '(120.00)', '980']))
+
+    assert frame['Revenue'].tolist() == [1234.5, -120.0, 980.0]
+
+
+def test_decimal_comma_is_detected():
+    frame = table_rows_to_frame(_rows(['1.234,50 €', '(120,00)', '1.000']))
+
+    assert frame['Revenue'].tolist() == [1234.5, -120.0, 1000.0]
+
+
+def test_configured_separator_overrides_detection():
+    frame = table_rows_to_frame(_rows(['1,234', '2,5']), decimal=',')
+
+    assert frame['Revenue'].tolist() == [1.234, 2.5]
+
+
+def test_detect_decimal_ignores_ambiguous_thousands():
+    assert detect_decimal(pd.Series(['1,234', '1.234', None])) == '.'
+    assert detect_decimal(pd.Series(['1.234.567,8', '12'])) == ','
+
+
+def test_unknown_decimal_separator_lists_the_options():
+    assert decimal_option({}) == 'auto'
+    with pytest.raises(ValueError, match="Options: auto, ., ,"):
+        decimal_option({'decimal_separator': ';'})
+
+
+def test_pages_in_flight_are_bounded_by_the_workers(monkeypatch):
+    submitted = []
+
+    def extract_pages(path, requests):
+        return {(page, method): [[SAMPLE_HEADER.split(','), SAMPLE_ROWS[page].split(',')]]
+                for page, methods in requests for method in methods}
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[1][0][0])
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(sales_pdf, 'ProcessPoolExecutor', RecordingPool)
+    monkeypatch.setattr(sales_pdf, '_extract_pages', extract_pages)
+    monkeypatch.setattr(sales_pdf, 'count_pdf_pages', lambda path: 5)
+    monkeypatch.setattr(sales_pdf, 'PDF_PAGES_PER_TASK', 1)
+    chunks = read_sales_pdf('report.pdf', chunksize=1, max_workers=2)
+
+    assert next(chunks)['Revenue'].tolist() == [1200]
+    assert submitted == [0, 1, 2]
+    assert [chunk['Revenue'].iloc[0] for chunk in chunks] == [900, 1600, 500, 800]
+    assert submitted == [0, 1, 2, 3, 4]
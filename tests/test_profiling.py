@@ -0,0 +1,91 @@
+import json
+import tracemalloc
+
+import pytest
+
+from sales_profiling import StageProfiler, get_profiler, iter_stage, profile_stage
+
+
+@pytest.fixture
+def profiler():
+    profiler = StageProfiler().activate()
+    yield profiler
+    profiler.deactivate()
+
+
+def test_stages_are_no_ops_without_an_active_profiler():
+    assert get_profiler() is None
+    with profile_stage('clean', rows_in=10) as stage:
+        stage.rows_out = 5
+
+    assert list(iter_stage('read', [[1, 2]])) == [[1, 2]]
+
+
+def test_iter_stage_counts_only_produced_items(profiler):
+    assert list(iter_stage('read', [[1, 2, 3]])) == [[1, 2, 3]]
+    list(iter_stage('read', [[1], [2, 3]]))
+    list(iter_stage('empty', []))
+
+    assert profiler.records['read']['calls'] == 3
+    assert profiler.records['read']['rows_out'] == 6
+    assert profiler.records['empty']['calls'] == 0
+
+
+def test_repeated_stages_are_summed(profiler):
+    for rows in (4, 6):
+        with profile_stage('clean.dedup', rows_in=rows) as stage:
+            stage.rows_out = rows - 1
+    profiler.record('chart', 0.5, 0.25, pid=1234, start=0.0)
+
+    records = {record['stage']: record for record in profiler.metrics()['stages']}
+
+    assert records['clean.dedup']['calls'] == 2
+    assert (records['clean.dedup']['rows_in'], records['clean.dedup']['rows_out']) == (10, 8)
+    assert records['chart']['wall_seconds'] == 0.5
+    assert records['chart']['rows_in'] is None
+
+
+def test_metrics_and_trace_files(profiler, tmp_path):
+    with profile_stage('read') as stage:
+        stage.rows_out = 3
+
+    profiler.write_json(tmp_path / 'metrics.json', cleaning_stats={'rows_clean': 3})
+    profiler.write_chrome_trace(tmp_path / 'trace.json')
+    metrics = json.loads((tmp_path / 'metrics.json').read_text())
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+
+    assert metrics['cleaning_stats'] == {'rows_clean': 3}
+    assert [stage['stage'] for stage in metrics['stages']] == ['read']
+    assert trace['traceEvents'][0]['name'] == 'read'
+    assert trace['traceEvents'][0]['args'] == {'rows_out': 3}
+
+
+def test_tracemalloc_records_the_profiled_stage_peak():
+    profiler = StageProfiler(profile_stage='clean', profile_mode='tracemalloc').activate()
+    try:
+        with profile_stage('clean'):
+            block = bytearray(1024 * 1024)
+        with profile_stage('read'):
+            pass
+    finally:
+        profiler.deactivate()
+        tracemalloc.stop()
+
+    assert len(block) and profiler.records['clean']['allocated_peak_bytes'] >= 1024 * 1024
+    assert 'allocated_peak_bytes' not in profiler.records['read']
+    assert profiler.metrics()['profile'] == {'stage': 'clean', 'mode': 'tracemalloc',
+                                             'ran': True}
+
+
+def test_cprofile_dump_and_mode_validation(tmp_path):
+    profiler = StageProfiler(profile_stage='read').activate()
+    try:
+        assert not profiler.dump_profile(tmp_path / 'none.pstats')
+        with profile_stage('read'):
+            sum(range(1000))
+    finally:
+        profiler.deactivate()
+
+    assert profiler.dump_profile(tmp_path / 'read.pstats')
+    with pytest.raises(ValueError, match='Options: cprofile, tracemalloc'):
+        StageProfiler(profile_mode='perf')
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from sales_aggregation import SalesAggregator
+from sales_rankings import format_entries, leaderboard
+
+
+def test_leaderboard_selects_both_ends():
+    totals = pd.Series({'A': 50.0, 'B': 10.0, 'C': 30.0, 'D': 40.0, 'E': 20.0})
+
+    ranked = leaderboard(totals, n=2)
+
+    assert ranked['top'].to_dict() == {'A': 50, 'D': 40}
+    assert ranked['bottom'].index.tolist() == ['B', 'E']
+
+
+def test_leaderboard_skips_missing_keys_and_totals_and_keeps_tie_order():
+    totals = pd.Series([30.0, 99.0, 30.0, np.nan, 10.0], index=['A', np.nan, 'B', 'C', 'D'])
+
+    ranked = leaderboard(totals, n=3)
+
+    assert ranked['top'].index.tolist() == ['A', 'B', 'D']
+    assert ranked['bottom'].index.tolist() == ['D', 'A', 'B']
+
+
+def test_revenue_leaderboards_cover_every_present_dimension(sales_frame):
+    rankings = SalesAggregator().update(sales_frame).finalize()['rankings']
+
+    assert list(rankings) == ['Sales Rep', 'Region', 'Product', 'Date']
+    assert rankings['Sales Rep']['top'].to_dict() == {'Raj': 3000, 'Sarah': 2800, 'Mike': 1700}
+    assert rankings['Region']['bottom'].index[0] == 'East'
+    assert rankings['Date']['top'].index[0] == pd.Timestamp('2025-01-03')
+
+
+def test_dimensions_absent_from_the_data_are_not_ranked(sales_frame):
+    narrow = sales_frame.drop(columns=['Product', 'Customer Type'])
+    narrow.loc[0, 'Date'] = pd.NaT
+
+    rankings = SalesAggregator().update(narrow).finalize()['rankings']
+
+    assert list(rankings) == ['Sales Rep', 'Region', 'Date']
+    assert rankings['Date']['top'].notna().all()
+    assert len(rankings['Date']['top']) == 3
+
+
+def test_format_entries():
+    entries = pd.Series([12340.4, 9870.0], index=[pd.Timestamp('2025-01-03'), 'Mike'])
+
+    assert format_entries(entries) == '2025-01-03 ($12,340), Mike ($9,870)'
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from sales_aggregation import SalesAggregator
+from sales_reports import MetricsStore, render_report, write_reports
+
+
+@pytest.fixture
+def store(sales_frame):
+    return MetricsStore(SalesAggregator().update(sales_frame).finalize())
+
+
+def test_store_computes_every_scope_from_the_aggregates(store):
+    overall = store.metrics('overall', 'all')
+    west = store.metrics('region', 'West')
+    sarah = store.metrics('sales_rep', 'Sarah')
+    january = store.metrics('month', '2025-01')
+
+    assert store.scopes() == ['overall', 'region', 'sales_rep', 'month']
+    assert (overall['revenue'], overall['deals'], overall['transactions']) == (7500, 17, 6)
+    assert (overall['top_region'], overall['top_rep'], overall['best_day']) == (
+        'West', 'Raj', '2025-01-03')
+    assert (west['rank'], west['ranked'], west['revenue_share']) == (1, 3, 0.4)
+    assert (west['top_rep'], west['top_product'], west['top_product_revenue']) == (
+        'Raj', 'Enterprise', 2500)
+    assert (sarah['avg_deal_size'], sarah['top_region']) == (400, 'North')
+    assert (january['active_days'], january['best_day_revenue']) == (3, 3300)
+
+
+def test_blank_dimension_values_get_no_report(sales_frame):
+    sales_frame.loc[0, 'Region'] = None
+
+    store = MetricsStore(SalesAggregator().update(sales_frame).finalize())
+
+    assert store.keys('region') == ['East', 'North', 'West']
+    assert store.metrics('region', 'North')['revenue'] == 1600
+    assert store.metrics('overall', 'all')['revenue'] == 7500
+
+
+def test_reports_render_in_every_format(store):
+    metrics = dict(store.metrics('region', 'East'), top_rep='<Mike & Co>',
+                   top_product=None, top_product_revenue=None)
+
+    text = render_report(metrics, 'text')
+    page = render_report(metrics, 'html')
+
+    assert '• Total Revenue: $1,700\n' in text
+    assert '• Share of Revenue: 22.7%\n' in text
+    assert '• Top Product: n/a ($n/a)\n' in text
+    assert '&lt;Mike &amp; Co&gt;' in page and '<Mike' not in page
+    assert json.loads(render_report(metrics, 'json'))['rank'] == 3
+
+
+def test_write_reports_writes_one_file_per_scope_value_and_format(store, tmp_path):
+    written = write_reports(store, str(tmp_path / 'reports'), scopes=['region', 'month'],
+                            formats=['text', 'json'], max_workers=2)
+
+    assert sorted(os.path.basename(path) for path in written['region']) == [
+        'region-east.json', 'region-east.txt', 'region-north.json', 'region-north.txt',
+        'region-west.json', 'region-west.txt']
+    assert [os.path.basename(path) for path in written['month']] == [
+        'month-2025-01.txt', 'month-2025-01.json']
+    report = json.loads((tmp_path / 'reports' / 'region-west.json').read_text())
+    assert report['scope_label'] == 'Region: West'
+
+
+def test_values_slugging_alike_get_distinct_files(sales_frame, tmp_path):
+    sales_frame['Sales Rep'] = pd.Series(['Ann Lee', 'ann-lee', 'Ann Lee', 'Raj', 'ann-lee',
+                                          'Raj'], dtype='category')
+    store = MetricsStore(SalesAggregator().update(sales_frame).finalize())
+
+    written = write_reports(store, str(tmp_path), scopes=['sales_rep'])
+
+    assert sorted(os.path.basename(path) for path in written['sales_rep']) == [
+        'sales_rep-ann-lee-2.txt', 'sales_rep-ann-lee.txt', 'sales_rep-raj.txt']
+
+
+def test_unknown_scopes_and_formats_are_rejected(store, tmp_path):
+    with pytest.raises(ValueError, match='manager, pdf. Options: overall'):
+        write_reports(store, str(tmp_path), scopes=['manager'], formats=['pdf'])
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,51 @@
+import pytest
+
+from schema_mapper import ANALYSIS_REQUIRED_COLUMNS, SchemaMapper, normalize_name
+
+
+def test_headers_are_normalized_and_matched():
+    mapping = SchemaMapper().map_columns(
+        ['Unnamed: 0', 'transaction_date', 'SALES-REP', 'Territory', 'Orders', 'Total Sales',
+         'Notes'])
+
+    assert mapping['rename'] == {'transaction_date': 'Date', 'SALES-REP': 'Sales Rep',
+                                 'Territory': 'Region', 'Orders': 'Deals Closed',
+                                 'Total Sales': 'Revenue'}
+    assert mapping['unmapped'] == ['Unnamed: 0', 'Notes']
+    assert mapping['missing_required'] == []
+
+
+def test_mappings_are_memoized_per_header_signature():
+    mapper = SchemaMapper()
+    headers = ['Date', 'Revenue', 'Sales Rep', 'Region', 'Deals Closed']
+
+    first = mapper.map_columns(headers)
+    second = mapper.map_columns(headers)
+
+    assert not first['cached'] and second['cached']
+    assert second['rename'] == first['rename']
+    assert mapper.stats == {'files_mapped': 2, 'cache_hits': 1,
+                            'mapping_seconds': mapper.stats['mapping_seconds']}
+
+
+@pytest.mark.parametrize('headers, missing', [
+    (['date', 'amount', 'rep'], ['Region', 'Deals Closed']),
+    (['date', 'amount', 'rep', 'deals'], ['Region']),
+])
+def test_analysis_columns_are_required(headers, missing):
+    assert SchemaMapper().map_columns(headers)['missing_required'] == missing
+
+
+def test_analysis_columns_stay_required_under_lenient_templates():
+    config = {'analysis_templates': {'sales_analysis': {
+        'required_columns': {'date_column': {'required': True}},
+        'optional_columns': {'region_column': {'required': False},
+                             'product_column': {'required': False}},
+    }}}
+
+    assert SchemaMapper(config).required == ANALYSIS_REQUIRED_COLUMNS
+    assert SchemaMapper().required == ANALYSIS_REQUIRED_COLUMNS
+
+
+def test_normalize_name():
+    assert normalize_name(' Sales_Rep ') == normalize_name('SALES-REP') == 'sales_rep'
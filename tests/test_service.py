@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from sales_aggregation import SalesAggregator, SalesQueryCube
+from sales_cleaning import new_cleaning_stats
+from sales_service import QueryResultCache, SalesService, WarmDataset, parse_query
+
+
+def _state(frame):
+    return {'aggregator': SalesAggregator().update(frame),
+            'query_cube': SalesQueryCube().update(frame),
+            'cleaning_stats': dict(new_cleaning_stats(), rows_clean=len(frame))}
+
+
+def _ingest_or_die(input_path, config):
+    """Ingest function whose worker process dies on inputs named 'crash'."""
+    from saas_sales_analysis import ingest_sales_data
+
+    if 'crash' in os.path.basename(input_path):
+        os._exit(1)
+    return ingest_sales_data(input_path, config)
+
+
+def _ingest_service():
+    from sales_config import load_config
+
+    return SalesService(dict(load_config(), service_config={'ingest_workers': 1}),
+                        _ingest_or_die)
+
+
+@pytest.fixture
+def service(sales_frame):
+    service = SalesService({}, ingest=None)
+    service.datasets['sales'] = WarmDataset('sales').merged('sales.csv', _state(sales_frame))
+    yield service
+    service.close()
+
+
+def test_parse_query_normalizes_equal_queries():
+    first = parse_query('group_by=region,sales_rep&start=2025-01-02T00:00&product=Premium,Basic')
+    second = parse_query('product=Basic&product=Premium&start=2025-01-02&group_by=Region,Sales Rep')
+
+    assert first == second == {
+        'group_by': ('Region', 'Sales Rep'), 'start': '2025-01-02', 'end': None,
+        'period': None, 'filters': {'Product': ('Basic', 'Premium')}}
+
+
+@pytest.mark.parametrize('query_string, message', [
+    ('group_by=colour', "Unknown dimension 'colour'"),
+    ('period=hourly', "Unknown query period 'hourly'"),
+    ('colour=red', "Unknown query parameter 'colour'"),
+    ('date=2025-01-01', "Filter dates with 'start' and 'end'"),
+])
+def test_parse_query_rejects_unknown_parameters(query_string, message):
+    with pytest.raises(ValueError, match=message):
+        parse_query(query_string)
+
+
+def test_result_cache_evicts_least_recently_used_and_invalidates_per_dataset():
+    cache = QueryResultCache(max_entries=2)
+    cache.put(('a', 1), b'1')
+    cache.put(('b', 1), b'2')
+    cache.get(('a', 1))
+    cache.put(('a', 2), b'3')
+
+    assert cache.get(('b', 1)) is None
+    cache.invalidate('a')
+    assert len(cache) == 0
+
+
+def test_query_cube_rolls_up_filtered_ranges(sales_frame):
+    cube = SalesQueryCube().update(sales_frame)
+
+    by_region = cube.query(['Region'], start='2025-01-02', end='2025-01-03',
+                           filters={'Customer Type': 'Returning'})
+    weekly = cube.query(['Date'], period='weekly')
+
+    assert by_region['Revenue'].to_dict() == {'West': 3000}
+    assert weekly['Revenue'].tolist() == [7500]
+    with pytest.raises(ValueError, match='Unknown query dimension'):
+        cube.query(['Colour'])
+
+
+def test_merged_dataset_leaves_the_served_snapshot_unchanged(service, sales_frame):
+    served = service.datasets['sales']
+    merged = served.merged('more.csv', _state(sales_frame.iloc[:1]))
+
+    assert served.generation == 1 and merged.generation == 2
+    assert served.aggregator.finalize()['total_revenue'] == 7500
+    assert merged.aggregator.finalize()['total_revenue'] == 8700
+    assert merged.inputs == ['sales.csv', 'more.csv']
+    assert merged.cleaning_stats['rows_clean'] == 7
+
+
+def test_repeated_queries_are_served_from_the_cache(service):
+    async def run():
+        first, first_hit = await service.query('sales', 'group_by=region')
+        second, second_hit = await service.query('sales', 'group_by=Region')
+        return json.loads(first), first_hit, second_hit, second == first
+
+    payload, first_hit, second_hit, same = asyncio.run(run())
+
+    assert (first_hit, second_hit, same) == (False, True, True)
+    assert payload['columns'][:2] == ['Region', 'Revenue']
+    assert {row[0]: row[1] for row in payload['rows']} == {
+        'East': 1700, 'North': 2800, 'West': 3000}
+
+
+def test_summary_and_http_errors(service):
+    async def run():
+        summary = json.loads((await service.summary('sales'))[0])
+        missing = await service._respond('GET', '/datasets/other/summary', b'')
+        bad_query = await service._respond('GET', '/datasets/sales/query?period=hourly', b'')
+        wrong_method = await service._respond('POST', '/health', b'')
+        return summary, missing[0], bad_query[0], wrong_method[0]
+
+    summary, missing, bad_query, wrong_method = asyncio.run(run())
+
+    assert summary['total_revenue'] == 7500
+    assert summary['regional_revenue'] == {'West': 3000, 'North': 2800, 'East': 1700}
+    assert (missing, bad_query, wrong_method) == (404, 400, 405)
+
+
+def test_ingest_folds_inputs_and_invalidates_cached_results(write_csv):
+    first, second = write_csv(name='first.csv'), write_csv(
+        rows=['2025-01-04,Sarah,North,2,1000,New,Basic'], name='second.csv')
+    service = _ingest_service()
+
+    async def run():
+        await service.ingest('sales', first)
+        before, _ = await service.query('sales', '')
+        await service.ingest('sales', second)
+        after, hit = await service.query('sales', '')
+        return json.loads(before), json.loads(after), hit
+
+    try:
+        before, after, hit = asyncio.run(run())
+    finally:
+        service.close()
+
+    revenue = after['columns'].index('Revenue')
+    assert before['rows'][0][revenue] == 7500
+    assert after['rows'][0][revenue] == 8500
+    assert not hit
+    assert after['generation'] == 2
+
+
+def test_ingest_merges_inputs_with_different_columns(write_csv):
+    full = write_csv(name='full.csv')
+    narrow = write_csv(rows=['2025-01-04,Sarah,North,2,1000'], name='narrow.csv',
+                       header='Date,Sales Rep,Region,Deals Closed,Revenue')
+    service = _ingest_service()
+
+    async def run():
+        await service.ingest('sales', full)
+        described = await service.ingest('sales', narrow)
+        by_product, _ = await service.query('sales', 'group_by=product')
+        summary, _ = await service.summary('sales')
+        return described, json.loads(by_product), json.loads(summary)
+
+    try:
+        described, by_product, summary = asyncio.run(run())
+    finally:
+        service.close()
+
+    assert described['generation'] == 2
+    assert summary['total_revenue'] == 8500
+    assert summary['regional_revenue']['North'] == 3800
+    assert sum(row[1] for row in by_product['rows']) == 8500
+
+
+def test_ingest_recovers_from_a_dead_worker(write_csv):
+    crash, sales = write_csv(name='crash.csv'), write_csv(name='sales.csv')
+    service = _ingest_service()
+
+    async def run():
+        with pytest.raises(BrokenProcessPool):
+            await service.ingest('sales', crash)
+        return await service.ingest('sales', sales)
+
+    try:
+        described = asyncio.run(run())
+    finally:
+        service.close()
+
+    assert described['generation'] == 1
+    assert described['inputs'] == [sales]
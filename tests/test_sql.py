@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+from conftest import SAMPLE_HEADER, SAMPLE_ROWS
+from sales_sql import SqlSalesSource, dispose_engines, is_database_url
+
+# The sample rows plus one duplicate, one negative and one blank revenue
+DIRTY_ROWS = SAMPLE_ROWS + [
+    SAMPLE_ROWS[0],
+    '2025-01-04,Mike,East,1,-300,New,Basic',
+    '2025-01-04,Raj,West,1,,New,Basic',
+]
+
+
+@pytest.fixture
+def sales_db(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sales.db'}"
+    records = [dict(zip(SAMPLE_HEADER.split(','), row.split(','))) for row in DIRTY_ROWS]
+    frame = pd.DataFrame.from_records(records).replace({'': None})
+    frame = frame.astype({'Deals Closed': 'int64', 'Revenue': 'float64'})
+    engine = sqlalchemy.create_engine(url)
+    frame.to_sql('sales', engine, index=False)
+    engine.dispose()
+    yield url
+    dispose_engines()
+
+
+def test_aggregate_pushdown_matches_the_clean_rows(sales_db):
+    aggregator, stats = SqlSalesSource(sales_db).aggregate()
+    results = aggregator.finalize()
+
+    assert results['total_revenue'] == 7500
+    assert results['total_deals'] == 17
+    assert results['regional_revenue'].to_dict() == {'West': 3000, 'North': 2800, 'East': 1700}
+    assert {key: stats[key] for key in ('rows_read', 'missing_rows_dropped',
+                                        'negative_revenue_removed', 'duplicates_removed',
+                                        'rows_clean')} == {
+        'rows_read': 9, 'missing_rows_dropped': 1, 'negative_revenue_removed': 1,
+        'duplicates_removed': 1, 'rows_clean': 6}
+
+
+def test_fill_zero_repairs_in_sql(sales_db):
+    _, stats = SqlSalesSource(sales_db).aggregate(strategy='fill_zero')
+
+    assert stats['missing_values_filled'] == 1
+    assert stats['missing_rows_dropped'] == 0
+    assert stats['rows_clean'] == 7
+
+
+def test_pushed_filters_stream_clean_rows(sales_db):
+    source = SqlSalesSource(sales_db)
+    chunks = list(source.read_chunks(chunksize=4, push_filters=True))
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert sum(chunk['Revenue'].sum() for chunk in chunks) == 7500
+    assert source.pushed_stats(None)['duplicates_removed'] == 1
+
+
+def test_row_level_rules_block_aggregate_pushdown(sales_db):
+    source = SqlSalesSource(sales_db)
+
+    assert source.aggregation_blocker({}) is None
+    assert source.aggregation_blocker({'outlier_detection': 'iqr'}) is not None
+    assert source.aggregation_blocker({'handle_missing_values': 'interpolate'}) is not None
+    assert not source.filters_pushable('fill_mean')
+
+
+def test_missing_table_columns_fail_clearly(sales_db):
+    engine = sqlalchemy.create_engine(sales_db)
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text('CREATE TABLE notes (day TEXT, amount REAL)'))
+    engine.dispose()
+
+    with pytest.raises(ValueError, match='required column\\(s\\): Sales Rep'):
+        SqlSalesSource(sales_db, table='notes')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('sqlite:////tmp/rv/s.db?timeout=5', True),
+    ('postgresql+psycopg2://host/db?sslmode=require', True),
+    ('exports/*.csv', False),
+    ('C:\\exports\\sales.csv', False),
+])
+def test_is_database_url(value, expected):
+    assert is_database_url(value) is expected
+
+
+def test_database_url_with_query_string_is_not_a_batch(sales_db, tmp_path, capsys):
+    from saas_sales_analysis import main
+
+    main([f'{sales_db}?timeout=5', '--no-charts', '--output-dir', str(tmp_path)])
+
+    out = capsys.readouterr().out
+    # The bundled rules interpolate Raj's blank revenue from his last sale
+    assert 'Total Revenue: $10,000' in out
+    assert 'batch' not in out.lower()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from sales_timeseries import time_series_rollups
+
+
+def _daily_state(revenue_by_date):
+    dates = pd.DatetimeIndex(list(revenue_by_date), name='Date')
+    revenue = np.array(list(revenue_by_date.values()), dtype='float64')
+    return pd.DataFrame({'Revenue sum': revenue, 'Deals Closed sum': np.ones(len(dates)),
+                         'count': np.ones(len(dates), dtype='int64')}, index=dates)
+
+
+def test_calendar_rollups_fill_gaps_with_zero():
+    rollups = time_series_rollups(_daily_state({
+        '2025-01-30': 100, '2025-02-03': 50, '2025-04-01 15:30': 25, '2025-04-01': 5}))
+
+    daily = rollups['daily']
+    assert len(daily) == 62
+    assert daily.loc['2025-01-31', 'Revenue'] == 0
+    assert daily.loc['2025-04-01'].tolist() == [30, 2, 2]
+    assert rollups['monthly']['Revenue'].to_dict() == {
+        pd.Period('2025-01', 'M'): 100, pd.Period('2025-02', 'M'): 50,
+        pd.Period('2025-03', 'M'): 0, pd.Period('2025-04', 'M'): 30}
+    assert rollups['quarterly']['Transactions'].tolist() == [2, 2]
+    assert rollups['weekly']['Revenue'].sum() == 180
+
+
+def test_rolling_windows_need_a_full_window():
+    state = _daily_state({f'2025-01-{day:02d}': day for day in range(1, 11)})
+
+    rolling = time_series_rollups(state, windows=(3,))['rolling']['Revenue 3d']
+
+    assert rolling.iloc[:2].isna().all()
+    assert rolling.iloc[2:].tolist() == [6, 9, 12, 15, 18, 21, 24, 27]
+
+
+def test_weekday_seasonality_is_relative_to_the_average_day():
+    # 2025-01-06 is a Monday; two full weeks with Monday at triple revenue
+    state = _daily_state({day.strftime('%Y-%m-%d'): 300 if day.dayofweek == 0 else 100
+                          for day in pd.date_range('2025-01-06', periods=14)})
+
+    day_of_week = time_series_rollups(state)['day_of_week']
+
+    assert day_of_week.loc['Monday', 'Average Revenue'] == 300
+    assert day_of_week.loc['Tuesday', 'Average Revenue'] == 100
+    assert day_of_week['Seasonal Index'].round(4).to_dict()['Monday'] == round(300 / (900 / 7), 4)
+
+
+def test_undated_rows_stay_off_the_calendar():
+    state = pd.concat([_daily_state({'2025-01-01': 100, '2025-01-03': 50}),
+                       _daily_state({pd.NaT: 999})])
+
+    rollups = time_series_rollups(state)
+
+    assert rollups['daily']['Revenue'].tolist() == [100, 0, 50]
+
+    undated_only = time_series_rollups(_daily_state({pd.NaT: 999}))
+    assert undated_only['daily'].empty and undated_only['monthly'].empty
+    assert undated_only['day_of_week']['Average Revenue'].isna().all()
+
+
+def test_aggregator_with_blank_dates_finalizes(sales_frame):
+    from sales_aggregation import SalesAggregator
+
+    undated = sales_frame.copy()
+    undated.loc[0, 'Date'] = pd.NaT
+
+    results = SalesAggregator().update(undated).finalize()
+
+    assert results['total_revenue'] == 7500
+    assert results['time_series']['daily']['Revenue'].sum() == 6300